@@ -1,17 +1,66 @@
 """Streamlit chat application with Claude via AWS Bedrock."""
 
-import boto3
+import logging
+import time
+import uuid
+
 import streamlit as st
-from botocore.exceptions import ClientError
 
-from streamlit_chat_input_fileupload.chat_input_with_upload import (
-    chat_input_with_upload,
-)
+from streamlit_chat_input_fileupload.attachments import AttachmentStore
+from streamlit_chat_input_fileupload.backends import get_backend
+from streamlit_chat_input_fileupload.bedrock import stop_reason_note
+from streamlit_chat_input_fileupload.calls import CallPool, ModelCall
+from streamlit_chat_input_fileupload.component import chat_input_with_upload
 from streamlit_chat_input_fileupload.config import (
-    AWS_PROFILE,
-    AWS_REGION,
+    ATTACHMENT_DIR,
+    ATTACHMENT_DISK_BUDGET,
+    ATTACHMENT_MAX_AGE_S,
+    ATTACHMENT_MEMORY_BUDGET,
+    ATTACHMENT_SPILL_THRESHOLD,
     BEDROCK_MODEL,
+    CACHE_MIN_TOKENS,
+    CONTEXT_ATTACHMENT_MAX_AGE,
+    CONTEXT_MAX_BYTES,
+    CONTEXT_MAX_TOKENS,
+    CONTEXT_MAX_TURNS,
+    EXTRACT_TEXT_DOCUMENTS,
+    FILE_QUEUE_SIZE,
+    FILE_WORKERS,
+    HISTORY_PAGE_SIZE,
+    HISTORY_VISIBLE_MESSAGES,
+    IMAGE_QUALITY,
+    LLM_BACKEND,
+    LLM_POOL_SIZE,
+    LLM_TIMEOUT_S,
+    MAX_FILES_PER_MESSAGE,
+    MAX_IMAGE_DIMENSION,
     MAX_TOKENS,
+    MAX_UPLOAD_BYTES,
+    PROMPT_CACHING,
+    RESPONSE_CACHE,
+    RESPONSE_CACHE_MAX_BYTES,
+    RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_TTL_S,
+    SPOOL_THRESHOLD,
+    STREAM_RESPONSES,
+    TIMING_PANEL,
+    TIMING_PANEL_TURNS,
+    UPLOAD_MODE,
+)
+from streamlit_chat_input_fileupload.context import ContextPolicy
+from streamlit_chat_input_fileupload.conversation import Conversation
+from streamlit_chat_input_fileupload.history import render_history
+from streamlit_chat_input_fileupload.processing import FileProcessingError, FileProcessor
+from streamlit_chat_input_fileupload.response_cache import CachedBackend, create_response_cache
+from streamlit_chat_input_fileupload.timing import Span, TurnTrace
+
+logger = logging.getLogger(__name__)
+
+context_policy = ContextPolicy(
+    max_turns=CONTEXT_MAX_TURNS,
+    max_bytes=CONTEXT_MAX_BYTES,
+    max_tokens=CONTEXT_MAX_TOKENS,
+    attachment_max_age=CONTEXT_ATTACHMENT_MAX_AGE,
 )
 
 st.set_page_config(
@@ -24,28 +73,120 @@ st.title("Claude Chat")
 
 
 @st.cache_resource
-def get_bedrock_client():
-    """Initialize and cache Bedrock Runtime client."""
-    session = boto3.Session(profile_name=AWS_PROFILE)
-    return session.client("bedrock-runtime", region_name=AWS_REGION)
+def get_file_processor():
+    """Worker pool decoding and storing uploaded files for all sessions."""
+    return FileProcessor(
+        get_attachment_store(),
+        max_workers=FILE_WORKERS,
+        max_pending=FILE_QUEUE_SIZE,
+        extract_documents=EXTRACT_TEXT_DOCUMENTS,
+        spool_threshold=SPOOL_THRESHOLD,
+    )
 
 
-client = get_bedrock_client()
+@st.cache_resource
+def get_call_pool():
+    """Thread pool running model calls for all sessions."""
+    return CallPool(max_workers=LLM_POOL_SIZE, timeout=LLM_TIMEOUT_S)
 
-# Sidebar
-with st.sidebar:
-    st.header("Settings")
-    st.caption(f"Model: `{BEDROCK_MODEL}`")
 
-    if st.button("Clear Chat"):
-        st.session_state.messages = []
-        st.rerun()
+@st.cache_resource
+def get_attachment_store():
+    """Attachment store shared by all sessions, so identical files are kept once."""
+    return AttachmentStore(
+        memory_budget=ATTACHMENT_MEMORY_BUDGET,
+        spill_threshold=ATTACHMENT_SPILL_THRESHOLD,
+        store_dir=ATTACHMENT_DIR,
+        disk_budget=ATTACHMENT_DISK_BUDGET,
+        max_age=ATTACHMENT_MAX_AGE_S,
+    )
+
+
+@st.cache_resource
+def get_response_cache():
+    """Cache of replies to identical requests shared by all sessions, or None when off."""
+    return create_response_cache(
+        RESPONSE_CACHE,
+        ttl_s=RESPONSE_CACHE_TTL_S,
+        max_bytes=RESPONSE_CACHE_MAX_BYTES,
+        path=RESPONSE_CACHE_PATH,
+    )
 
-    st.divider()
-    st.header("Downloads")
 
-    # Generate sample txt file content
-    sample_content = """Sample Generated File
+# Model backend shared by all sessions: the Bedrock client and rate limiter,
+# or the local stand-in with LLM_BACKEND=fake
+client = get_backend()
+response_cache = get_response_cache()
+if response_cache is not None:
+    client = CachedBackend(client, response_cache)
+BACKEND_LABEL = "Bedrock" if LLM_BACKEND == "bedrock" else "Local fake"
+store = get_attachment_store()
+pool = get_call_pool()
+processor = get_file_processor()
+
+
+def finish_reply(call: ModelCall) -> str:
+    """Add the reply of a finished or stopped call to the history and return it."""
+    st.session_state.pending_call = None
+    reply = call.text
+    if call.error is not None:
+        reply = f"{reply}\n\nError: {call.error}".strip()
+    elif call.cancelled:
+        reply = f"{reply}\n\n_Stopped._".strip()
+    note = stop_reason_note(call.stats.stop_reason)
+    if note:
+        reply = f"{reply}\n\n{note}"
+    reply = reply or "(empty response)"
+    st.session_state.conversation.append("assistant", [{"text": reply}])
+    st.session_state.turn_stats.append(call.stats.as_dict())
+    logger.info("turn stats: %s", call.stats.as_dict())
+
+    trace = st.session_state.pending_trace
+    st.session_state.pending_trace = None
+    if trace is not None:
+        stats = call.stats
+        trace.add(
+            Span.timed(
+                "bedrock.call",
+                stats.started,
+                stats.finished,
+                time_to_first_token_ms=(stats.time_to_first_token or 0) * 1000,
+                output_tokens=stats.output_tokens,
+            )
+        )
+        trace.finish(
+            stop_reason=stats.stop_reason or "", cancelled=call.cancelled, error=call.error is not None
+        )
+        trace.export()
+        st.session_state.turn_timings = [
+            *st.session_state.turn_timings[-(TIMING_PANEL_TURNS - 1) :],
+            trace.durations(),
+        ]
+    return reply
+
+
+def stop_reply() -> None:
+    """Cancel the reply in progress and keep what arrived so far."""
+    call = st.session_state.pending_call
+    if call is not None:
+        call.cancel()
+        finish_reply(call)
+
+
+def clear_chat() -> None:
+    """Cancel the reply in progress and start an empty conversation."""
+    pool.cancel(st.session_state.session_id)
+    st.session_state.pending_call = None
+    st.session_state.pending_trace = None
+    st.session_state.conversation.clear()
+    st.session_state.turn_stats = []
+    st.session_state.turn_timings = []
+    st.session_state.pop("history_shown", None)
+
+
+def sample_file() -> str:
+    """Sample download, generated when the button is clicked."""
+    return """Sample Generated File
 =====================
 
 This is a sample text file generated by the Claude Chat application.
@@ -59,200 +200,221 @@ You can use st.download_button to send any file to the user:
 - Binary files (images, PDFs, etc.)
 """.format(timestamp=__import__("datetime").datetime.now().isoformat())
 
+
+def render_turn_stats() -> None:
+    """Per-turn statistics for the sidebar."""
+    if st.session_state.get("turn_stats"):
+        last_turn = st.session_state.turn_stats[-1]
+        if last_turn["time_to_first_token"] is not None:
+            st.caption(
+                f"Last turn: {last_turn['time_to_first_token']:.2f} s to first token, "
+                f"{last_turn['tokens_per_second'] or 0:.1f} tokens/s"
+            )
+
+    if PROMPT_CACHING and st.session_state.get("turn_stats"):
+        last_turn = st.session_state.turn_stats[-1]
+        cache_read = sum(turn["cache_read_tokens"] for turn in st.session_state.turn_stats)
+        cache_write = sum(turn["cache_write_tokens"] for turn in st.session_state.turn_stats)
+        st.caption(
+            f"Prompt cache, last turn: {last_turn['cache_read_tokens']} read / "
+            f"{last_turn['cache_write_tokens']} written tokens. "
+            f"Session: {cache_read} read / {cache_write} written."
+        )
+
+    metrics = client.metrics()
+    if metrics["calls"]:
+        st.caption(
+            f"{BACKEND_LABEL}: p50 {metrics['latency_p50']:.1f} s / p95 {metrics['latency_p95']:.1f} s, "
+            f"{metrics['throttles']} throttled, {metrics['queue_depth']} queued"
+        )
+
+    if response_cache is not None:
+        st.caption(
+            f"Response cache: {response_cache.hits} hits / {response_cache.misses} misses, "
+            f"{len(response_cache)} replies stored"
+        )
+
+    if TIMING_PANEL and st.session_state.get("turn_timings"):
+        with st.expander("Turn timings (ms)"):
+            st.dataframe(
+                [
+                    {stage: round(ms, 1) for stage, ms in turn.items()}
+                    for turn in reversed(st.session_state.turn_timings)
+                ],
+                hide_index=True,
+            )
+
+
+# Sidebar
+with st.sidebar:
+    st.header("Settings")
+    st.caption(f"Model: `{BEDROCK_MODEL}`" if LLM_BACKEND == "bedrock" else f"Model: {BACKEND_LABEL}")
+
+    # Filled again by the chat fragment when a reply finishes
+    stats_slot = st.empty()
+    with stats_slot.container():
+        render_turn_stats()
+
+    # Outside the chat fragment, so a click interrupts the reply being streamed
+    st.button("Stop", key="stop_reply", on_click=stop_reply)
+    st.button("Clear Chat", on_click=clear_chat)
+
+    st.divider()
+    st.header("Downloads")
+
     st.download_button(
         label="Download Sample TXT",
-        data=sample_content,
+        data=sample_file,
         file_name="sample_output.txt",
         mime="text/plain",
+        on_click="ignore",
     )
 
 # Initialize chat history in session state
-if "messages" not in st.session_state:
-    st.session_state.messages = []
-
-# Create container for chat messages (so input stays at bottom)
-chat_container = st.container()
-
-# Display chat history in the container
-with chat_container:
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            for content in message["content"]:
-                if "text" in content:
-                    st.markdown(content["text"])
-                elif "image" in content:
-                    st.caption(f"[Image: {content['image'].get('name', 'attached')}]")
-                elif "document" in content:
-                    st.caption(f"[Document: {content['document'].get('name', 'attached')}]")
-
-
-def get_media_type(file_type: str, file_name: str) -> str:
-    """Determine media type from file type or extension."""
-    if file_type:
-        return file_type
-
-    ext = file_name.lower().split(".")[-1] if "." in file_name else ""
-    type_map = {
-        "png": "image/png",
-        "jpg": "image/jpeg",
-        "jpeg": "image/jpeg",
-        "gif": "image/gif",
-        "webp": "image/webp",
-        "pdf": "application/pdf",
-        "txt": "text/plain",
-        "csv": "text/csv",
-        "json": "application/json",
-        "md": "text/markdown",
-        "html": "text/html",
-        "xml": "application/xml",
-    }
-    return type_map.get(ext, "application/octet-stream")
-
-
-def get_bedrock_doc_format(file_name: str, mime_type: str) -> str | None:
-    """Map file extension/MIME type to Bedrock document format.
-
-    Bedrock supports: docx, csv, html, txt, pdf, md, doc, xlsx, xls
-    """
-    ext = file_name.lower().split(".")[-1] if "." in file_name else ""
-
-    # Direct extension mapping
-    ext_map = {
-        "pdf": "pdf",
-        "txt": "txt",
-        "csv": "csv",
-        "html": "html",
-        "htm": "html",
-        "md": "md",
-        "markdown": "md",
-        "doc": "doc",
-        "docx": "docx",
-        "xls": "xls",
-        "xlsx": "xlsx",
-    }
-
-    if ext in ext_map:
-        return ext_map[ext]
-
-    # MIME type fallback
-    mime_map = {
-        "application/pdf": "pdf",
-        "text/plain": "txt",
-        "text/csv": "csv",
-        "text/html": "html",
-        "text/markdown": "md",
-        "application/msword": "doc",
-        "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
-        "application/vnd.ms-excel": "xls",
-        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": "xlsx",
-    }
-
-    return mime_map.get(mime_type)
-
-
-def build_content_block(text: str, file_info: dict | None) -> list[dict]:
-    """Build Bedrock content block from text and optional file."""
-    content = []
-
-    if file_info:
-        file_bytes = file_info["data"]
-        media_type = get_media_type(file_info["type"], file_info["name"])
-
-        if media_type.startswith("image/"):
-            content.append({
-                "image": {
-                    "format": media_type.split("/")[1],
-                    "source": {"bytes": file_bytes},
-                    "name": file_info["name"],
-                }
-            })
-        else:
-            doc_format = get_bedrock_doc_format(file_info["name"], media_type)
-            if doc_format:
-                content.append({
-                    "document": {
-                        "format": doc_format,
-                        "name": file_info["name"].replace(".", "_"),
-                        "source": {"bytes": file_bytes},
-                    }
-                })
-            else:
-                # Unsupported format - add as text note
-                content.append({
-                    "text": f"[Attached file: {file_info['name']} - format not supported for direct analysis]"
-                })
+if "conversation" not in st.session_state:
+    st.session_state.conversation = Conversation(store.get)
 
-    if text:
-        content.append({"text": text})
-
-    return content
+if "turn_stats" not in st.session_state:
+    st.session_state.turn_stats = []
+    st.session_state.turn_timings = []
 
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+    st.session_state.pending_call = None
+    st.session_state.pending_trace = None
 
-# Chat input with file upload (custom component)
-user_input = chat_input_with_upload(
-    placeholder="Send a message...",
-    key="chat_input",
-)
 
-if user_input:
+def send_message(user_input: dict, chat_container, history_span: Span) -> None:
+    """Show the user's message, add it to the history and start the reply."""
+    conversation = st.session_state.conversation
     text = user_input.get("text", "")
-    file_info = user_input.get("file")
+    files = user_input.get("files", [])
 
-    user_content = build_content_block(text, file_info)
+    if user_input.get("rejected_reasons"):
+        st.warning(
+            "Not attached: "
+            + ", ".join(f"{name} ({reason})" for name, reason in user_input["rejected_reasons"].items())
+        )
 
-    if user_content:
-        st.session_state.messages.append({"role": "user", "content": user_content})
+    trace = TurnTrace(session_id=st.session_state.session_id)
+    trace.add(history_span, *user_input.get("timings", []))
+
+    # Files are decoded and stored in the background while the message renders
+    cache_min_tokens = CACHE_MIN_TOKENS if PROMPT_CACHING else None
+    files_started = time.perf_counter()
+    pending_files = [processor.submit(file_info, cache_min_tokens) for file_info in files]
 
+    if text or files:
         with chat_container:
             with st.chat_message("user"):
-                if file_info:
+                for file_info in files:
                     st.caption(f"[File: {file_info['name']}]")
                 if text:
                     st.markdown(text)
 
-        # Build messages for Bedrock API
-        bedrock_messages = []
-        for msg in st.session_state.messages:
-            api_content = []
-            for block in msg["content"]:
-                if "text" in block:
-                    api_content.append({"text": block["text"]})
-                elif "image" in block:
-                    api_content.append({
-                        "image": {
-                            "format": block["image"]["format"],
-                            "source": {"bytes": block["image"]["source"]["bytes"]},
-                        }
-                    })
-                elif "document" in block:
-                    api_content.append({
-                        "document": {
-                            "format": block["document"]["format"],
-                            "name": block["document"]["name"],
-                            "source": {"bytes": block["document"]["source"]["bytes"]},
-                        }
-                    })
-            bedrock_messages.append({"role": msg["role"], "content": api_content})
+    user_content = []
+    for future in pending_files:
+        try:
+            user_content.extend(future.result())
+        except FileProcessingError as e:
+            st.warning(f"Not attached: {e}")
+    trace.add(Span.timed("files.process", files_started, files=len(files)))
+    if text:
+        user_content.append({"text": text})
 
-        with chat_container:
-            with st.chat_message("assistant"):
-                with st.spinner("Thinking..."):
-                    try:
-                        response = client.converse(
-                            modelId=BEDROCK_MODEL,
-                            messages=bedrock_messages,
-                            inferenceConfig={"maxTokens": MAX_TOKENS},
-                        )
-                        assistant_message = response["output"]["message"]["content"][0]["text"]
-                    except ClientError as e:
-                        assistant_message = f"Error: {e}"
-                        st.error(assistant_message)
-
-                st.markdown(assistant_message)
-
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": [{"text": assistant_message}],
-        })
-
-        st.rerun()
+    if user_content:
+        # One reply in flight per session: a new message ends the previous one
+        if st.session_state.pending_call is not None:
+            st.session_state.pending_call.cancel()
+            finish_reply(st.session_state.pending_call)
+        conversation.append("user", user_content)
+
+        with trace.span("request.build") as span:
+            request = {
+                "modelId": BEDROCK_MODEL,
+                "messages": conversation.api_messages(context_policy, cache_prefix=PROMPT_CACHING),
+                "inferenceConfig": {"maxTokens": MAX_TOKENS},
+            }
+            sent = conversation.last_context
+            span.attributes.update(messages=sent.messages, bytes=sent.bytes, tokens=sent.tokens)
+        logger.info(
+            "request context: %d messages, %d bytes, ~%d tokens "
+            "(%d turns and %d attachments dropped)",
+            sent.messages,
+            sent.bytes,
+            sent.tokens,
+            sent.dropped_turns,
+            sent.dropped_attachments,
+        )
+
+        st.session_state.pending_call = pool.submit(
+            st.session_state.session_id, client, request, stream=STREAM_RESPONSES
+        )
+        st.session_state.pending_trace = trace
+
+
+def stream_reply(call: ModelCall, chat_container) -> None:
+    """Show the reply as it arrives, then add it to the history."""
+    with chat_container:
+        with st.chat_message("assistant"):
+            placeholder = st.empty()
+            stream_started = time.perf_counter()
+            render_time = 0.0
+            try:
+                for text in call.iter_text():
+                    started = time.perf_counter()
+                    placeholder.markdown(f"{text}▌" if text else "_Thinking..._")
+                    render_time += time.perf_counter() - started
+            finally:
+                if st.session_state.pending_trace is not None:
+                    st.session_state.pending_trace.add(
+                        Span.timed("reply.stream", stream_started, render_ms=render_time * 1000)
+                    )
+            # Shown in place; the next run renders it with the history
+            placeholder.markdown(finish_reply(call))
+
+    with stats_slot.container():
+        render_turn_stats()
+
+
+@st.fragment
+def chat() -> None:
+    """History, input and reply. Sending a message reruns only this fragment."""
+    # Create container for chat messages (so input stays at bottom)
+    chat_container = st.container()
+
+    # Display the newest messages of the chat history in the container
+    history_started = time.perf_counter()
+    with chat_container:
+        render_history(
+            st.session_state.conversation.messages,
+            visible=HISTORY_VISIBLE_MESSAGES,
+            page_size=HISTORY_PAGE_SIZE,
+        )
+    history_span = Span.timed(
+        "history.render", history_started, messages=len(st.session_state.conversation)
+    )
+
+    # Chat input with file upload (custom component)
+    user_input = chat_input_with_upload(
+        placeholder="Send a message...",
+        key="chat_input",
+        upload_mode=UPLOAD_MODE,
+        max_files=MAX_FILES_PER_MESSAGE,
+        max_total_bytes=MAX_UPLOAD_BYTES,
+        max_image_dimension=MAX_IMAGE_DIMENSION,
+        image_quality=IMAGE_QUALITY,
+        decode=False,
+        check_formats=True,
+    )
+
+    if user_input:
+        send_message(user_input, chat_container, history_span)
+
+    # Streamed in this run; Stop and Clear Chat interrupt it from the sidebar
+    call = st.session_state.pending_call
+    if call is not None:
+        stream_reply(call, chat_container)
+
+
+chat()
@@ -0,0 +1,75 @@
+"""Script-run latency of handling an upload with and without the worker pool.
+
+"blocked" is the time the script thread spends before it can render the
+user's message; "ready" is the time until the content blocks exist.
+
+    python benchmarks/bench_file_processing.py
+"""
+
+import base64
+import os
+import tempfile
+import time
+
+from streamlit_chat_input_fileupload.attachments import AttachmentStore
+from streamlit_chat_input_fileupload.content import build_content_block
+from streamlit_chat_input_fileupload.processing import FileProcessor
+
+SIZES_MB = (1, 10, 50)
+ROUNDS = 3
+
+
+def payload(size: int) -> dict:
+    """A submitted file as the component delivers it (fresh bytes every call)."""
+    # Starts like a PDF, which the processor checks
+    data = b"%PDF-1.7\n" + os.urandom(size - 9)
+    return {
+        "name": "report.pdf",
+        "type": "application/pdf",
+        "size": size,
+        "data": base64.b64encode(data).decode(),
+    }
+
+
+def run_inline(store: AttachmentStore, file_info: dict) -> tuple[float, float]:
+    started = time.perf_counter()
+    files = [{**file_info, "data": base64.b64decode(file_info["data"])}]
+    build_content_block("", files, store)
+    elapsed = time.perf_counter() - started
+    return elapsed, elapsed
+
+
+def run_offload(processor: FileProcessor, file_info: dict) -> tuple[float, float]:
+    started = time.perf_counter()
+    future = processor.submit({**file_info, "encoded": file_info.pop("data")})
+    blocked = time.perf_counter() - started
+    future.result()
+    return blocked, time.perf_counter() - started
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = AttachmentStore(store_dir=store_dir)
+        processor = FileProcessor(store)
+        print(f"{'size':>6}  {'mode':<8} {'blocked ms':>11} {'ready ms':>9}")
+        for size_mb in SIZES_MB:
+            size = size_mb * 1024 * 1024
+            for mode in ("inline", "offload"):
+                blocked = ready = 0.0
+                for _ in range(ROUNDS):
+                    file_info = payload(size)
+                    if mode == "inline":
+                        b, r = run_inline(store, file_info)
+                    else:
+                        b, r = run_offload(processor, file_info)
+                    blocked += b
+                    ready += r
+                print(
+                    f"{size_mb:>4}MB  {mode:<8} {blocked / ROUNDS * 1000:>11.1f} "
+                    f"{ready / ROUNDS * 1000:>9.1f}"
+                )
+        processor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Memory held by a long chat history: nested dicts against slotted records.
+
+A history of --turns question/answer turns, every tenth with an image, is
+built as a list of nested dicts (the blocks content.py makes) and as a list
+of records.Message. Then the whole Conversation is measured, after one
+request with the app's context policy and after one sending the whole
+history, which holds the Converse API form of every message too. The text
+and the attachment digests are created beforehand and shared by all, so
+the figures are the memory of the structure around them, as counted by
+tracemalloc.
+
+    python benchmarks/bench_history_memory.py --turns 1000
+"""
+
+import argparse
+import gc
+import tracemalloc
+from typing import Any
+
+from streamlit_chat_input_fileupload.config import (
+    CONTEXT_ATTACHMENT_MAX_AGE,
+    CONTEXT_MAX_BYTES,
+    CONTEXT_MAX_TOKENS,
+    CONTEXT_MAX_TURNS,
+)
+from streamlit_chat_input_fileupload.context import ContextPolicy
+from streamlit_chat_input_fileupload.conversation import Conversation
+from streamlit_chat_input_fileupload.records import message_from_dicts
+
+POLICY = ContextPolicy(
+    max_turns=CONTEXT_MAX_TURNS,
+    max_bytes=CONTEXT_MAX_BYTES,
+    max_tokens=CONTEXT_MAX_TOKENS,
+    attachment_max_age=CONTEXT_ATTACHMENT_MAX_AGE,
+)
+
+
+def history_parts(turns: int) -> list[tuple[str, str, str | None]]:
+    """Question, answer and attachment digest (every tenth turn) of each turn."""
+    return [
+        (
+            f"Question {turn}: " + "lorem ipsum " * 20,
+            f"Answer {turn}: " + "dolor sit " * 60,
+            f"{turn:064x}" if turn % 10 == 0 else None,
+        )
+        for turn in range(turns)
+    ]
+
+
+def user_content(question: str, ref: str | None) -> list[dict[str, Any]]:
+    """Blocks as content.build_content_block() makes them."""
+    content = [{"text": question}]
+    if ref is not None:
+        image = {"format": "png", "source": {"ref": ref}, "name": "chart.png", "size": 65536}
+        content[:0] = [{"image": image}, {"cachePoint": {"type": "default"}}]
+    return content
+
+
+def build_dicts(parts: list[tuple[str, str, str | None]]) -> list[dict[str, Any]]:
+    messages = []
+    for question, answer, ref in parts:
+        messages.append({"role": "user", "content": user_content(question, ref)})
+        messages.append({"role": "assistant", "content": [{"text": answer}]})
+    return messages
+
+
+def build_records(parts: list[tuple[str, str, str | None]]) -> list:
+    messages = []
+    for question, answer, ref in parts:
+        messages.append(message_from_dicts("user", user_content(question, ref)))
+        messages.append(message_from_dicts("assistant", [{"text": answer}]))
+    return messages
+
+
+def build_conversation(
+    parts: list[tuple[str, str, str | None]], policy: ContextPolicy | None
+) -> Conversation:
+    image = b"\x89PNG\r\n\x1a\n"
+    conversation = Conversation(lambda ref: image)
+    for question, answer, ref in parts:
+        conversation.append("user", user_content(question, ref))
+        conversation.append("assistant", [{"text": answer}])
+    conversation.api_messages(policy, cache_prefix=True)
+    return conversation
+
+
+def measure(build, *args) -> int:
+    """Bytes still allocated after build(*args), keeping its result alive."""
+    gc.collect()
+    tracemalloc.start()
+    result = build(*args)
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=1000)
+    args = parser.parse_args()
+
+    parts = history_parts(args.turns)
+    messages = 2 * args.turns
+    print(f"{args.turns} turns ({messages} messages), memory around the text")
+    for label, size in (
+        ("nested dicts", measure(build_dicts, parts)),
+        ("records", measure(build_records, parts)),
+        ("Conversation, context window", measure(build_conversation, parts, POLICY)),
+        ("Conversation, whole history", measure(build_conversation, parts, None)),
+    ):
+        print(f"{label:<28} {size / 1024 / 1024:>6.2f} MiB  {size / messages:>6.0f} B/message")
+
+
+if __name__ == "__main__":
+    main()
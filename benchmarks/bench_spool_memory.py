@@ -0,0 +1,68 @@
+"""Peak memory of decoding and storing one large upload, with and without spooling.
+
+Each mode runs in a fresh process. The base64 payload is built first, then
+the peak resident set size is reset (Linux /proc/self/clear_refs) and the
+file is decoded and stored the way FileProcessor does it. The payload
+itself, which arrives with the websocket message, is not counted.
+
+    python benchmarks/bench_spool_memory.py
+"""
+
+import base64
+import os
+import subprocess
+import sys
+import tempfile
+
+from streamlit_chat_input_fileupload.attachments import AttachmentStore
+from streamlit_chat_input_fileupload.processing import process_file
+
+SIZE_MB = 100
+SPOOL_THRESHOLD = 8 * 1024 * 1024
+
+
+def status_kb(field: str) -> int:
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise KeyError(field)
+
+
+def measure(spool_threshold: int | None) -> int:
+    """Peak RSS in KiB above the RSS before processing a SIZE_MB upload."""
+    size = SIZE_MB * 1024 * 1024
+    data = b"%PDF-1.7\n" + os.urandom(size - 9)
+    file_info = {
+        "name": "report.pdf",
+        "type": "application/pdf",
+        "size": size,
+        "encoded": base64.b64encode(data).decode(),
+    }
+    del data
+
+    with tempfile.TemporaryDirectory() as store_dir:
+        store = AttachmentStore(store_dir=store_dir)
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        before = status_kb("VmRSS")
+        process_file(file_info, store, spool_threshold=spool_threshold)
+        return status_kb("VmHWM") - before
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        threshold = None if sys.argv[1] == "none" else int(sys.argv[1])
+        print(measure(threshold))
+        return
+
+    print(f"{SIZE_MB} MB upload, peak RSS above the received payload")
+    for label, arg in (("in memory", "none"), ("spooled", str(SPOOL_THRESHOLD))):
+        peak = subprocess.run(
+            [sys.executable, __file__, arg], capture_output=True, text=True, check=True
+        ).stdout
+        print(f"{label:<10} {int(peak) / 1024:>8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""app.py with a scripted chat input and a stand-in model backend, for AppTest.
+
+The chat input component needs a browser, so its return value is taken
+from st.session_state["bench_submission"] (once), and the model backend
+from st.session_state["bench_client"]. Everything else is the real app.
+"""
+
+from pathlib import Path
+import runpy
+from unittest import mock
+
+import streamlit as st
+
+from streamlit_chat_input_fileupload import backends, component
+
+APP = Path(__file__).resolve().parent.parent / "app.py"
+
+
+def scripted_input(**kwargs):
+    return st.session_state.pop("bench_submission", None)
+
+
+with (
+    mock.patch.object(component, "chat_input_with_upload", scripted_input),
+    mock.patch.object(backends, "get_backend", lambda: st.session_state.bench_client),
+):
+    runpy.run_path(str(APP), run_name="__main__")
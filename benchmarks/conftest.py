@@ -0,0 +1,11 @@
+"""Fixtures shared by the benchmark modules."""
+
+import pytest
+
+from streamlit_chat_input_fileupload.attachments import AttachmentStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Attachment store in a temporary directory."""
+    return AttachmentStore(store_dir=tmp_path / "store")
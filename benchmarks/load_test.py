@@ -0,0 +1,107 @@
+"""Load test of the app's own code: many chat sessions against the local fake backend.
+
+Every session is a Streamlit AppTest of app.py (benchmarks/chat_app.py, with
+the chat input scripted): it loads the page, then sends --turns messages and
+waits for each reply. Sessions run on --workers processes, each sharing one
+FakeBackend and the app's cached resources between its sessions, as a
+server process would. Turn latency is the wall time of the script run that
+sends a message and streams the reply; "app" latency leaves out the time
+the fake model took (the bedrock.call stage of the turn's trace), so it
+measures the app's own code whatever --first-token-s and --token-s are.
+
+    python benchmarks/load_test.py --sessions 40 --turns 3 --workers 4
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import statistics
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from streamlit_chat_input_fileupload.backends import FakeBackend
+
+CHAT_APP = str(Path(__file__).parent / "chat_app.py")
+
+# Backend shared by the sessions of a worker process
+_backend: FakeBackend | None = None
+
+
+def _init_worker(first_token_s: float, token_s: float, reply_tokens: int) -> None:
+    global _backend
+    _backend = FakeBackend(first_token_s=first_token_s, token_s=token_s, reply_tokens=reply_tokens)
+
+
+def run_session(turns: int) -> tuple[list[float], list[float]]:
+    """Run one session; returns the turn latencies and the app's share of them (s)."""
+    main = sys.modules["__main__"]
+    try:
+        return _run_session(turns)
+    finally:
+        # AppTest leaves the script as __main__, where the next task is looked up
+        sys.modules["__main__"] = main
+
+
+def _run_session(turns: int) -> tuple[list[float], list[float]]:
+    at = AppTest.from_file(CHAT_APP, default_timeout=60)
+    at.session_state["bench_client"] = _backend
+    at.session_state["bench_submission"] = None
+    at.run()
+
+    turn_latencies, app_latencies = [], []
+    for turn in range(turns):
+        at.session_state["bench_submission"] = {"text": f"Question {turn}", "files": []}
+        started = time.perf_counter()
+        at.run()
+        elapsed = time.perf_counter() - started
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+        model_ms = at.session_state.turn_timings[-1].get("bedrock.call", 0.0)
+        turn_latencies.append(elapsed)
+        app_latencies.append(max(0.0, elapsed - model_ms / 1000))
+    return turn_latencies, app_latencies
+
+
+def p95(values: list[float]) -> float:
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[94]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--turns", type=int, default=3, help="messages sent per session")
+    parser.add_argument("--workers", type=int, default=4, help="processes running sessions")
+    parser.add_argument("--first-token-s", type=float, default=0.0)
+    parser.add_argument("--token-s", type=float, default=0.0)
+    parser.add_argument("--reply-tokens", type=int, default=50)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        initializer=_init_worker,
+        initargs=(args.first_token_s, args.token_s, args.reply_tokens),
+    ) as pool:
+        results = list(pool.map(run_session, [args.turns] * args.sessions))
+    elapsed = time.perf_counter() - started
+
+    turns = [latency for session, _ in results for latency in session]
+    app = [latency for _, session in results for latency in session]
+    print(
+        f"{args.sessions} sessions x {args.turns} turns on {args.workers} workers "
+        f"in {elapsed:.1f} s: {args.sessions / elapsed:.2f} sessions/s"
+    )
+    print(
+        f"turn latency  p50 {statistics.median(turns) * 1000:7.1f} ms  p95 {p95(turns) * 1000:7.1f} ms"
+    )
+    print(
+        f"app latency   p50 {statistics.median(app) * 1000:7.1f} ms  p95 {p95(app) * 1000:7.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""End-to-end benchmark of a chat turn through the app under AppTest."""
+
+from pathlib import Path
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from streamlit_chat_input_fileupload.backends import FakeBackend
+from streamlit_chat_input_fileupload.config import HISTORY_VISIBLE_MESSAGES
+from streamlit_chat_input_fileupload.records import TextBlock
+
+# app.py with the chat input and the model backend stubbed out
+CHAT_APP = str(Path(__file__).parent / "chat_app.py")
+
+
+def session(history_turns: int) -> tuple[AppTest, FakeBackend]:
+    """A session that has run once and holds history_turns question/answer turns."""
+    client = FakeBackend("The answer is 42.", first_token_s=0, token_s=0)
+    at = AppTest.from_file(CHAT_APP, default_timeout=30)
+    at.session_state["bench_client"] = client
+    at.session_state["bench_submission"] = None
+    at.run()
+    for turn in range(history_turns):
+        at.session_state.conversation.append(
+            "user", [{"text": f"Question {turn} " + "lorem " * 20}]
+        )
+        at.session_state.conversation.append(
+            "assistant", [{"text": f"Answer {turn} " + "ipsum " * 80}]
+        )
+    return at, client
+
+
+def chat_turn(history_turns: int) -> tuple[AppTest, FakeBackend]:
+    """A session with history_turns turns, about to submit a message."""
+    at, client = session(history_turns)
+    at.session_state["bench_submission"] = {"text": "What is the answer?", "files": []}
+    return at, client
+
+
+class TestAppBenchmark:
+    """Benchmarks for a whole script run: submit, stream the reply, rerun."""
+
+    @pytest.mark.parametrize("history_turns", [0, 50])
+    def test_chat_turn(self, benchmark, history_turns):
+        """Benchmark one chat turn against the fake backend."""
+        benchmark.extra_info["history_turns"] = history_turns
+        sessions = []
+
+        def setup():
+            sessions.append(chat_turn(history_turns))
+            return (sessions[-1][0],), {}
+
+        benchmark.pedantic(AppTest.run, setup=setup, rounds=10, warmup_rounds=1)
+
+        at, client = sessions[-1]
+        assert not at.exception
+        assert client.metrics()["calls"] == 1
+        assert at.session_state.conversation.messages[-1].content == (
+            TextBlock("The answer is 42."),
+        )
+
+    @pytest.mark.parametrize("messages", [10, 100, 500])
+    def test_rerun(self, benchmark, messages):
+        """Benchmark a rerun without a new message as the history grows."""
+        at, _ = session(messages // 2)
+        benchmark.extra_info["messages"] = messages
+
+        benchmark.pedantic(at.run, rounds=10, warmup_rounds=1)
+
+        assert not at.exception
+        assert len(at.chat_message) <= HISTORY_VISIBLE_MESSAGES
@@ -0,0 +1,47 @@
+"""Benchmarks for building message content from submitted files."""
+
+import os
+
+import pytest
+
+from streamlit_chat_input_fileupload.content import build_content_block
+
+
+def files(count: int, size: int) -> list[dict]:
+    """Decoded PNG, PDF and source files, alternating."""
+    kinds = [
+        ("chart.png", "image/png", b"\x89PNG\r\n\x1a\n"),
+        ("report.pdf", "application/pdf", b"%PDF-1.7\n"),
+        ("main.py", "text/x-python", b""),
+    ]
+    result = []
+    for i in range(count):
+        name, mime_type, head = kinds[i % len(kinds)]
+        if head:
+            data = head + os.urandom(size - len(head))
+        else:
+            data = b"".join(f"value_{i}_{n} = {n}\n".encode() for n in range(size // 16))
+        result.append({"name": f"{i}-{name}", "type": mime_type, "size": len(data), "data": data})
+    return result
+
+
+class TestBuildContentBlockBenchmark:
+    """Benchmarks for build_content_block() throughput."""
+
+    def test_text_only(self, benchmark, store):
+        """Benchmark a message without attachments."""
+        content = benchmark(build_content_block, "Summarise the attached report.", [], store)
+
+        assert content == [{"text": "Summarise the attached report."}]
+
+    @pytest.mark.parametrize("count", [1, 3, 9])
+    def test_attachments(self, benchmark, store, count):
+        """Benchmark storing and wrapping 256 KB attachments."""
+        message_files = files(count, 256 * 1024)
+        benchmark.extra_info["files"] = count
+
+        content = benchmark(
+            build_content_block, "What changed?", message_files, store, cache_min_tokens=1024
+        )
+
+        assert content[-1] == {"text": "What changed?"}
@@ -0,0 +1,47 @@
+"""Benchmarks for converting the chat history to Bedrock messages."""
+
+import pytest
+
+from streamlit_chat_input_fileupload.attachments import AttachmentStore
+from streamlit_chat_input_fileupload.context import ContextPolicy
+from streamlit_chat_input_fileupload.conversation import Conversation
+
+POLICY = ContextPolicy(max_turns=50, max_bytes=20_000_000, attachment_max_age=5)
+
+
+def conversation(store: AttachmentStore, turns: int) -> Conversation:
+    """History of question/answer turns, every tenth with an image."""
+    conversation = Conversation(store.get)
+    ref = store.put(b"\x89PNG\r\n\x1a\n" + bytes(64 * 1024))
+    for turn in range(turns):
+        content = [{"text": f"Question {turn}: " + "lorem ipsum " * 20}]
+        if turn % 10 == 0:
+            content.insert(0, {"image": {"format": "png", "source": {"ref": ref}}})
+        conversation.append("user", content)
+        conversation.append("assistant", [{"text": f"Answer {turn}: " + "dolor sit " * 60}])
+    conversation.append("user", [{"text": "And now?"}])
+    return conversation
+
+
+class TestApiMessagesBenchmark:
+    """Benchmarks for api_messages() as the number of turns grows."""
+
+    @pytest.mark.parametrize("turns", [10, 100, 1000])
+    def test_full_history(self, benchmark, store, turns):
+        """Benchmark sending the whole history."""
+        history = conversation(store, turns)
+        benchmark.extra_info["turns"] = turns
+
+        messages = benchmark(history.api_messages)
+
+        assert len(messages) == 2 * turns + 1
+
+    @pytest.mark.parametrize("turns", [10, 100, 1000])
+    def test_windowed_history(self, benchmark, store, turns):
+        """Benchmark the app's request: context window plus cache prefix."""
+        history = conversation(store, turns)
+        benchmark.extra_info["turns"] = turns
+
+        messages = benchmark(history.api_messages, POLICY, cache_prefix=True)
+
+        assert messages[-1]["content"] == [{"text": "And now?"}]
@@ -0,0 +1,35 @@
+"""Benchmarks for decoding and checking submitted files."""
+
+import base64
+import os
+
+import pytest
+
+from streamlit_chat_input_fileupload.processing import decode_file
+
+SIZES = {"64KB": 64 * 1024, "1MB": 1024 * 1024, "10MB": 10 * 1024 * 1024}
+
+
+def pdf_payload(size: int) -> dict:
+    """A submitted PDF as the component delivers it, base64 encoded."""
+    data = b"%PDF-1.7\n" + os.urandom(size - 9)
+    return {
+        "name": "report.pdf",
+        "type": "application/pdf",
+        "size": size,
+        "encoded": base64.b64encode(data).decode(),
+    }
+
+
+class TestDecodeBenchmark:
+    """Benchmarks for base64 decoding across file sizes."""
+
+    @pytest.mark.parametrize("size", SIZES.values(), ids=SIZES.keys())
+    def test_decode_file(self, benchmark, size):
+        """Benchmark decoding, size checking and sniffing one file."""
+        payload = pdf_payload(size)
+        benchmark.extra_info["bytes"] = size
+
+        decoded = benchmark(decode_file, payload)
+
+        assert decoded["size"] == size
@@ -1,4 +1,36 @@
-from streamlit_chat_input_fileupload import config  # noqa: F401
-from streamlit_chat_input_fileupload.chat_input_with_upload import (  # noqa: F401
-    chat_input_with_upload,
-)
+"""Chat input with file upload for Streamlit.
+
+The public names are imported on first access, so importing the package (or
+one of its submodules, e.g. in a worker process) does not load Streamlit,
+the component or config.py.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from streamlit_chat_input_fileupload import config
+    from streamlit_chat_input_fileupload.component import chat_input_with_upload
+
+__all__ = ["chat_input_with_upload", "config"]
+
+# Public name -> (submodule, attribute of the submodule or None for the module)
+_LAZY = {
+    "chat_input_with_upload": ("component", "chat_input_with_upload"),
+    "config": ("config", None),
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    submodule, attribute = _LAZY[name]
+    value = importlib.import_module(f"{__name__}.{submodule}")
+    if attribute is not None:
+        value = getattr(value, attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,249 @@
+"""Content-addressed store for attachment bytes shared by all sessions."""
+
+from collections import OrderedDict
+from contextlib import suppress
+import hashlib
+import io
+import os
+from pathlib import Path
+import shutil
+import tempfile
+import threading
+import time
+from typing import BinaryIO
+
+# Default directory for blobs spilled to disk
+STORE_DIR = Path(tempfile.gettempdir()) / "streamlit_chat_attachments"
+
+# Hashing and copying block size for files
+_READ_SIZE = 1024 * 1024
+
+# With max_age, spilled blobs are checked for expiry at most this often (seconds)
+EVICT_INTERVAL_S = 60
+
+
+class AttachmentStore:
+    """Attachment bytes keyed by their SHA-256 digest.
+
+    Blobs smaller than spill_threshold are kept in memory in an LRU under a
+    total memory_budget in bytes; blobs pushed out of memory, and larger
+    blobs, live as files in store_dir. Storing the same content twice,
+    from any session, keeps a single copy. Session history only needs the
+    digest returned by put().
+
+    Files in store_dir not used for max_age seconds are deleted, and the
+    least recently used beyond disk_budget bytes, as blobs are written
+    (evict()). get() then raises KeyError for them, like for any unknown
+    digest.
+    """
+
+    def __init__(
+        self,
+        memory_budget: int = 64 * 1024 * 1024,
+        spill_threshold: int = 1024 * 1024,
+        store_dir: Path | None = None,
+        disk_budget: int | None = None,
+        max_age: float | None = None,
+    ):
+        self.memory_budget = memory_budget
+        self.spill_threshold = spill_threshold
+        self.store_dir = Path(store_dir or STORE_DIR)
+        self.disk_budget = disk_budget
+        self.max_age = max_age
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0
+        # Bytes in store_dir, counted by the first eviction
+        self._disk_bytes: int | None = None
+        self._evicted_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _path(self, digest: str) -> Path:
+        return self.store_dir / digest[:2] / digest
+
+    def _spill(self, digest: str, data: bytes) -> None:
+        path = self._path(digest)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write under a temporary name so readers never see a partial blob
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+        self._written(len(data))
+
+    def _written(self, size: int) -> None:
+        """Count a blob written to store_dir and evict when due (lock held)."""
+        if self._disk_bytes is not None:
+            self._disk_bytes += size
+        over_budget = self.disk_budget is not None and (
+            self._disk_bytes is None or self._disk_bytes > self.disk_budget
+        )
+        expiry_due = (
+            self.max_age is not None and time.monotonic() - self._evicted_at >= EVICT_INTERVAL_S
+        )
+        if over_budget or expiry_due:
+            self._evict()
+
+    def _evict(self) -> int:
+        # Oldest modification time first; reads refresh it (_touch())
+        blobs = []
+        for path in self.store_dir.glob("??/*"):
+            if len(path.name) != 64:
+                continue  # a blob still being written
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            blobs.append((stat.st_mtime, stat.st_size, path))
+        blobs.sort()
+        total = sum(size for _, size, _ in blobs)
+        cutoff = None if self.max_age is None else time.time() - self.max_age
+        removed = 0
+        for mtime, size, path in blobs:
+            expired = cutoff is not None and mtime < cutoff
+            if not expired and (self.disk_budget is None or total <= self.disk_budget):
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        self._disk_bytes = total
+        self._evicted_at = time.monotonic()
+        return removed
+
+    def evict(self) -> int:
+        """Delete expired blobs from store_dir, then the least recently used
+        beyond disk_budget. Returns the number of blobs deleted."""
+        with self._lock:
+            return self._evict()
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        """Mark a blob on disk as recently used."""
+        with suppress(FileNotFoundError):
+            os.utime(path)
+
+    def _remember(self, digest: str, data: bytes) -> None:
+        """Add a blob to the in-memory LRU, spilling the least recently used."""
+        self._memory[digest] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_budget and self._memory:
+            old_digest, old_data = self._memory.popitem(last=False)
+            self._memory_bytes -= len(old_data)
+            self._spill(old_digest, old_data)
+
+    def put(self, data: bytes) -> str:
+        """Store bytes and return their SHA-256 hex digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if digest in self._memory:
+                self._memory.move_to_end(digest)
+            elif len(data) >= self.spill_threshold or len(data) > self.memory_budget:
+                self._spill(digest, data)
+            elif not self._path(digest).exists():
+                self._remember(digest, bytes(data))
+        return digest
+
+    def put_file(self, path: str | os.PathLike, move: bool = False) -> str:
+        """Store the contents of a file without reading it into memory at once.
+
+        With move=True a large file is moved into the store instead of
+        copied; the source path must not be used afterwards.
+        """
+        path = Path(path)
+        hasher = hashlib.sha256()
+        with open(path, "rb") as fh:
+            while block := fh.read(_READ_SIZE):
+                hasher.update(block)
+        digest = hasher.hexdigest()
+
+        if path.stat().st_size < self.spill_threshold:
+            self.put(path.read_bytes())
+            if move:
+                path.unlink()
+            return digest
+
+        target = self._path(digest)
+        with self._lock:
+            if target.exists():
+                if move:
+                    path.unlink()
+                return digest
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if move:
+                shutil.move(path, target)
+            else:
+                fd, tmp = tempfile.mkstemp(dir=target.parent)
+                with os.fdopen(fd, "wb") as out, open(path, "rb") as src:
+                    shutil.copyfileobj(src, out, _READ_SIZE)
+                os.replace(tmp, target)
+            self._written(target.stat().st_size)
+        return digest
+
+    def put_stream(self, stream: BinaryIO) -> str:
+        """Store the rest of a binary stream without reading it into memory at once."""
+        head = stream.read(self.spill_threshold)
+        block = stream.read(_READ_SIZE)
+        if not block:
+            return self.put(head)
+
+        hasher = hashlib.sha256(head)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.store_dir)
+        with os.fdopen(fd, "wb") as out:
+            out.write(head)
+            while block:
+                hasher.update(block)
+                out.write(block)
+                block = stream.read(_READ_SIZE)
+        digest = hasher.hexdigest()
+
+        target = self._path(digest)
+        with self._lock:
+            if target.exists():
+                os.unlink(tmp)
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp, target)
+                self._written(target.stat().st_size)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """Return the bytes for a digest. Raises KeyError if unknown."""
+        with self._lock:
+            data = self._memory.get(digest)
+            if data is not None:
+                self._memory.move_to_end(digest)
+                return data
+        path = self._path(digest)
+        self._touch(path)
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+
+    def open(self, digest: str) -> BinaryIO:
+        """Binary file object for a blob, read from disk when it is spilled."""
+        with self._lock:
+            data = self._memory.get(digest)
+        if data is not None:
+            return io.BytesIO(data)
+        path = self._path(digest)
+        self._touch(path)
+        try:
+            return open(path, "rb")
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+
+    def path(self, digest: str) -> Path | None:
+        """Path of a blob kept on disk, or None if it is only in memory."""
+        path = self._path(digest)
+        return path if path.exists() else None
+
+    def __contains__(self, digest: str) -> bool:
+        return digest in self._memory or self._path(digest).exists()
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes currently held in memory."""
+        return self._memory_bytes
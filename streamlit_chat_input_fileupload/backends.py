@@ -0,0 +1,192 @@
+"""Model backends: Bedrock, and a local stand-in for load tests.
+
+A backend takes bedrock-runtime converse() / converse_stream() requests and
+answers in the same shape, and reports metrics() for the sidebar. The app
+talks to get_backend(), which is Bedrock through the shared client manager,
+or with LLM_BACKEND=fake a FakeBackend replying with synthetic text after a
+configurable latency, so the app can be load tested without model calls.
+"""
+
+from collections import deque
+from collections.abc import Callable, Iterator
+import threading
+import time
+from typing import Any, Protocol
+
+from streamlit_chat_input_fileupload import config
+from streamlit_chat_input_fileupload.clients import (
+    LATENCY_WINDOW,
+    get_client_manager,
+    latency_percentiles,
+)
+from streamlit_chat_input_fileupload.context import estimate_block
+
+BACKENDS = ("bedrock", "fake")
+
+# Text the synthetic replies of FakeBackend are made of, one token per word
+_FILLER = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua"
+)
+
+
+class LLMBackend(Protocol):
+    """What the app needs from a model backend."""
+
+    def converse(self, **request: Any) -> dict[str, Any]: ...
+
+    def converse_stream(self, **request: Any) -> dict[str, Any]: ...
+
+    def metrics(self) -> dict[str, Any]: ...
+
+
+def _last_user_text(request: dict[str, Any]) -> str:
+    for message in reversed(request.get("messages", [])):
+        if message.get("role") == "user":
+            texts = [block["text"] for block in message["content"] if "text" in block]
+            if texts:
+                return texts[-1]
+    return ""
+
+
+class _FakeStream:
+    """converse_stream event stream of a FakeBackend reply.
+
+    close() ends it early, also while it waits for the next token.
+    """
+
+    def __init__(self, backend: "FakeBackend", tokens: list[str], usage: dict[str, int]):
+        self.backend = backend
+        self.tokens = tokens
+        self.usage = usage
+        self.started = time.perf_counter()
+        self._closed = threading.Event()
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        try:
+            yield {"messageStart": {"role": "assistant"}}
+            yield {"contentBlockStart": {"contentBlockIndex": 0, "start": {}}}
+            for i, token in enumerate(self.tokens):
+                delay = self.backend.first_token_s if i == 0 else self.backend.token_s
+                if self._closed.wait(delay):
+                    return
+                yield {"contentBlockDelta": {"contentBlockIndex": 0, "delta": {"text": token}}}
+            yield {"contentBlockStop": {"contentBlockIndex": 0}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+            latency_ms = round((time.perf_counter() - self.started) * 1000)
+            yield {"metadata": {"usage": self.usage, "metrics": {"latencyMs": latency_ms}}}
+        finally:
+            self.backend._record(time.perf_counter() - self.started)
+
+    def close(self) -> None:
+        self._closed.set()
+
+
+class FakeBackend:
+    """Local stand-in for Bedrock, replying without a network or a model.
+
+    The reply is reply (a string, or a callable taking the request), by
+    default a synthetic one of reply_tokens words after a line quoting the
+    last user text. Streamed replies send their first token after
+    first_token_s seconds and each further one token_s seconds later;
+    converse() takes as long for the whole reply. Input tokens are
+    estimated from the request, as the context policy does.
+    """
+
+    def __init__(
+        self,
+        reply: str | Callable[[dict[str, Any]], str] | None = None,
+        first_token_s: float = 0.5,
+        token_s: float = 0.02,
+        reply_tokens: int = 50,
+    ):
+        self.reply = reply
+        self.first_token_s = first_token_s
+        self.token_s = token_s
+        self.reply_tokens = reply_tokens
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._calls = 0
+
+    def _tokens(self, request: dict[str, Any]) -> list[str]:
+        if callable(self.reply):
+            text = self.reply(request)
+        elif self.reply is not None:
+            text = self.reply
+        else:
+            quoted = _last_user_text(request)[:80]
+            filler = _FILLER.split()
+            words = [filler[i % len(filler)] for i in range(self.reply_tokens)]
+            text = f'Reply to "{quoted}":\n\n' + " ".join(words)
+        # One token per word, keeping the spaces
+        words = text.split(" ")
+        return [word + " " for word in words[:-1]] + words[-1:]
+
+    def _usage(self, request: dict[str, Any], tokens: list[str]) -> dict[str, int]:
+        input_tokens = sum(
+            estimate_block(block)[1]
+            for message in request.get("messages", [])
+            for block in message["content"]
+        )
+        return {
+            "inputTokens": input_tokens,
+            "outputTokens": len(tokens),
+            "totalTokens": input_tokens + len(tokens),
+        }
+
+    def _record(self, latency: float) -> None:
+        with self._lock:
+            self._calls += 1
+            self._latencies.append(latency)
+
+    def converse(self, **request: Any) -> dict[str, Any]:
+        started = time.perf_counter()
+        tokens = self._tokens(request)
+        time.sleep(self.first_token_s + self.token_s * max(0, len(tokens) - 1))
+        self._record(time.perf_counter() - started)
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": "".join(tokens)}]}},
+            "stopReason": "end_turn",
+            "usage": self._usage(request, tokens),
+        }
+
+    def converse_stream(self, **request: Any) -> dict[str, Any]:
+        tokens = self._tokens(request)
+        return {"stream": _FakeStream(self, tokens, self._usage(request, tokens))}
+
+    def metrics(self) -> dict[str, Any]:
+        """Call count and latency percentiles (seconds), as BedrockClientManager."""
+        with self._lock:
+            latencies = list(self._latencies)
+            calls = self._calls
+        p50, p95 = latency_percentiles(latencies)
+        return {
+            "calls": calls,
+            "throttles": 0,
+            "queue_depth": 0,
+            "rate": None,
+            "latency_p50": p50,
+            "latency_p95": p95,
+        }
+
+
+_fake: FakeBackend | None = None
+_fake_lock = threading.Lock()
+
+
+def get_backend(name: str | None = None) -> LLMBackend:
+    """Backend shared by all sessions, config.LLM_BACKEND unless name is given."""
+    global _fake
+    name = name or config.LLM_BACKEND
+    if name == "bedrock":
+        return get_client_manager()
+    if name == "fake":
+        with _fake_lock:
+            if _fake is None:
+                _fake = FakeBackend(
+                    first_token_s=config.FAKE_FIRST_TOKEN_S,
+                    token_s=config.FAKE_TOKEN_S,
+                    reply_tokens=config.FAKE_REPLY_TOKENS,
+                )
+            return _fake
+    raise ValueError(f"LLM backend must be one of {BACKENDS}, got {name!r}")
@@ -0,0 +1,109 @@
+"""Streaming helpers for the Bedrock Converse API."""
+
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+import time
+from typing import Any
+
+# Exception events that can arrive inside a converse_stream event stream
+STREAM_ERROR_EVENTS = (
+    "internalServerException",
+    "modelStreamErrorException",
+    "validationException",
+    "throttlingException",
+    "serviceUnavailableException",
+)
+
+# Notes appended to the reply for stop reasons other than a normal end of turn
+STOP_REASON_NOTES = {
+    "max_tokens": "_Response truncated: the maximum number of tokens was reached._",
+    "content_filtered": "_Response stopped: the content was filtered._",
+    "guardrail_intervened": "_Response stopped by a guardrail._",
+}
+
+
+class StreamError(Exception):
+    """Exception event received in the middle of a response stream."""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(f"{kind}: {message}")
+        self.kind = kind
+
+
+@dataclass
+class StreamStats:
+    """Timing and usage of a single streamed turn."""
+
+    started: float = field(default_factory=time.perf_counter)
+    first_token_at: float | None = None
+    finished: float | None = None
+    stop_reason: str | None = None
+    usage: dict[str, int] = field(default_factory=dict)
+    chunks: list[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        """Text received so far, also when the stream failed half way."""
+        return "".join(self.chunks)
+
+    @property
+    def time_to_first_token(self) -> float | None:
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started
+
+    @property
+    def output_tokens(self) -> int:
+        # Usage arrives in the final metadata event; count deltas until then
+        return self.usage.get("outputTokens", len(self.chunks))
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        if self.first_token_at is None or self.finished is None:
+            return None
+        elapsed = self.finished - self.first_token_at
+        return self.output_tokens / elapsed if elapsed > 0 else None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "stop_reason": self.stop_reason,
+            "time_to_first_token": self.time_to_first_token,
+            "tokens_per_second": self.tokens_per_second,
+            "input_tokens": self.usage.get("inputTokens"),
+            "output_tokens": self.output_tokens,
+            "cache_read_tokens": self.usage.get("cacheReadInputTokens", 0),
+            "cache_write_tokens": self.usage.get("cacheWriteInputTokens", 0),
+        }
+
+
+def iter_stream_text(events: Iterator[dict[str, Any]], stats: StreamStats) -> Iterator[str]:
+    """Yield text deltas from a converse_stream event stream.
+
+    The stop reason, usage and timings are recorded on stats as the events
+    arrive. Exception events raise StreamError; the text received before the
+    error stays available as stats.text.
+    """
+    try:
+        for event in events:
+            if "contentBlockDelta" in event:
+                text = event["contentBlockDelta"].get("delta", {}).get("text")
+                if text:
+                    if stats.first_token_at is None:
+                        stats.first_token_at = time.perf_counter()
+                    stats.chunks.append(text)
+                    yield text
+            elif "messageStop" in event:
+                stats.stop_reason = event["messageStop"].get("stopReason")
+            elif "metadata" in event:
+                stats.usage = event["metadata"].get("usage", {})
+            else:
+                for kind in STREAM_ERROR_EVENTS:
+                    if kind in event:
+                        raise StreamError(kind, event[kind].get("message", ""))
+    finally:
+        stats.finished = time.perf_counter()
+
+
+def stop_reason_note(stop_reason: str | None) -> str | None:
+    """User-facing note for a stop reason, or None for a normal end of turn."""
+    return STOP_REASON_NOTES.get(stop_reason)
@@ -0,0 +1,173 @@
+"""Model calls run on a shared thread pool so they can be stopped."""
+
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import suppress
+import threading
+import time
+from typing import Any
+
+from streamlit_chat_input_fileupload.bedrock import StreamStats, iter_stream_text
+from streamlit_chat_input_fileupload.clients import cancel_event
+
+
+class ModelCall:
+    """A converse / converse_stream request running in the background.
+
+    The reply text accumulates in stats while the Streamlit script only
+    polls it, so a rerun (stop button, new message) never waits for the
+    model. cancel() stops the request; the text received so far is kept.
+    """
+
+    def __init__(self, client: Any, request: dict[str, Any], stream: bool, timeout: float):
+        self.client = client
+        self.request = request
+        self.stream = stream
+        self.deadline = time.monotonic() + timeout
+        self.stats = StreamStats()
+        self.error: Exception | None = None
+        self.future: Future | None = None
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._changed = threading.Condition()
+        self._events: Any = None
+
+    @property
+    def text(self) -> str:
+        return self.stats.text
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def _notify(self) -> None:
+        with self._changed:
+            self._changed.notify_all()
+
+    def run(self) -> None:
+        """Worker body: call the model and record the reply on stats."""
+        # Lets a request waiting for the rate limiter give up on cancel()
+        token = cancel_event.set(self._cancelled)
+        try:
+            if self.cancelled:
+                return
+            self.stats.started = time.perf_counter()
+            if self.stream:
+                response = self.client.converse_stream(**self.request)
+                self._events = response["stream"]
+                for _ in iter_stream_text(self._events, self.stats):
+                    self._notify()
+                    if self.cancelled:
+                        break
+            else:
+                response = self.client.converse(**self.request)
+                self.stats.finished = time.perf_counter()
+                self.stats.stop_reason = response.get("stopReason")
+                self.stats.usage = response.get("usage", {})
+                self.stats.chunks.append(response["output"]["message"]["content"][0]["text"])
+        except Exception as e:
+            # Closing the stream on cancel() surfaces as a read error here
+            if not self.cancelled:
+                self.error = e
+        finally:
+            cancel_event.reset(token)
+            self._close_events()
+            self._done.set()
+            self._notify()
+
+    def _close_events(self) -> None:
+        close = getattr(self._events, "close", None)
+        if close is not None:
+            with suppress(Exception):
+                close()
+
+    def cancel(self, error: Exception | None = None) -> None:
+        """Stop the request. A call still queued, in the pool or for a rate
+        limiter token, never reaches the model."""
+        if self.done:
+            return
+        if error is not None:
+            self.error = error
+        self._cancelled.set()
+        if self.future is not None and self.future.cancel():
+            self._done.set()
+        # Unblocks a worker waiting for the next event
+        self._close_events()
+        self._notify()
+
+    def iter_text(self, poll: float = 0.25) -> Iterator[str]:
+        """Yield the full reply text so far until the call finishes.
+
+        A snapshot is yielded at least every poll seconds, also while no
+        new text arrives, so the caller gets regular chances to be
+        interrupted. The call is cancelled with a TimeoutError once its
+        deadline passes.
+        """
+        while not self.done:
+            if time.monotonic() > self.deadline:
+                self.cancel(TimeoutError("The model did not reply in time."))
+                break
+            with self._changed:
+                if not self.done:
+                    self._changed.wait(poll)
+            yield self.text
+        yield self.text
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+
+class CallPool:
+    """Bounded thread pool for model calls shared by all sessions.
+
+    Each owner (a browser session) has at most one call in flight:
+    submitting a new call cancels the owner's previous one.
+    """
+
+    def __init__(self, max_workers: int, timeout: float):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="model-call"
+        )
+        self._active: dict[str, ModelCall] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self, owner: str, client: Any, request: dict[str, Any], stream: bool = True
+    ) -> ModelCall:
+        call = ModelCall(client, request, stream=stream, timeout=self.timeout)
+        with self._lock:
+            previous = self._active.get(owner)
+            if previous is not None:
+                previous.cancel()
+            self._active[owner] = call
+        call.future = self._executor.submit(call.run)
+        # Also runs for calls cancelled while still queued
+        call.future.add_done_callback(lambda _: self._release(owner, call))
+        return call
+
+    def _release(self, owner: str, call: ModelCall) -> None:
+        with self._lock:
+            if self._active.get(owner) is call:
+                del self._active[owner]
+
+    def active(self, owner: str) -> ModelCall | None:
+        """The owner's call in flight, if any."""
+        with self._lock:
+            return self._active.get(owner)
+
+    def cancel(self, owner: str) -> None:
+        call = self.active(owner)
+        if call is not None:
+            call.cancel()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            calls = list(self._active.values())
+        for call in calls:
+            call.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,298 @@
+"""Bedrock client shared by all sessions, with request rate limiting."""
+
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import CancelledError
+from contextvars import ContextVar
+import statistics
+import threading
+import time
+from typing import Any
+
+from streamlit_chat_input_fileupload import config
+
+# Error codes treated as throttling, from the API and inside event streams
+THROTTLING_CODES = ("ThrottlingException", "TooManyRequestsException")
+THROTTLING_EVENT = "throttlingException"
+
+# Latencies kept for the percentiles
+LATENCY_WINDOW = 1000
+
+# How often a caller waiting for a token checks whether it was cancelled
+CANCEL_POLL_S = 0.1
+
+# Cancel event of the model call running in this context (calls.ModelCall.run);
+# its requests leave the rate limiter queue without a token once it is set
+cancel_event: ContextVar[threading.Event | None] = ContextVar("cancel_event", default=None)
+
+
+def create_bedrock_client(
+    profile: str | None,
+    region: str,
+    max_pool_connections: int = 10,
+    max_attempts: int = 3,
+    read_timeout: float = 60,
+) -> Any:
+    """bedrock-runtime client with adaptive retries and a sized connection pool."""
+    # boto3 takes a quarter of a second to import; only load it for the client
+    import boto3
+    from botocore.config import Config
+
+    session = boto3.Session(profile_name=profile)
+    return session.client(
+        "bedrock-runtime",
+        region_name=region,
+        config=Config(
+            max_pool_connections=max_pool_connections,
+            read_timeout=read_timeout,
+            retries={"mode": "adaptive", "max_attempts": max_attempts},
+        ),
+    )
+
+
+def latency_percentiles(latencies: list[float]) -> tuple[float | None, float | None]:
+    """p50 and p95 of the latencies, None without any."""
+    if len(latencies) >= 2:
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        return percentiles[49], percentiles[94]
+    if latencies:
+        return latencies[0], latencies[0]
+    return None, None
+
+
+def is_throttling(error: Exception) -> bool:
+    # Loaded with the client by the time a request can fail
+    from botocore.exceptions import ClientError
+
+    return (
+        isinstance(error, ClientError)
+        and error.response.get("Error", {}).get("Code") in THROTTLING_CODES
+    )
+
+
+class TokenBucket:
+    """Token bucket rate limiter whose callers wait in FIFO order.
+
+    rate tokens per second are added up to burst. The rate adapts to the
+    service: throttled() halves it, succeeded() raises it again step by step
+    up to max_rate.
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: float = 0.1):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._waiters: deque[object] = deque()
+        self._changed = threading.Condition()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @property
+    def waiting(self) -> int:
+        """Number of callers queued for a token."""
+        return len(self._waiters)
+
+    def acquire(self, timeout: float | None = None, cancel: threading.Event | None = None) -> bool:
+        """Take a token, waiting in line. Returns False on timeout or once cancel is set."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        ticket = object()
+        with self._changed:
+            self._waiters.append(ticket)
+            try:
+                while True:
+                    if cancel is not None and cancel.is_set():
+                        return False
+                    wait = None if cancel is None else CANCEL_POLL_S
+                    if self._waiters[0] is ticket:
+                        self._refill()
+                        if self._tokens >= 1:
+                            self._tokens -= 1
+                            return True
+                        refill = (1 - self._tokens) / self.rate
+                        wait = refill if wait is None else min(wait, refill)
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._changed.wait(wait)
+            finally:
+                self._waiters.remove(ticket)
+                self._changed.notify_all()
+
+    def throttled(self) -> None:
+        with self._changed:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0)
+
+    def succeeded(self) -> None:
+        with self._changed:
+            if self.rate < self.max_rate:
+                self._refill()
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+class _TimedStream:
+    """converse_stream event stream that reports its latency and throttling."""
+
+    def __init__(self, events: Any, started: float, manager: "BedrockClientManager"):
+        self.events = events
+        self.started = started
+        self.manager = manager
+        self._finished = False
+
+    def _finish(self) -> None:
+        if not self._finished:
+            self._finished = True
+            self.manager._record(time.perf_counter() - self.started)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        try:
+            for event in self.events:
+                if THROTTLING_EVENT in event:
+                    self.manager._throttled()
+                yield event
+        finally:
+            self._finish()
+
+    def close(self) -> None:
+        close = getattr(self.events, "close", None)
+        if close is not None:
+            close()
+        self._finish()
+
+
+class BedrockClientManager:
+    """One bedrock-runtime client for all sessions behind a shared rate limiter.
+
+    converse() and converse_stream() take the same arguments as the client
+    methods. Each request first takes a token from the bucket; a request
+    throttled by the service (after botocore's own retries) lowers the rate
+    and waits in the queue again until queue_timeout has passed. A request
+    of a model call cancelled meanwhile (cancel_event) is never sent and
+    raises CancelledError.
+
+    Parameters
+    ----------
+    client_factory : callable
+        Creates the client on first use, e.g. create_bedrock_client.
+    rate : float
+        Requests per second allowed to start.
+    burst : int
+        Requests that may start at once after an idle period.
+    queue_timeout : float
+        Longest a request waits for its turn before TimeoutError.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Any],
+        rate: float = 5.0,
+        burst: int = 10,
+        queue_timeout: float = 120,
+    ):
+        self.client_factory = client_factory
+        self.bucket = TokenBucket(rate, burst)
+        self.queue_timeout = queue_timeout
+        self._client: Any = None
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._calls = 0
+        self._throttles = 0
+
+    @property
+    def client(self) -> Any:
+        with self._lock:
+            if self._client is None:
+                self._client = self.client_factory()
+            return self._client
+
+    def _record(self, latency: float) -> None:
+        with self._lock:
+            self._calls += 1
+            self._latencies.append(latency)
+
+    def _throttled(self) -> None:
+        with self._lock:
+            self._throttles += 1
+        self.bucket.throttled()
+
+    def _call(self, operation: str, request: dict[str, Any]) -> tuple[Any, float]:
+        deadline = time.monotonic() + self.queue_timeout
+        cancel = cancel_event.get()
+        while True:
+            acquired = self.bucket.acquire(
+                timeout=max(0.0, deadline - time.monotonic()), cancel=cancel
+            )
+            if cancel is not None and cancel.is_set():
+                raise CancelledError("Bedrock request cancelled before it was sent.")
+            if not acquired:
+                raise TimeoutError("Timed out waiting for a Bedrock request slot.")
+            started = time.perf_counter()
+            try:
+                response = getattr(self.client, operation)(**request)
+            except Exception as e:
+                if not is_throttling(e):
+                    raise
+                self._throttled()
+                if time.monotonic() >= deadline:
+                    raise
+                continue
+            self.bucket.succeeded()
+            return response, started
+
+    def converse(self, **request: Any) -> dict[str, Any]:
+        response, started = self._call("converse", request)
+        self._record(time.perf_counter() - started)
+        return response
+
+    def converse_stream(self, **request: Any) -> dict[str, Any]:
+        response, started = self._call("converse_stream", request)
+        # Latency covers the whole reply, recorded when the stream ends
+        return {**response, "stream": _TimedStream(response["stream"], started, self)}
+
+    def metrics(self) -> dict[str, Any]:
+        """Throttle count, queue depth and call latency percentiles (seconds)."""
+        with self._lock:
+            latencies = list(self._latencies)
+            metrics = {
+                "calls": self._calls,
+                "throttles": self._throttles,
+                "queue_depth": self.bucket.waiting,
+                "rate": self.bucket.rate,
+                "latency_p50": None,
+                "latency_p95": None,
+            }
+        metrics["latency_p50"], metrics["latency_p95"] = latency_percentiles(latencies)
+        return metrics
+
+
+_manager: BedrockClientManager | None = None
+_manager_lock = threading.Lock()
+
+
+def get_client_manager() -> BedrockClientManager:
+    """Package-level manager configured from config.py, created on first use."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = BedrockClientManager(
+                lambda: create_bedrock_client(
+                    config.AWS_PROFILE,
+                    config.AWS_REGION,
+                    max_pool_connections=config.BEDROCK_MAX_POOL_CONNECTIONS,
+                    max_attempts=config.BEDROCK_MAX_ATTEMPTS,
+                    read_timeout=config.LLM_TIMEOUT_S,
+                ),
+                rate=config.BEDROCK_RATE_LIMIT,
+                burst=config.BEDROCK_BURST,
+                queue_timeout=config.LLM_TIMEOUT_S,
+            )
+        return _manager
@@ -0,0 +1,1175 @@
+"""Chat input component with file upload capability."""
+
+import base64
+from functools import cache, partial
+import time
+from typing import Any
+
+import streamlit as st
+import streamlit.components.v2 as components
+
+from streamlit_chat_input_fileupload import formats, timing, uploads
+
+# HTML template for the component
+_COMPONENT_HTML = """
+<div class="chat-input-container">
+    <input type="file" id="fileInput" class="file-input" multiple>
+    <button type="button" class="btn btn-file" id="fileBtn" title="Attach file">
+        <svg class="icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
+            <path d="M21.44 11.05l-9.19 9.19a6 6 0 01-8.49-8.49l9.19-9.19a4 4 0 015.66 5.66l-9.2 9.19a2 2 0 01-2.83-2.83l8.49-8.48"/>
+        </svg>
+    </button>
+    <div id="fileIndicator" class="file-indicator">
+        <span class="file-name" id="fileName"></span>
+        <span class="file-remove" id="fileRemove">x</span>
+    </div>
+    <input type="text" class="text-input" id="textInput" placeholder="Send a message...">
+    <button type="button" class="btn btn-send" id="sendBtn" title="Send">
+        <svg class="icon" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
+            <line x1="22" y1="2" x2="11" y2="13"/>
+            <polygon points="22 2 15 22 11 13 2 9 22 2"/>
+        </svg>
+    </button>
+</div>
+
+<style>
+* {
+    box-sizing: border-box;
+    margin: 0;
+    padding: 0;
+}
+
+/* Light theme (default) */
+:root {
+    --chat-bg: #f0f2f6;
+    --chat-border: #e0e0e0;
+    --input-bg: #ffffff;
+    --input-text: #262730;
+    --input-placeholder: rgba(38, 39, 48, 0.5);
+    --btn-file-bg: #e0e0e0;
+    --btn-file-text: #262730;
+    --accent: #ff4b4b;
+    --accent-text: #ffffff;
+}
+
+/* Dark theme */
+.chat-input-container[data-theme="dark"] {
+    --chat-bg: #262730;
+    --chat-border: #4a4a5a;
+    --input-bg: #1a1a24;
+    --input-text: #fafafa;
+    --input-placeholder: rgba(250, 250, 250, 0.5);
+    --btn-file-bg: #4a4a5a;
+    --btn-file-text: #fafafa;
+    --accent: #ff4b4b;
+    --accent-text: #ffffff;
+}
+
+body {
+    font-family: "Source Sans Pro", sans-serif;
+    background-color: transparent;
+}
+
+.chat-input-container {
+    display: flex;
+    align-items: center;
+    gap: 8px;
+    padding: 8px;
+    background-color: var(--chat-bg);
+    border-radius: 8px;
+    border: 1px solid var(--chat-border);
+}
+
+.text-input {
+    flex: 1;
+    padding: 10px 12px;
+    font-size: 14px;
+    border: 1px solid var(--chat-border);
+    border-radius: 6px;
+    background-color: var(--input-bg);
+    color: var(--input-text);
+    outline: none;
+    min-width: 0;
+}
+
+.text-input:focus {
+    border-color: var(--accent);
+}
+
+.text-input::placeholder {
+    color: var(--input-placeholder);
+}
+
+.file-input {
+    display: none;
+}
+
+.btn {
+    padding: 10px 12px;
+    font-size: 14px;
+    border: none;
+    border-radius: 6px;
+    cursor: pointer;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    transition: opacity 0.2s;
+}
+
+.btn:hover {
+    opacity: 0.8;
+}
+
+.btn:disabled {
+    opacity: 0.5;
+    cursor: not-allowed;
+}
+
+.btn-file {
+    background-color: var(--btn-file-bg);
+    color: var(--btn-file-text);
+    min-width: 40px;
+}
+
+.btn-send {
+    background-color: var(--accent);
+    color: var(--accent-text);
+    min-width: 40px;
+}
+
+.file-indicator {
+    display: none;
+    align-items: center;
+    gap: 4px;
+    padding: 4px 8px;
+    background-color: var(--accent);
+    color: var(--accent-text);
+    border-radius: 4px;
+    font-size: 12px;
+    max-width: 150px;
+}
+
+.file-indicator.visible {
+    display: flex;
+}
+
+/* Attachment states: pending -> reading -> ready, or failed */
+.file-indicator[data-status="pending"],
+.file-indicator[data-status="reading"] {
+    background: linear-gradient(
+        to right,
+        var(--accent) var(--progress, 0%),
+        var(--btn-file-bg) var(--progress, 0%)
+    );
+    color: var(--btn-file-text);
+}
+
+.file-indicator[data-status="failed"] {
+    background-color: var(--btn-file-bg);
+    color: var(--accent);
+    text-decoration: line-through;
+}
+
+.btn-send[data-waiting="true"] {
+    opacity: 0.5;
+    cursor: progress;
+}
+
+.file-name {
+    overflow: hidden;
+    text-overflow: ellipsis;
+    white-space: nowrap;
+}
+
+.file-remove {
+    cursor: pointer;
+    font-weight: bold;
+    margin-left: 4px;
+}
+
+.file-remove:hover {
+    opacity: 0.7;
+}
+
+.icon {
+    width: 18px;
+    height: 18px;
+}
+</style>
+"""
+
+_COMPONENT_JS = """
+// Per-instance state survives re-invocation when Python sends new data,
+// and for an input with a key also a rerun that rebuilds its elements:
+// attachments already read or uploaded are kept, not picked and read again
+const instances = new WeakMap();
+const keyedInstances = new Map();
+
+// Bytes read from the start of a file to recognise its format
+const SNIFF_BYTES = 16;
+
+// High resolution Unix time in milliseconds, for the timings sent with a message
+function epochMs() {
+    return performance.timeOrigin + performance.now();
+}
+
+function browserToken() {
+    let token = null;
+    try {
+        token = window.localStorage.getItem('chatInputUploadToken');
+        if (!token) {
+            token = crypto.randomUUID();
+            window.localStorage.setItem('chatInputUploadToken', token);
+        }
+    } catch (e) {
+        token = token || crypto.randomUUID();
+    }
+    return token;
+}
+
+function readChunk(blob) {
+    return new Promise((resolve, reject) => {
+        const reader = new FileReader();
+        reader.onload = (evt) => resolve(evt.target.result.split(',')[1] || '');
+        reader.onerror = () => reject(reader.error);
+        reader.readAsDataURL(blob);
+    });
+}
+
+// Supported format claimed by a file's extension, else by its MIME type
+function claimedFormat(formats, file) {
+    const dot = file.name.lastIndexOf('.');
+    const ext = dot >= 0 ? file.name.slice(dot + 1).toLowerCase() : '';
+    return formats.find((fmt) => fmt.extensions.includes(ext))
+        || formats.find((fmt) => file.type && fmt.mimeTypes.includes(file.type))
+        || null;
+}
+
+function matchesSignature(head, signature) {
+    return signature.every(([offset, magic]) =>
+        magic.every((byte, i) => head[offset + i] === byte)
+    );
+}
+
+// Check a file against the format table sent by Python (formats.py) before
+// anything is read or uploaded. Returns the reason to reject it, or null.
+async function checkFormat(formats, file) {
+    const claimed = claimedFormat(formats, file);
+    if (!claimed) {
+        return 'unsupported format';
+    }
+    const head = new Uint8Array(await file.slice(0, SNIFF_BYTES).arrayBuffer());
+    const sniffed = formats.find((fmt) => fmt.magic.some((sig) => matchesSignature(head, sig)));
+    if (sniffed) {
+        if (JSON.stringify(sniffed.magic) !== JSON.stringify(claimed.magic)) {
+            return `content is a ${sniffed.label}, not a ${claimed.label}`;
+        }
+    } else if (claimed.magic.length) {
+        return `not a valid ${claimed.label}`;
+    } else if (head.includes(0)) {
+        return `binary content in a ${claimed.label}`;
+    }
+    return null;
+}
+
+// Downscale and re-encode an image on an OffscreenCanvas. Returns the
+// original file when it is not a still image, the browser lacks
+// OffscreenCanvas, or re-encoding would not make it smaller.
+async function downscaleImage(file, maxDimension, quality) {
+    if (!/^image\\/(png|jpeg|webp)$/.test(file.type) || typeof OffscreenCanvas === 'undefined') {
+        return file;
+    }
+    const bitmap = await createImageBitmap(file);
+    const longest = Math.max(bitmap.width, bitmap.height);
+    const scale = maxDimension && longest > maxDimension ? maxDimension / longest : 1;
+    const width = Math.max(1, Math.round(bitmap.width * scale));
+    const height = Math.max(1, Math.round(bitmap.height * scale));
+    const canvas = new OffscreenCanvas(width, height);
+    const ctx = canvas.getContext('2d');
+    ctx.drawImage(bitmap, 0, 0, width, height);
+    bitmap.close();
+
+    let blob = await canvas.convertToBlob({ type: 'image/webp', quality: quality });
+    if (blob.type !== 'image/webp') {
+        // No WebP encoder (e.g. Safari) - fall back to JPEG on white
+        ctx.globalCompositeOperation = 'destination-over';
+        ctx.fillStyle = '#ffffff';
+        ctx.fillRect(0, 0, width, height);
+        blob = await canvas.convertToBlob({ type: 'image/jpeg', quality: quality });
+    }
+    if (scale === 1 && blob.size >= file.size) {
+        return file;
+    }
+    const ext = blob.type === 'image/webp' ? 'webp' : 'jpg';
+    const name = `${file.name.replace(/\\.[^.]+$/, '')}.${ext}`;
+    return new File([blob], name, { type: blob.type, lastModified: file.lastModified });
+}
+
+// Theme of the app around the inputs. Python sends st.context.theme with
+// every run, but it can lag a theme switch, so one MutationObserver shared
+// by all instances watches the class of the app container (Streamlit
+// restyles it on a switch). Only once the class has settled on a new value
+// is the container's background read; mounting reads no styles.
+const THEME_SETTLE_MS = 150;
+const themeWatch = {
+    theme: null,
+    app: null,
+    className: null,
+    timer: null,
+    observer: null,
+    containers: new Set()
+};
+
+function systemTheme() {
+    return window.matchMedia('(prefers-color-scheme: dark)').matches ? 'dark' : 'light';
+}
+
+function applyTheme(container, theme) {
+    if (theme === 'dark') {
+        container.setAttribute('data-theme', 'dark');
+    } else {
+        container.removeAttribute('data-theme');
+    }
+}
+
+// Dark themes have a background of low luminance
+function readAppTheme(app) {
+    const rgb = getComputedStyle(app).backgroundColor.match(/\\d+/g);
+    if (!rgb) {
+        return null;
+    }
+    const luminance = (0.299 * rgb[0] + 0.587 * rgb[1] + 0.114 * rgb[2]) / 255;
+    return luminance < 0.5 ? 'dark' : 'light';
+}
+
+function themeChanged() {
+    const theme = readAppTheme(themeWatch.app);
+    if (!theme) {
+        return;
+    }
+    themeWatch.theme = theme;
+    for (const container of themeWatch.containers) {
+        if (container.isConnected) {
+            applyTheme(container, theme);
+        } else {
+            themeWatch.containers.delete(container);
+        }
+    }
+}
+
+function watchTheme(container) {
+    themeWatch.containers.add(container);
+    if (themeWatch.app && themeWatch.app.isConnected) {
+        return;
+    }
+    if (themeWatch.observer) {
+        themeWatch.observer.disconnect();
+    }
+    const app = document.querySelector('[data-testid="stAppViewContainer"]');
+    if (!app) {
+        return;
+    }
+    themeWatch.app = app;
+    themeWatch.className = app.className;
+    themeWatch.observer = new MutationObserver(() => {
+        if (app.className === themeWatch.className) {
+            return;
+        }
+        themeWatch.className = app.className;
+        clearTimeout(themeWatch.timer);
+        themeWatch.timer = setTimeout(themeChanged, THEME_SETTLE_MS);
+    });
+    themeWatch.observer.observe(app, { attributes: true, attributeFilter: ['class'] });
+}
+
+export default function(component) {
+    const invokedAt = performance.now();
+    const { data, setTriggerValue, parentElement } = component;
+
+    const stateKey = data && data.key;
+    let state = (stateKey && keyedInstances.get(stateKey)) || instances.get(parentElement);
+    if (!state) {
+        state = {
+            attachments: [],
+            rejected: [],
+            selection: 0,
+            pendingText: null,
+            heldAt: null,
+            interactiveMs: null,
+            ui: null
+        };
+    }
+    instances.set(parentElement, state);
+    if (stateKey) {
+        keyedInstances.set(stateKey, state);
+    }
+
+    const container = parentElement.querySelector('.chat-input-container');
+    const fileInput = parentElement.querySelector('#fileInput');
+    const fileBtn = parentElement.querySelector('#fileBtn');
+    const fileIndicator = parentElement.querySelector('#fileIndicator');
+    const fileNameEl = parentElement.querySelector('#fileName');
+    const fileRemove = parentElement.querySelector('#fileRemove');
+    const textInput = parentElement.querySelector('#textInput');
+    const sendBtn = parentElement.querySelector('#sendBtn');
+
+    // A rebuilt input takes over the draft of the one it replaces
+    const rebuilt = state.ui !== null && state.ui.textInput !== textInput;
+    if (rebuilt && !textInput.value) {
+        textInput.value = state.ui.textInput.value;
+    }
+    // Elements and trigger of the current mount. Reads and uploads still in
+    // flight belong to the run that started them and reach these through
+    // state.ui, so their progress and results land in a rebuilt input.
+    state.ui = { fileInput, fileIndicator, fileNameEl, textInput, sendBtn, setTriggerValue };
+
+    const chunked = data && data.uploadMode === 'chunked';
+    const chunkSize = (data && data.chunkSize) || 1048576;
+    const encodeOnSelect = !(data && data.encodeOnSelect === false);
+    const maxFiles = (data && data.maxFiles) || Infinity;
+    const maxTotalBytes = (data && data.maxTotalBytes) || Infinity;
+    const maxImageDimension = (data && data.maxImageDimension) || null;
+    const imageQuality = (data && data.imageQuality) || null;
+    const resizeImages = Boolean(maxImageDimension || imageQuality);
+    const formats = (data && data.formats) || null;
+    const ACK_TIMEOUT_MS = 15000;
+
+    fileInput.multiple = maxFiles > 1;
+
+    // Theme from Python, unless the app has been seen switching since
+    applyTheme(container, themeWatch.theme || (data && data.theme) || systemTheme());
+    watchTheme(container);
+
+    // Apply args from Python
+    if (data && data.placeholder) {
+        textInput.placeholder = data.placeholder;
+    }
+
+    if (data && data.disabled) {
+        textInput.disabled = true;
+        sendBtn.disabled = true;
+        fileBtn.disabled = true;
+    }
+
+    // Attachment state machine, per file:
+    //   pending -> reading -> ready
+    //                      -> failed
+    // A message is only sent once all its attachments are ready; text
+    // submitted earlier is held in state.pendingText and flushed when the
+    // last attachment becomes ready.
+    function overallStatus() {
+        const statuses = state.attachments.map((att) => att.status);
+        if (statuses.includes('failed')) {
+            return 'failed';
+        }
+        if (statuses.every((status) => status === 'ready')) {
+            return 'ready';
+        }
+        return statuses.includes('reading') ? 'reading' : 'pending';
+    }
+
+    function render() {
+        const { fileIndicator, fileNameEl, sendBtn } = state.ui;
+        const atts = state.attachments;
+        sendBtn.setAttribute('data-waiting', state.pendingText !== null ? 'true' : 'false');
+        if (!atts.length) {
+            if (state.rejected.length) {
+                // Nothing attached - show why
+                fileIndicator.classList.add('visible');
+                fileIndicator.setAttribute('data-status', 'failed');
+                fileNameEl.textContent = `Not attached: ${state.rejected.join(', ')}`;
+                fileIndicator.title = fileNameEl.textContent;
+                return;
+            }
+            fileIndicator.classList.remove('visible');
+            fileIndicator.removeAttribute('data-status');
+            return;
+        }
+        const status = overallStatus();
+        const total = atts.reduce((sum, att) => sum + att.file.size, 0);
+        const loaded = atts.reduce((sum, att) => sum + att.progress * att.file.size, 0);
+        const pct = total ? Math.floor((100 * loaded) / total) : 100;
+        const label = atts.length === 1 ? atts[0].file.name : `${atts.length} files`;
+
+        fileIndicator.classList.add('visible');
+        fileIndicator.setAttribute('data-status', status);
+        fileIndicator.style.setProperty('--progress', `${status === 'ready' ? 100 : pct}%`);
+        fileNameEl.textContent = status === 'reading' ? `${label} (${pct}%)` : label;
+
+        const lines = atts.map((att) =>
+            att.status === 'failed' ? `${att.file.name}: failed (${att.error})` : att.file.name
+        );
+        if (state.rejected.length) {
+            lines.push(`Not attached: ${state.rejected.join(', ')}`);
+        }
+        fileIndicator.title = lines.join('\\n');
+    }
+
+    function setStatus(att, status, error) {
+        if (!state.attachments.includes(att)) {
+            return;
+        }
+        att.status = status;
+        att.error = error || null;
+        if (status === 'ready') {
+            att.progress = 1;
+            att.readEnd = epochMs();
+        }
+        const overall = overallStatus();
+        if (overall === 'failed' && state.pendingText !== null) {
+            // Give the text back so the user can retry without retyping
+            state.ui.textInput.value = state.pendingText;
+            state.pendingText = null;
+        }
+        render();
+        if (overall === 'ready' && state.pendingText !== null) {
+            const text = state.pendingText;
+            state.pendingText = null;
+            submit(text);
+        } else if (chunked && status !== 'reading' && (encodeOnSelect || state.pendingText !== null)) {
+            // Chunked uploads share one transport - start the next one
+            prepareAll();
+        }
+    }
+
+    function setProgress(att, loaded) {
+        if (!state.attachments.includes(att)) {
+            return;
+        }
+        att.progress = att.file.size ? Math.min(loaded / att.file.size, 1) : 1;
+        render();
+    }
+
+    function clearFile() {
+        for (const att of state.attachments) {
+            if (att.reader && att.status === 'reading') {
+                att.reader.abort();
+            }
+            if (att.upload && att.status !== 'ready') {
+                clearTimeout(att.upload.timer);
+                state.ui.setTriggerValue('upload', {
+                    op: 'abort',
+                    upload_id: att.upload.id,
+                    seq: ++att.upload.seq
+                });
+            }
+        }
+        state.attachments = [];
+        state.rejected = [];
+        state.pendingText = null;
+        state.ui.fileInput.value = '';
+        render();
+    }
+
+    function readInline(att) {
+        const reader = new FileReader();
+        att.reader = reader;
+        reader.onprogress = (evt) => setProgress(att, evt.loaded);
+        reader.onload = (evt) => {
+            att.payload = {
+                name: att.file.name,
+                type: att.file.type,
+                size: att.file.size,
+                original_size: att.originalSize,
+                data: evt.target.result.split(',')[1]
+            };
+            setStatus(att, 'ready');
+        };
+        reader.onerror = () => setStatus(att, 'failed', reader.error ? reader.error.message : 'read error');
+        reader.readAsDataURL(att.file);
+    }
+
+    // Chunked transport: every message carries a sequence number which the
+    // server echoes back in data.uploads, so each acknowledgement re-invokes
+    // this function even when the committed offset did not move.
+    function sendUploadEvent(att, payload) {
+        const upload = att.upload;
+        upload.seq += 1;
+        clearTimeout(upload.timer);
+        // No ack in time (e.g. websocket reconnect): ask the server where to resume
+        upload.timer = setTimeout(() => beginUpload(att), ACK_TIMEOUT_MS);
+        state.ui.setTriggerValue('upload', { ...payload, upload_id: upload.id, seq: upload.seq });
+    }
+
+    function beginUpload(att) {
+        sendUploadEvent(att, {
+            op: 'begin',
+            name: att.file.name,
+            type: att.file.type,
+            size: att.file.size,
+            original_size: att.originalSize
+        });
+    }
+
+    async function sendNextChunk(att) {
+        const offset = att.upload.offset;
+        let chunk;
+        try {
+            chunk = await readChunk(att.file.slice(offset, offset + chunkSize));
+        } catch (err) {
+            setStatus(att, 'failed', err ? err.message : 'read error');
+            return;
+        }
+        if (!state.attachments.includes(att)) {
+            return;
+        }
+        sendUploadEvent(att, { op: 'chunk', offset: offset, data: chunk });
+    }
+
+    function handleAck(att, ack) {
+        if (att.status !== 'reading' || !ack || ack.seq !== att.upload.seq) {
+            return;
+        }
+        clearTimeout(att.upload.timer);
+        if (ack.error) {
+            // Refused by the server, e.g. above its size limit
+            setStatus(att, 'failed', ack.error);
+            return;
+        }
+        if (ack.offset < 0) {
+            // Server lost the upload; start again from scratch
+            att.upload.offset = 0;
+            beginUpload(att);
+            return;
+        }
+        att.upload.offset = ack.offset;
+        setProgress(att, ack.offset);
+        if (ack.offset >= att.file.size) {
+            att.payload = {
+                name: att.file.name,
+                type: att.file.type,
+                size: att.file.size,
+                original_size: att.originalSize,
+                upload_id: att.upload.id
+            };
+            setStatus(att, 'ready');
+            return;
+        }
+        sendNextChunk(att);
+    }
+
+    function startChunkedUpload(att) {
+        att.upload = {
+            id: `${browserToken()}:${att.file.size}:${att.file.lastModified}:${att.file.name}`,
+            offset: 0,
+            seq: 0,
+            timer: null
+        };
+        beginUpload(att);
+    }
+
+    // Read (and upload, in chunked mode) one attachment, downscaling
+    // images first when requested
+    async function prepare(att) {
+        setStatus(att, 'reading');
+        att.readStart = epochMs();
+        if (resizeImages) {
+            try {
+                att.file = await downscaleImage(att.file, maxImageDimension, imageQuality || 0.85);
+            } catch (err) {
+                // Undecodable image - send it as it is
+            }
+            att.resizeMs = epochMs() - att.readStart;
+            if (!state.attachments.includes(att)) {
+                return;
+            }
+        }
+        if (chunked) {
+            startChunkedUpload(att);
+        } else {
+            readInline(att);
+        }
+    }
+
+    // Start reading pending attachments. Inline reads all run concurrently;
+    // chunked uploads go one at a time because trigger values of the same
+    // name are coalesced per script run.
+    function prepareAll() {
+        for (const att of state.attachments) {
+            if (chunked && state.attachments.some((other) => other.status === 'reading')) {
+                return;
+            }
+            if (att.status === 'pending') {
+                prepare(att);
+            }
+        }
+    }
+
+    async function selectFiles(files) {
+        clearFile();
+        const selection = ++state.selection;
+        const problems = formats
+            ? await Promise.all(files.map((file) => checkFormat(formats, file)))
+            : files.map(() => null);
+        if (selection !== state.selection) {
+            // Superseded by a newer selection while checking
+            return;
+        }
+        let totalBytes = 0;
+        for (const [i, file] of files.entries()) {
+            if (problems[i]) {
+                state.rejected.push(`${file.name} (${problems[i]})`);
+                continue;
+            }
+            if (state.attachments.length >= maxFiles || totalBytes + file.size > maxTotalBytes) {
+                state.rejected.push(`${file.name} (limit reached)`);
+                continue;
+            }
+            totalBytes += file.size;
+            state.attachments.push({
+                file: file,
+                originalSize: file.size,
+                status: 'pending',
+                progress: 0,
+                payload: null,
+                error: null
+            });
+        }
+        render();
+        if (encodeOnSelect) {
+            prepareAll();
+        }
+    }
+
+    // Where the time went before the message left the browser; the size
+    // counts the text and the base64 payloads, not the JSON framing
+    function messageTimings(text, files) {
+        const timings = {
+            sentAt: epochMs(),
+            payloadBytes: files.reduce(
+                (sum, file) => sum + (file.data ? file.data.length : 0),
+                new TextEncoder().encode(text).length
+            ),
+            files: state.attachments.map((att) => ({
+                name: att.file.name,
+                size: att.file.size,
+                readStart: att.readStart,
+                readEnd: att.readEnd,
+                resizeMs: att.resizeMs
+            }))
+        };
+        if (state.heldAt !== null) {
+            timings.heldMs = timings.sentAt - state.heldAt;
+        }
+        if (state.interactiveMs !== null) {
+            timings.interactiveMs = state.interactiveMs;
+        }
+        return timings;
+    }
+
+    function submit(text) {
+        const files = state.attachments.map((att) => att.payload);
+        const message = {
+            text: text,
+            files: files,
+            timings: messageTimings(text, files)
+        };
+        state.heldAt = null;
+
+        state.ui.setTriggerValue('message', message);
+
+        state.ui.textInput.value = '';
+        state.attachments = [];
+        clearFile();
+    }
+
+    function sendMessage() {
+        const text = textInput.value.trim();
+        const status = state.attachments.length ? overallStatus() : null;
+
+        if (status === 'failed') {
+            return;
+        }
+
+        if (status === 'pending' || status === 'reading') {
+            // Attachments not ready yet - hold the text and send on the transition
+            state.pendingText = text;
+            state.heldAt = epochMs();
+            textInput.value = '';
+            prepareAll();
+            render();
+            return;
+        }
+
+        if (!text && !status) {
+            return;
+        }
+
+        submit(text);
+    }
+
+    fileBtn.onclick = () => {
+        fileInput.click();
+    };
+
+    fileInput.onchange = (e) => {
+        if (e.target.files.length) {
+            selectFiles(Array.from(e.target.files));
+        }
+    };
+
+    fileRemove.onclick = () => {
+        clearFile();
+    };
+
+    sendBtn.onclick = sendMessage;
+
+    textInput.onkeydown = (e) => {
+        if (e.key === 'Enter' && !e.shiftKey) {
+            e.preventDefault();
+            sendMessage();
+        }
+    };
+
+    if (rebuilt) {
+        render();
+    }
+
+    // Acknowledgements from the server for uploads in progress
+    if (chunked && data.uploads) {
+        for (const att of state.attachments) {
+            if (att.upload) {
+                handleAck(att, data.uploads[att.upload.id]);
+            }
+        }
+    }
+
+    // Time from this run's data to an input taking keystrokes, sent with
+    // the next message and shown in the browser's performance timeline
+    state.interactiveMs = performance.now() - invokedAt;
+    performance.measure('chat-input:interactive', {
+        start: invokedAt,
+        duration: state.interactiveMs
+    });
+}
+"""
+
+
+@cache
+def _component() -> Any:
+    """The component, registered on first use instead of at import."""
+    return components.component(
+        name="chat_input_with_upload",
+        html=_COMPONENT_HTML,
+        js=_COMPONENT_JS,
+    )
+
+
+@cache
+def _browser_formats() -> list[dict[str, Any]]:
+    """Format table checked by the browser when check_formats is on, built on first use."""
+    return formats.browser_formats()
+
+
+UPLOAD_MODES = ("inline", "chunked")
+
+# Default size of a chunk in chunked upload mode
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def _acks_key(key: str) -> str:
+    """Session state key holding upload acknowledgements for a component."""
+    return f"_chat_input_upload_acks_{key}"
+
+
+def _receive_upload_event(key: str, max_total_bytes: int | None = None) -> None:
+    """Apply a chunked upload event to the spool and record the acknowledgement.
+
+    Runs as a widget callback, i.e. before the script, so the acknowledgement
+    is sent back to the browser in the very same run. An upload larger than
+    max_total_bytes is refused at begin with an acknowledgement carrying an
+    error, which fails the attachment in the browser.
+    """
+    event = st.session_state[key].get("upload")
+    if not isinstance(event, dict) or not event.get("upload_id"):
+        return
+
+    upload_id = event["upload_id"]
+    op = event.get("op")
+    acks = dict(st.session_state.get(_acks_key(key), {}))
+
+    if op == "begin":
+        # A new upload is a good moment to drop the ones abandoned long ago
+        uploads.registry.prune()
+        try:
+            upload = uploads.registry.begin(
+                upload_id,
+                event.get("name", ""),
+                event.get("type", ""),
+                int(event.get("size", 0)),
+                original_size=event.get("original_size"),
+                max_size=max_total_bytes,
+            )
+        except ValueError as e:
+            acks[upload_id] = {"offset": -1, "seq": event.get("seq"), "error": str(e)}
+            st.session_state[_acks_key(key)] = acks
+            return
+        offset = upload.offset
+    elif op == "chunk":
+        upload = uploads.registry.get(upload_id)
+        if upload is None:
+            offset = -1
+        else:
+            chunk = base64.b64decode(event.get("data", ""))
+            offset = upload.write(int(event.get("offset", 0)), chunk)
+    else:
+        uploads.registry.discard(upload_id)
+        acks.pop(upload_id, None)
+        st.session_state[_acks_key(key)] = acks
+        return
+
+    acks[upload_id] = {"offset": offset, "seq": event.get("seq")}
+    st.session_state[_acks_key(key)] = acks
+
+
+def _head(file_info: dict[str, Any]) -> bytes:
+    """First bytes of a processed file, enough to recognise its format."""
+    if "path" in file_info:
+        with open(file_info["path"], "rb") as fh:
+            return fh.read(formats.SNIFF_BYTES)
+    if "encoded" in file_info:
+        # Every 4 base64 characters hold 3 bytes
+        chars = -(-formats.SNIFF_BYTES // 3) * 4
+        return base64.b64decode(file_info["encoded"][:chars])
+    if hasattr(file_info["data"], "read"):
+        head = file_info["data"].read(formats.SNIFF_BYTES)
+        file_info["data"].seek(0)
+        return head
+    return file_info["data"][: formats.SNIFF_BYTES]
+
+
+def _process_files(
+    file_infos: list[dict[str, Any]],
+    key: str | None,
+    max_files: int | None,
+    max_total_bytes: int | None,
+    decode: bool = True,
+    check_formats: bool = False,
+    spool_threshold: int | None = None,
+) -> tuple[list[dict[str, Any]], dict[str, str]]:
+    """Decode a batch of submitted files, enforcing the per-message limits.
+
+    The browser already applies the limits; they are checked again here
+    against the declared sizes before anything is decoded, and against the
+    received size of chunked uploads. Spool files of rejected chunked
+    uploads are deleted. With
+    check_formats the leading bytes of each file must match its claimed
+    format (formats.check()). With decode=False inline files keep their
+    base64 payload as 'encoded'; files decoding to more than
+    spool_threshold bytes are decoded into a temporary file object
+    (uploads.spool_base64()). Returns the processed files and the
+    reasons for rejecting the others, by file name.
+    """
+    accepted = []
+    rejected = {}
+    total_bytes = 0
+    for file_info in file_infos:
+        size = int(file_info.get("size", 0))
+        if (max_files is not None and len(accepted) >= max_files) or (
+            max_total_bytes is not None and total_bytes + size > max_total_bytes
+        ):
+            rejected[file_info.get("name", "")] = "limit reached"
+            if file_info.get("upload_id"):
+                uploads.registry.discard(file_info["upload_id"])
+            continue
+        total_bytes += size
+        accepted.append(file_info)
+
+    files = []
+    total_bytes = 0
+    acks = st.session_state.get(_acks_key(key), {}) if key is not None else {}
+    for file_info in accepted:
+        if file_info.get("upload_id"):
+            # Chunked upload - already spooled on the server
+            processed_file = uploads.registry.finish(file_info["upload_id"])
+            acks.pop(file_info["upload_id"], None)
+            if processed_file is None:
+                uploads.registry.discard(file_info["upload_id"])
+                rejected[file_info.get("name", "")] = "upload incomplete"
+                continue
+            # The spooled size is what counts, not the one the browser declared
+            if (
+                max_total_bytes is not None
+                and total_bytes + processed_file["size"] > max_total_bytes
+            ):
+                processed_file["path"].unlink(missing_ok=True)
+                rejected[processed_file["name"]] = "limit reached"
+                continue
+        else:
+            processed_file = {
+                "name": file_info.get("name", ""),
+                "type": file_info.get("type", ""),
+                "size": file_info.get("size", 0),
+                "original_size": file_info.get("original_size", file_info.get("size", 0)),
+            }
+            encoded = file_info.get("data", "")
+            if decode and uploads.should_spool(encoded, spool_threshold):
+                processed_file["data"] = uploads.spool_base64(encoded, spool_threshold)
+            elif decode:
+                # Decode base64 file data
+                processed_file["data"] = base64.b64decode(encoded)
+            else:
+                processed_file["encoded"] = encoded
+        if check_formats:
+            try:
+                processed_file["type"] = formats.check(
+                    processed_file["name"], processed_file["type"], _head(processed_file)
+                ).mime_type
+            except formats.FormatError as e:
+                rejected[processed_file["name"]] = str(e)
+                if "path" in processed_file:
+                    processed_file["path"].unlink(missing_ok=True)
+                elif hasattr(processed_file.get("data"), "close"):
+                    processed_file["data"].close()
+                continue
+        total_bytes += int(processed_file["size"])
+        files.append(processed_file)
+
+    return files, rejected
+
+
+def chat_input_with_upload(
+    placeholder: str = "Send a message...",
+    disabled: bool = False,
+    key: str | None = None,
+    upload_mode: str = "inline",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    encode_on_select: bool = True,
+    max_files: int | None = None,
+    max_total_bytes: int | None = None,
+    max_image_dimension: int | None = None,
+    image_quality: float | None = None,
+    decode: bool = True,
+    check_formats: bool = False,
+    spool_threshold: int | None = None,
+) -> dict[str, Any] | None:
+    """Display a chat input box with file upload capability.
+
+    Parameters
+    ----------
+    placeholder : str
+        Placeholder text for the input field.
+    disabled : bool
+        Whether the input is disabled.
+    key : str or None
+        An optional key that uniquely identifies this component.
+        Required when ``upload_mode`` is "chunked". With a key, attachments
+        and draft text are kept in the browser when a rerun rebuilds the
+        input.
+    upload_mode : str
+        "inline" sends the whole file base64 encoded with the message.
+        "chunked" streams the file in ``chunk_size`` pieces into a spool
+        file on the server as soon as it is picked; an interrupted upload
+        resumes from the last acknowledged chunk.
+    chunk_size : int
+        Size in bytes of a single chunk in chunked mode.
+    encode_on_select : bool
+        Start reading (or uploading, in chunked mode) the file in the
+        background as soon as it is picked, so it is ready by the time the
+        message is sent. When False the file is read on send. Either way
+        the message is held until the attachment is ready.
+    max_files : int or None
+        Maximum number of files attached to one message. 1 turns off
+        multiple selection. None means no limit.
+    max_total_bytes : int or None
+        Maximum combined size of the files attached to one message.
+        None means no limit.
+    max_image_dimension : int or None
+        Downscale PNG, JPEG and WebP images in the browser so that their
+        longest side is at most this many pixels.
+    image_quality : float or None
+        Quality between 0 and 1 used to re-encode images as WebP (JPEG
+        where the browser cannot encode WebP). Setting either image
+        parameter turns re-encoding on; the quality defaults to 0.85.
+    decode : bool
+        Decode inline files in the script thread. When False each inline
+        file carries its base64 payload as 'encoded' instead of 'data',
+        to be decoded off the script thread (see processing.FileProcessor).
+    check_formats : bool
+        Accept only the formats in formats.FORMATS that Bedrock can read,
+        and only when the file's leading bytes match its extension or
+        type. Checked in the browser before a file is read or uploaded,
+        and again on the server.
+    spool_threshold : int or None
+        Decode inline files larger than this many bytes into a temporary
+        file rather than memory; their 'data' is then a binary file object
+        instead of bytes. None keeps every file in memory. With
+        decode=False pass it to processing.FileProcessor instead.
+
+    Returns
+    -------
+    dict or None
+        Dictionary with 'text', 'files', 'file' and 'rejected' keys when
+        user submits, None otherwise. Each entry of 'files' is a dict with
+        'name', 'type', 'size', and 'data' (base64 decoded bytes). In
+        chunked mode 'data' is replaced by 'path' (spool file, owned by
+        the caller) and 'sha256' (checksum of the received bytes). Above
+        spool_threshold 'data' is a file object, removed from disk when it
+        is closed or garbage collected with the session, and consumed by
+        content.build_content_block(). 'file'
+        is the first entry of 'files' or None, and 'rejected' lists the
+        names of files dropped because of the limits or their format,
+        with the reason for each in 'rejected_reasons'. 'original_size'
+        holds the size of each file before image re-encoding.
+        'timings' is a list of timing.Span: reading each file and sending
+        the message in the browser, and processing it on the server.
+    """
+    if upload_mode not in UPLOAD_MODES:
+        raise ValueError(f"upload_mode must be one of {UPLOAD_MODES}, got {upload_mode!r}")
+    if image_quality is not None and not 0 < image_quality <= 1:
+        raise ValueError(f"image_quality must be between 0 and 1, got {image_quality!r}")
+    chunked = upload_mode == "chunked"
+    if chunked and key is None:
+        raise ValueError("chunked upload mode requires a key")
+
+    data = {
+        "placeholder": placeholder,
+        "disabled": disabled,
+        "uploadMode": upload_mode,
+        "encodeOnSelect": encode_on_select,
+        "maxFiles": max_files,
+        "maxTotalBytes": max_total_bytes,
+        "maxImageDimension": max_image_dimension,
+        "imageQuality": image_quality,
+        "formats": _browser_formats() if check_formats else None,
+        # "light", "dark", or None before the browser has reported it
+        "theme": st.context.theme.type,
+        # Keeps the browser's attachment state across a rerun rebuilding the input
+        "key": key,
+    }
+    callbacks = {"on_message_change": lambda: None}
+    if chunked:
+        data["chunkSize"] = chunk_size
+        data["uploads"] = st.session_state.get(_acks_key(key), {})
+        callbacks["on_upload_change"] = partial(_receive_upload_event, key, max_total_bytes)
+
+    result = _component()(data=data, key=key, **callbacks)
+
+    # result.message contains our trigger value
+    if result.message is None:
+        return None
+
+    # Process the result
+    received = time.perf_counter()
+    message = result.message
+    text = message.get("text", "")
+    files, rejected = _process_files(
+        message.get("files") or [],
+        key,
+        max_files,
+        max_total_bytes,
+        decode=decode,
+        check_formats=check_formats,
+        spool_threshold=spool_threshold,
+    )
+    timings = timing.browser_spans(message.get("timings"), timing.wall_ns(received))
+    timings.append(timing.Span.timed("server.decode", received, files=len(files), decode=decode))
+
+    return {
+        "text": text,
+        "file": files[0] if files else None,
+        "files": files,
+        "rejected": list(rejected),
+        "rejected_reasons": rejected,
+        "timings": timings,
+    }
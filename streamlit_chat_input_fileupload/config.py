@@ -1,18 +1,144 @@
+from collections.abc import Callable
+from functools import cache
 import os
 from pathlib import Path
+import tempfile
+from typing import Any
 
-from dotenv import load_dotenv
-
-# Load environment variables from .env file if it exists
-load_dotenv()
+# Settings taken from the environment are read on first access (see
+# __getattr__ below), after the .env file is loaded, rather than at import
+_FROM_ENV: dict[str, Callable[[], Any]] = {}
 
 # paths
 PROJ_ROOT = Path(__file__).resolve().parents[1]
 
 # AWS configuration
-AWS_PROFILE = os.getenv("AWS_PROFILE", "kolomolo")
-AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
+_FROM_ENV["AWS_PROFILE"] = lambda: os.getenv("AWS_PROFILE", "kolomolo")
+_FROM_ENV["AWS_REGION"] = lambda: os.getenv("AWS_REGION", "us-east-1")
 
 # Bedrock model from environment
-BEDROCK_MODEL = os.getenv("BEDROCK_MODEL")
+_FROM_ENV["BEDROCK_MODEL"] = lambda: os.getenv("BEDROCK_MODEL")
 MAX_TOKENS = 4096
+
+# Context policy applied to the history sent with each request (None = no limit):
+# last N turns, estimated size / input token budgets, and the age in turns after
+# which attachments are replaced by a placeholder text block
+CONTEXT_MAX_TURNS = 50
+CONTEXT_MAX_BYTES = 20 * 1024 * 1024
+CONTEXT_MAX_TOKENS = 150_000
+CONTEXT_ATTACHMENT_MAX_AGE = 10
+
+# Opt-in Bedrock prompt caching: cachePoint blocks after the stable conversation
+# prefix and after attachments estimated at CACHE_MIN_TOKENS or more (the model
+# minimum). Only for models with prompt caching, the others reject cachePoint
+PROMPT_CACHING = False
+CACHE_MIN_TOKENS = 1024
+
+# Render replies token by token via converse_stream instead of waiting for converse
+STREAM_RESPONSES = True
+
+# Model backend (backends.get_backend()): "bedrock", or "fake" for a local
+# stand-in replying with FAKE_REPLY_TOKENS synthetic tokens, the first after
+# FAKE_FIRST_TOKEN_S seconds and then one every FAKE_TOKEN_S (load tests)
+_FROM_ENV["LLM_BACKEND"] = lambda: os.getenv("LLM_BACKEND", "bedrock")
+_FROM_ENV["FAKE_FIRST_TOKEN_S"] = lambda: float(os.getenv("FAKE_FIRST_TOKEN_S", "0.5"))
+_FROM_ENV["FAKE_TOKEN_S"] = lambda: float(os.getenv("FAKE_TOKEN_S", "0.02"))
+FAKE_REPLY_TOKENS = 50
+
+# Opt-in cache of replies to identical requests (model, inference config,
+# messages and attachments): RESPONSE_CACHE "memory", or "sqlite" in the file
+# RESPONSE_CACHE_PATH. Replies expire after RESPONSE_CACHE_TTL_S seconds; the
+# least recently used are evicted beyond RESPONSE_CACHE_MAX_BYTES
+_FROM_ENV["RESPONSE_CACHE"] = lambda: os.getenv("RESPONSE_CACHE") or None
+_FROM_ENV["RESPONSE_CACHE_PATH"] = lambda: Path(
+    os.getenv("RESPONSE_CACHE_PATH", Path(tempfile.gettempdir()) / "streamlit_chat_responses.db")
+)
+RESPONSE_CACHE_TTL_S = 24 * 3600
+RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Model calls run on a thread pool shared by all sessions, one call in flight
+# per session; a call is stopped after LLM_TIMEOUT_S seconds
+LLM_POOL_SIZE = 8
+LLM_TIMEOUT_S = 120
+
+# Timing spans of every turn (browser read and send, decoding, request build,
+# Bedrock call, rendering) are logged as OTLP/JSON by the
+# streamlit_chat_input_fileupload.timing logger; TIMING_PANEL also shows the
+# last TIMING_PANEL_TURNS turns in the sidebar
+_FROM_ENV["TIMING_PANEL"] = lambda: os.getenv("TIMING_PANEL", "").lower() in ("1", "true", "yes")
+TIMING_PANEL_TURNS = 5
+
+# Bedrock client shared by all sessions: HTTP connection pool size, attempts per
+# request in botocore's adaptive retry mode, and a token bucket limiting how many
+# requests start per second (BEDROCK_BURST at once). Throttled requests halve the
+# rate and wait in line again instead of failing
+BEDROCK_MAX_POOL_CONNECTIONS = 50
+BEDROCK_MAX_ATTEMPTS = 5
+BEDROCK_RATE_LIMIT = 5.0
+BEDROCK_BURST = 10
+
+# Reruns render only the newest HISTORY_VISIBLE_MESSAGES messages; "Show earlier
+# messages" adds HISTORY_PAGE_SIZE more at a time
+HISTORY_VISIBLE_MESSAGES = 20
+HISTORY_PAGE_SIZE = 20
+
+# Attachment limits per chat message
+MAX_FILES_PER_MESSAGE = 5
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
+# Upload mode of the chat input: "inline" sends attachments with the message,
+# "chunked" uploads them as soon as they are picked, so the message only
+# refers to files already on the server
+UPLOAD_MODE = "inline"
+
+# Images are downscaled in the browser to this long edge (pixels) and
+# re-encoded with this quality (0-1) before upload
+MAX_IMAGE_DIMENSION = 1568
+IMAGE_QUALITY = 0.85
+
+# Uploaded files are decoded, checked and stored by FILE_WORKERS threads while
+# the message renders; at most FILE_QUEUE_SIZE files wait at a time
+FILE_WORKERS = 4
+FILE_QUEUE_SIZE = 16
+
+# Files decoding to more than SPOOL_THRESHOLD bytes are decoded a block at a
+# time into a temporary file instead of one bytes object in memory
+SPOOL_THRESHOLD = 8 * 1024 * 1024
+
+# Send plain text documents (txt, csv, md, html) as compacted extracted text
+# rather than document blocks; source files, JSON, logs and zip bundles are
+# always sent as extracted text
+EXTRACT_TEXT_DOCUMENTS = True
+
+# Attachment store: blobs below the spill threshold stay in memory (LRU under
+# the memory budget, shared by all sessions), the rest live in ATTACHMENT_DIR.
+# Files there unused for ATTACHMENT_MAX_AGE_S seconds are deleted, and the least
+# recently used beyond ATTACHMENT_DISK_BUDGET bytes; the request then carries a
+# placeholder instead
+ATTACHMENT_MEMORY_BUDGET = 64 * 1024 * 1024
+ATTACHMENT_SPILL_THRESHOLD = 1024 * 1024
+ATTACHMENT_DISK_BUDGET = 2 * 1024 * 1024 * 1024
+ATTACHMENT_MAX_AGE_S = 24 * 3600
+_FROM_ENV["ATTACHMENT_DIR"] = lambda: Path(
+    os.getenv("ATTACHMENT_DIR", Path(tempfile.gettempdir()) / "streamlit_chat_attachments")
+)
+
+
+@cache
+def _load_dotenv() -> None:
+    """Load environment variables from .env file if it exists, once."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _FROM_ENV:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    _load_dotenv()
+    value = globals()[name] = _FROM_ENV[name]()
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_FROM_ENV})
@@ -0,0 +1,126 @@
+"""Building Bedrock content blocks from chat input."""
+
+from pathlib import Path
+from typing import Any
+
+from streamlit_chat_input_fileupload import extraction
+from streamlit_chat_input_fileupload.attachments import AttachmentStore
+from streamlit_chat_input_fileupload.context import estimate_block
+from streamlit_chat_input_fileupload.formats import lookup
+
+# Bedrock accepts at most this many cachePoint blocks per request
+MAX_CACHE_POINTS = 4
+
+
+def cache_point() -> dict[str, Any]:
+    """A Bedrock prompt cache checkpoint block."""
+    return {"cachePoint": {"type": "default"}}
+
+
+def store_file(file_info: dict[str, Any], store: AttachmentStore) -> str:
+    """Put an uploaded file into the attachment store and return its digest.
+
+    A spool file ('path') or spooled 'data' file object is consumed.
+    """
+    if "path" in file_info:
+        return store.put_file(file_info["path"], move=True)
+    if hasattr(file_info["data"], "read"):
+        with file_info["data"] as stream:
+            return store.put_stream(stream)
+    return store.put(file_info["data"])
+
+
+def discard_file(file_info: dict[str, Any]) -> None:
+    """Delete the spool file and close the spooled file object of a file not stored."""
+    if "path" in file_info:
+        Path(file_info["path"]).unlink(missing_ok=True)
+    if hasattr(file_info.get("data"), "close"):
+        file_info["data"].close()
+
+
+def extracted_block(file_info: dict[str, Any], store: AttachmentStore) -> dict[str, Any]:
+    """Text block holding the extracted text of a file.
+
+    The 'file' entry marks the block as an attachment for display and
+    context trimming; it is dropped when the request is built.
+    """
+    name = file_info["name"]
+    digest = store_file(file_info, store)
+    text = "\n".join(extraction.extracted_text(digest, store.open, name))
+    return {
+        "text": f'<file name="{name}">\n{text}\n</file>',
+        "file": {"name": name, "ref": digest, "size": file_info.get("size", 0)},
+    }
+
+
+def file_blocks(
+    file_info: dict[str, Any],
+    store: AttachmentStore,
+    cache_min_tokens: int | None = None,
+    extract_documents: bool = False,
+) -> list[dict[str, Any]]:
+    """Content blocks for one uploaded file, see build_content_block()."""
+    fmt = lookup(file_info["name"], file_info["type"])
+
+    if fmt is not None and (
+        fmt.kind == "extracted" or (extract_documents and fmt.kind == "document" and fmt.is_text)
+    ):
+        block = extracted_block(file_info, store)
+    elif fmt is not None and fmt.kind == "image":
+        block = {
+            "image": {
+                "format": fmt.bedrock,
+                "source": {"ref": store_file(file_info, store)},
+                "name": file_info["name"],
+                "size": file_info.get("size", 0),
+            }
+        }
+    elif fmt is not None and fmt.bedrock is not None:
+        block = {
+            "document": {
+                "format": fmt.bedrock,
+                "name": file_info["name"].replace(".", "_"),
+                "source": {"ref": store_file(file_info, store)},
+                "size": file_info.get("size", 0),
+            }
+        }
+    else:
+        # Unsupported format - add as text note
+        discard_file(file_info)
+        return [
+            {
+                "text": f"[Attached file: {file_info['name']} - format not supported for direct analysis]"
+            }
+        ]
+
+    if cache_min_tokens is not None and estimate_block(block)[1] >= cache_min_tokens:
+        return [block, cache_point()]
+    return [block]
+
+
+def build_content_block(
+    text: str,
+    files: list[dict[str, Any]],
+    store: AttachmentStore,
+    cache_min_tokens: int | None = None,
+    extract_documents: bool = False,
+) -> list[dict[str, Any]]:
+    """Build Bedrock content block from text and optional files.
+
+    File bytes go into the attachment store; the blocks only hold a
+    reference to them. Source files, JSON, logs and zip bundles are sent
+    as their extracted text (see extraction.py); with extract_documents
+    plain text documents (txt, csv, md, html) are too. With
+    cache_min_tokens set, a cachePoint block is placed after every
+    attachment estimated at that many tokens or more, so later turns read
+    it from the prompt cache.
+    """
+    content = []
+
+    for file_info in files:
+        content.extend(file_blocks(file_info, store, cache_min_tokens, extract_documents))
+
+    if text:
+        content.append({"text": text})
+
+    return content
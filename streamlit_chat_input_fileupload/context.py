@@ -0,0 +1,77 @@
+"""Context policy: how much of the history is sent with each request."""
+
+from dataclasses import dataclass
+from typing import Any
+
+# Rough size estimates used for the byte and token budgets
+CHARS_PER_TOKEN = 4
+IMAGE_TOKENS = 1600
+
+PLACEHOLDER = "[Earlier attachment {name} removed from context]"
+
+
+@dataclass(frozen=True)
+class ContextPolicy:
+    """Limits applied when the request history is built.
+
+    Attributes
+    ----------
+    max_turns : int or None
+        Send only the last N turns (a turn starts with a user message).
+    max_bytes : int or None
+        Drop the oldest turns until the estimated request size fits.
+    max_tokens : int or None
+        Drop the oldest turns until the estimated input tokens fit.
+    attachment_max_age : int or None
+        Replace attachments older than K turns with a placeholder text
+        block. The current turn has age 0.
+
+    The newest turn is always sent, even if it exceeds a budget.
+    """
+
+    max_turns: int | None = None
+    max_bytes: int | None = None
+    max_tokens: int | None = None
+    attachment_max_age: int | None = None
+
+
+@dataclass
+class ContextStats:
+    """What a built request contains."""
+
+    messages: int = 0
+    dropped_turns: int = 0
+    dropped_attachments: int = 0
+    bytes: int = 0
+    tokens: int = 0
+
+
+def is_attachment(block: dict[str, Any]) -> bool:
+    # Extracted text blocks carry the file they came from
+    return "image" in block or "document" in block or "file" in block
+
+
+def block_name(block: dict[str, Any]) -> str:
+    """Display name of an attachment block."""
+    for kind in ("image", "document", "file"):
+        if kind in block:
+            return block[kind].get("name", kind)
+    return ""
+
+
+def placeholder_block(block: dict[str, Any]) -> dict[str, Any]:
+    """Text block standing in for a dropped attachment."""
+    return {"text": PLACEHOLDER.format(name=block_name(block))}
+
+
+def estimate_block(block: dict[str, Any]) -> tuple[int, int]:
+    """Estimated (bytes, tokens) of a stored content block."""
+    if "text" in block:
+        size = len(block["text"].encode())
+        return size, max(1, size // CHARS_PER_TOKEN)
+    if "image" in block:
+        return block["image"].get("size", 0), IMAGE_TOKENS
+    if "document" in block:
+        size = block["document"].get("size", 0)
+        return size, size // CHARS_PER_TOKEN
+    return 0, 0
@@ -0,0 +1,272 @@
+"""Conversation history kept up to date in Bedrock Converse API shape."""
+
+from bisect import bisect_left
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from streamlit_chat_input_fileupload.content import MAX_CACHE_POINTS, cache_point
+from streamlit_chat_input_fileupload.context import (
+    ContextPolicy,
+    ContextStats,
+    estimate_block,
+    is_attachment,
+    placeholder_block,
+)
+from streamlit_chat_input_fileupload.records import (
+    CachePoint,
+    Message,
+    message_from_dicts,
+    placeholder,
+)
+
+
+def limit_cache_points(
+    messages: list[dict[str, Any]], max_points: int = MAX_CACHE_POINTS
+) -> list[dict[str, Any]]:
+    """Drop the earliest cachePoint blocks beyond the per-request maximum."""
+    total = sum(1 for message in messages for block in message["content"] if "cachePoint" in block)
+    excess = total - max_points
+    if excess <= 0:
+        return messages
+    messages = list(messages)
+    for index, message in enumerate(messages):
+        if excess <= 0:
+            break
+        content = []
+        for block in message["content"]:
+            if excess > 0 and "cachePoint" in block:
+                excess -= 1
+            else:
+                content.append(block)
+        if len(content) != len(message["content"]):
+            messages[index] = {"role": message["role"], "content": content}
+    return messages
+
+
+def has_attachment(content: list[dict[str, Any]]) -> bool:
+    return any(is_attachment(block) for block in content)
+
+
+class Conversation:
+    """Chat history plus its Converse API representation.
+
+    The history is kept as records.Message, slotted records rather than
+    nested dicts. The Converse API form of a message is built once, when
+    the message is appended or comes back into the request window, and
+    released when it leaves the window, so only the messages being sent
+    are held twice. api_messages() shares the converted messages and only
+    resolves attachment bytes for the messages that reference the
+    attachment store.
+
+    Parameters
+    ----------
+    resolve : callable
+        Maps an attachment reference (store digest) to its bytes,
+        typically AttachmentStore.get.
+    """
+
+    def __init__(self, resolve: Callable[[str], bytes]):
+        self.resolve = resolve
+        self.messages: list[Message] = []
+        self.last_context: ContextStats | None = None
+        # API form of the messages from _api_start on; None before it and for
+        # messages with attachments, whose bytes are resolved per request
+        self._api: list[dict[str, Any] | None] = []
+        self._api_start = 0
+        self._with_attachments: list[int] = []
+        self._turn_starts: list[int] = []
+        # Estimated (bytes, tokens) per message, with and without attachments
+        self._costs: list[tuple[int, int, int, int]] = []
+        self._total_bytes = 0
+        self._total_tokens = 0
+
+    def append(self, role: str, content: list[dict[str, Any]]) -> Message:
+        """Add a message, given as content.py blocks, to the history."""
+        message = message_from_dicts(role, content)
+        index = len(self._api)
+        self.messages.append(message)
+        if role == "user":
+            self._turn_starts.append(index)
+        if has_attachment(content):
+            self._with_attachments.append(index)
+            self._api.append(None)
+        else:
+            self._api.append(message.to_api(self.resolve))
+
+        full_bytes = full_tokens = bare_bytes = bare_tokens = 0
+        for block in content:
+            size, tokens = estimate_block(block)
+            full_bytes += size
+            full_tokens += tokens
+            if is_attachment(block):
+                size, tokens = estimate_block(placeholder_block(block))
+            bare_bytes += size
+            bare_tokens += tokens
+        self._costs.append((full_bytes, full_tokens, bare_bytes, bare_tokens))
+        self._total_bytes += full_bytes
+        self._total_tokens += full_tokens
+        return message
+
+    def clear(self) -> None:
+        self.messages.clear()
+        self.last_context = None
+        self._api.clear()
+        self._api_start = 0
+        self._with_attachments.clear()
+        self._turn_starts.clear()
+        self._costs.clear()
+        self._total_bytes = 0
+        self._total_tokens = 0
+
+    def __len__(self) -> int:
+        return len(self.messages)
+
+    def __iter__(self) -> Iterator[Message]:
+        return iter(self.messages)
+
+    def _strip_attachments(self, index: int) -> dict[str, Any]:
+        """API message with its attachments replaced by placeholders."""
+        message = self.messages[index]
+        return {
+            "role": message.role,
+            "content": [
+                placeholder(block) if block.attachment else block.to_api(self.resolve)
+                for block in message.content
+                if not isinstance(block, CachePoint)
+            ],
+        }
+
+    def _resolve_attachments(self, index: int) -> dict[str, Any]:
+        """API message with attachment bytes, or placeholders for those the
+        store no longer holds (e.g. evicted from disk)."""
+        message = self.messages[index]
+        content = []
+        for block in message.content:
+            try:
+                content.append(block.to_api(self.resolve))
+            except KeyError:
+                content.append(placeholder(block))
+        return {"role": message.role, "content": content}
+
+    def _move_api_start(self, start: int) -> None:
+        """Hold the API form of the messages from start on, and only those."""
+        attachments = set(self._with_attachments)
+        for index in range(start, self._api_start):
+            if index not in attachments:
+                self._api[index] = self.messages[index].to_api(self.resolve)
+        for index in range(self._api_start, start):
+            self._api[index] = None
+        self._api_start = start
+
+    def _window(self, policy: ContextPolicy) -> tuple[int, int]:
+        """First message index to send, and first index keeping attachments."""
+        turns = self._turn_starts
+        start = 0
+        if policy.max_turns is not None and len(turns) > policy.max_turns:
+            start = turns[-max(policy.max_turns, 1)]
+        keep_from = 0
+        if policy.attachment_max_age is not None and len(turns) > policy.attachment_max_age:
+            keep_from = turns[-(policy.attachment_max_age + 1)]
+
+        if policy.max_bytes is None and policy.max_tokens is None:
+            return start, keep_from
+
+        # Walk back whole turns from the newest until a budget is exceeded
+        total_bytes = total_tokens = 0
+        end = len(self._api)
+        for turn_start in reversed(turns):
+            if turn_start < start:
+                break
+            turn_bytes = turn_tokens = 0
+            for index in range(turn_start, end):
+                full_bytes, full_tokens, bare_bytes, bare_tokens = self._costs[index]
+                stripped = index < keep_from
+                turn_bytes += bare_bytes if stripped else full_bytes
+                turn_tokens += bare_tokens if stripped else full_tokens
+            over_bytes = (
+                policy.max_bytes is not None and total_bytes + turn_bytes > policy.max_bytes
+            )
+            over_tokens = (
+                policy.max_tokens is not None and total_tokens + turn_tokens > policy.max_tokens
+            )
+            if (over_bytes or over_tokens) and end < len(self._api):
+                start = end
+                break
+            total_bytes += turn_bytes
+            total_tokens += turn_tokens
+            end = turn_start
+        return start, keep_from
+
+    def api_messages(
+        self, policy: ContextPolicy | None = None, cache_prefix: bool = False
+    ) -> list[dict[str, Any]]:
+        """Messages ready to pass to converse / converse_stream.
+
+        With a policy, the history is windowed and old attachments are
+        replaced by placeholders; what was sent is recorded in
+        last_context. With cache_prefix, a cachePoint is placed after the
+        history preceding the newest user message, which is the part that
+        stays the same on the next turn. The returned list and the messages
+        without attachments are shared with the conversation and must not
+        be modified.
+        """
+        messages = self._build(policy)
+        newest_user = next(
+            (i for i in range(len(messages) - 1, -1, -1) if messages[i]["role"] == "user"), 0
+        )
+        if cache_prefix and newest_user > 0:
+            if messages is self._api:
+                messages = list(messages)
+            message = messages[newest_user - 1]
+            if "cachePoint" not in message["content"][-1]:
+                messages[newest_user - 1] = {
+                    "role": message["role"],
+                    "content": [*message["content"], cache_point()],
+                }
+        return limit_cache_points(messages)
+
+    def _build(self, policy: ContextPolicy | None) -> list[dict[str, Any]]:
+        if policy is None:
+            start, keep_from = 0, 0
+            stats = ContextStats(
+                messages=len(self._api), bytes=self._total_bytes, tokens=self._total_tokens
+            )
+        else:
+            start, keep_from = self._window(policy)
+            stats = self._measure(start, keep_from)
+        self.last_context = stats
+        if start != self._api_start:
+            self._move_api_start(start)
+
+        if start == 0 and not self._with_attachments:
+            return self._api
+
+        messages = self._api[start:]
+        for index in self._with_attachments:
+            if index < start:
+                continue
+            if index < keep_from:
+                messages[index - start] = self._strip_attachments(index)
+            else:
+                messages[index - start] = self._resolve_attachments(index)
+        return messages
+
+    def _measure(self, start: int, keep_from: int) -> ContextStats:
+        """Size of the request made of messages from start on."""
+        stats = ContextStats(
+            messages=len(self._api) - start,
+            dropped_turns=bisect_left(self._turn_starts, start),
+        )
+        attachments = set(self._with_attachments)
+        for index in range(start, len(self._api)):
+            full_bytes, full_tokens, bare_bytes, bare_tokens = self._costs[index]
+            if index < keep_from and index in attachments:
+                stats.dropped_attachments += sum(
+                    1 for block in self.messages[index].content if block.attachment
+                )
+                stats.bytes += bare_bytes
+                stats.tokens += bare_tokens
+            else:
+                stats.bytes += full_bytes
+                stats.tokens += full_tokens
+        return stats
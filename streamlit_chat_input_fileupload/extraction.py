@@ -0,0 +1,214 @@
+"""Text extraction for attachments sent to the model as text.
+
+Source files, JSON, logs and zip bundles are not Bedrock document formats.
+Their text is read as a stream, compacted and split into chunks; results
+are memoized by the content digest, so an attachment is only extracted
+once however often it is uploaded.
+"""
+
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+import io
+import json
+import threading
+from typing import BinaryIO
+import zipfile
+import zlib
+
+from streamlit_chat_input_fileupload.formats import extension, lookup
+
+# Default limits on the text taken from one attachment
+MAX_CHARS = 200_000
+CHUNK_CHARS = 16_000
+
+# Zip members larger than this are skipped (uncompressed bytes)
+MAX_MEMBER_BYTES = 10 * 1024 * 1024
+
+# Longest line read at once; longer lines (minified files) are split
+MAX_LINE_CHARS = 16_000
+
+# Raised by zipfile for corrupt, truncated, encrypted (RuntimeError) or
+# unsupported (NotImplementedError) bundles and members
+_ZIP_ERRORS = (zipfile.BadZipFile, zlib.error, EOFError, RuntimeError, NotImplementedError)
+
+
+class ExtractionError(ValueError):
+    """A file's text could not be read."""
+
+
+def is_extractable(name: str) -> bool:
+    """Whether a file is plain text that extract_text() can read."""
+    fmt = lookup(name)
+    return fmt is not None and fmt.is_text and fmt.supported
+
+
+def compact_lines(lines: Iterator[str]) -> Iterator[str]:
+    """Strip trailing whitespace, squeeze blank runs, fold repeated lines."""
+    previous = None
+    repeats = 0
+    blank = False
+    for raw in lines:
+        line = raw.rstrip()
+        if not line:
+            if not blank and previous is not None:
+                if repeats:
+                    yield f"[previous line repeated {repeats} more times]"
+                    repeats = 0
+                yield ""
+            blank = True
+            previous = None
+            continue
+        blank = False
+        if line == previous:
+            repeats += 1
+            continue
+        if repeats:
+            yield f"[previous line repeated {repeats} more times]"
+            repeats = 0
+        previous = line
+        yield line
+    if repeats:
+        yield f"[previous line repeated {repeats} more times]"
+
+
+def _text_lines(stream: BinaryIO) -> Iterator[str]:
+    # Decodes incrementally; undecodable bytes become U+FFFD
+    text = io.TextIOWrapper(stream, encoding="utf-8", errors="replace", newline=None)
+    return iter(lambda: text.readline(MAX_LINE_CHARS), "")
+
+
+def _json_lines(stream: BinaryIO, max_chars: int) -> Iterator[str]:
+    """JSON re-serialised without insignificant whitespace."""
+    raw = stream.read(max_chars * 4 + 1)
+    try:
+        if len(raw) > max_chars * 4:
+            raise ValueError("too large to re-serialise")
+        yield json.dumps(json.loads(raw), separators=(",", ":"), ensure_ascii=False)
+    except ValueError:
+        # Not valid JSON (or JSON lines) - fall back to the text itself
+        yield from compact_lines(_text_lines(io.BytesIO(raw)))
+
+
+def _zip_lines(stream: BinaryIO, max_chars: int) -> Iterator[str]:
+    """Text of the text members of a zip bundle, each under a header line.
+
+    Raises ExtractionError if the bundle or a member cannot be read.
+    """
+    try:
+        with zipfile.ZipFile(stream) as bundle:
+            for member in bundle.infolist():
+                if member.is_dir():
+                    continue
+                if not is_extractable(member.filename):
+                    yield f"=== {member.filename} (skipped: not a text file) ==="
+                    continue
+                if member.file_size > MAX_MEMBER_BYTES:
+                    yield f"=== {member.filename} (skipped: {member.file_size} bytes) ==="
+                    continue
+                yield f"=== {member.filename} ==="
+                with bundle.open(member) as fh:
+                    yield from _lines(fh, member.filename, max_chars)
+    except _ZIP_ERRORS as e:
+        raise ExtractionError(f"unreadable zip bundle ({e})") from e
+
+
+def _lines(stream: BinaryIO, name: str, max_chars: int) -> Iterator[str]:
+    ext = extension(name)
+    if ext == "json":
+        return _json_lines(stream, max_chars)
+    if ext == "zip":
+        return _zip_lines(stream, max_chars)
+    return compact_lines(_text_lines(stream))
+
+
+def extract_text(
+    stream: BinaryIO, name: str, max_chars: int = MAX_CHARS, chunk_chars: int = CHUNK_CHARS
+) -> list[str]:
+    """Compact text of a file as chunks of at most about chunk_chars.
+
+    The stream is read line by line and reading stops once max_chars of
+    text are collected. Chunks end at line boundaries where possible.
+    Raises ExtractionError for a corrupt zip bundle.
+    """
+    chunks = []
+    current: list[str] = []
+    current_chars = 0
+    total = 0
+    for line in _lines(stream, name, max_chars):
+        if total + len(line) > max_chars:
+            current.append(line[: max(0, max_chars - total)])
+            current.append("[... truncated]")
+            break
+        total += len(line) + 1
+        # Split very long lines (minified files) so no chunk grows unbounded
+        while len(line) > chunk_chars:
+            if current:
+                chunks.append("\n".join(current))
+                current, current_chars = [], 0
+            chunks.append(line[:chunk_chars])
+            line = line[chunk_chars:]
+        if current_chars + len(line) > chunk_chars and current:
+            chunks.append("\n".join(current))
+            current, current_chars = [], 0
+        current.append(line)
+        current_chars += len(line) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+class ExtractionCache:
+    """Extracted chunks by content key, least recently used evicted."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, list[str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> list[str] | None:
+        with self._lock:
+            chunks = self._entries.get(key)
+            if chunks is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return chunks
+
+    def put(self, key: str, chunks: list[str]) -> None:
+        with self._lock:
+            self._entries[key] = chunks
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Shared by all sessions
+cache = ExtractionCache()
+
+
+def extracted_text(
+    digest: str,
+    opener: Callable[[str], BinaryIO],
+    name: str,
+    max_chars: int = MAX_CHARS,
+    chunk_chars: int = CHUNK_CHARS,
+) -> list[str]:
+    """Memoized extract_text() of the attachment with the given digest.
+
+    opener is called with the digest to get a binary stream, typically
+    AttachmentStore.open. Extraction only runs on a cache miss.
+    """
+    # The extension picks the reader; the limits change the result
+    key = f"{digest}:{extension(name)}:{max_chars}:{chunk_chars}"
+    chunks = cache.get(key)
+    if chunks is None:
+        with opener(digest) as stream:
+            chunks = extract_text(stream, name, max_chars, chunk_chars)
+        cache.put(key, chunks)
+    return chunks
@@ -0,0 +1,250 @@
+"""Supported attachment formats, looked up by name, MIME type and content."""
+
+from dataclasses import dataclass
+from typing import Any
+
+# Bytes read from the start of a file to recognise its format
+SNIFF_BYTES = 16
+
+# A signature is a tuple of (offset, bytes) parts that must all match
+Signature = tuple[tuple[int, bytes], ...]
+
+_ZIP = ((0, b"PK\x03\x04"),)
+_OLE = ((0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"),)
+
+
+@dataclass(frozen=True)
+class Format:
+    """One attachment format.
+
+    Attributes
+    ----------
+    label : str
+        Name shown in rejection messages.
+    kind : str
+        "image" or "document", the Bedrock content block it is sent as,
+        or "extracted" for formats sent as text pulled out on the server
+        (see extraction.py).
+    bedrock : str or None
+        Bedrock image or document format; None for extracted formats.
+    mime_types : tuple of str
+        MIME types, the first one is canonical.
+    extensions : tuple of str
+        File name extensions, lower case without the dot.
+    magic : tuple of Signature
+        Alternative content signatures. Empty for text formats, whose
+        content is only checked for binary data.
+    """
+
+    label: str
+    kind: str
+    bedrock: str | None
+    mime_types: tuple[str, ...]
+    extensions: tuple[str, ...]
+    magic: tuple[Signature, ...] = ()
+
+    @property
+    def mime_type(self) -> str:
+        return self.mime_types[0]
+
+    @property
+    def is_text(self) -> bool:
+        return not self.magic
+
+    @property
+    def supported(self) -> bool:
+        return self.bedrock is not None or self.kind == "extracted"
+
+
+FORMATS = (
+    Format("PNG image", "image", "png", ("image/png",), ("png",), (((0, b"\x89PNG\r\n\x1a\n"),),)),
+    Format(
+        "JPEG image",
+        "image",
+        "jpeg",
+        ("image/jpeg", "image/jpg"),
+        ("jpg", "jpeg"),
+        (((0, b"\xff\xd8\xff"),),),
+    ),
+    Format(
+        "GIF image",
+        "image",
+        "gif",
+        ("image/gif",),
+        ("gif",),
+        (((0, b"GIF87a"),), ((0, b"GIF89a"),)),
+    ),
+    Format(
+        "WebP image", "image", "webp", ("image/webp",), ("webp",), (((0, b"RIFF"), (8, b"WEBP")),)
+    ),
+    Format("PDF document", "document", "pdf", ("application/pdf",), ("pdf",), (((0, b"%PDF-"),),)),
+    Format(
+        "Word document",
+        "document",
+        "docx",
+        ("application/vnd.openxmlformats-officedocument.wordprocessingml.document",),
+        ("docx",),
+        (_ZIP,),
+    ),
+    Format(
+        "Excel workbook",
+        "document",
+        "xlsx",
+        ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",),
+        ("xlsx",),
+        (_ZIP,),
+    ),
+    Format("Word 97 document", "document", "doc", ("application/msword",), ("doc",), (_OLE,)),
+    Format(
+        "Excel 97 workbook", "document", "xls", ("application/vnd.ms-excel",), ("xls",), (_OLE,)
+    ),
+    Format("text file", "document", "txt", ("text/plain",), ("txt",)),
+    Format("CSV file", "document", "csv", ("text/csv",), ("csv",)),
+    Format("Markdown file", "document", "md", ("text/markdown",), ("md", "markdown")),
+    Format("HTML file", "document", "html", ("text/html",), ("html", "htm")),
+    Format("JSON file", "extracted", None, ("application/json",), ("json",)),
+    Format("XML file", "extracted", None, ("application/xml", "text/xml"), ("xml",)),
+    Format("log file", "extracted", None, ("text/x-log",), ("log",)),
+    Format(
+        "source file",
+        "extracted",
+        None,
+        (
+            "text/x-python",
+            "text/javascript",
+            "application/javascript",
+            "application/typescript",
+            "text/x-java-source",
+            "text/x-c",
+            "text/x-sh",
+            "application/x-sh",
+            "application/sql",
+            "application/yaml",
+            "text/yaml",
+            "application/toml",
+            "text/css",
+        ),
+        (
+            "py",
+            "js",
+            "mjs",
+            "ts",
+            "tsx",
+            "jsx",
+            "java",
+            "kt",
+            "scala",
+            "c",
+            "h",
+            "cpp",
+            "hpp",
+            "cs",
+            "go",
+            "rs",
+            "rb",
+            "php",
+            "swift",
+            "r",
+            "sh",
+            "sql",
+            "yaml",
+            "yml",
+            "toml",
+            "ini",
+            "cfg",
+            "css",
+        ),
+    ),
+    Format(
+        "zip archive",
+        "extracted",
+        None,
+        ("application/zip", "application/x-zip-compressed"),
+        ("zip",),
+        (_ZIP,),
+    ),
+)
+
+BY_EXTENSION = {ext: fmt for fmt in FORMATS for ext in fmt.extensions}
+BY_MIME_TYPE = {mime_type: fmt for fmt in FORMATS for mime_type in fmt.mime_types}
+
+
+class FormatError(ValueError):
+    """A file is of an unsupported format or its content does not match its name."""
+
+
+def extension(file_name: str) -> str:
+    return file_name.rsplit(".", 1)[-1].lower() if "." in file_name else ""
+
+
+def lookup(file_name: str, mime_type: str = "") -> Format | None:
+    """Format claimed by a file name, falling back to its MIME type."""
+    return BY_EXTENSION.get(extension(file_name)) or BY_MIME_TYPE.get(mime_type)
+
+
+def _matches(head: bytes, signature: Signature) -> bool:
+    return all(head[offset : offset + len(magic)] == magic for offset, magic in signature)
+
+
+def sniff(head: bytes) -> Format | None:
+    """Binary format recognised from the first bytes of a file, if any.
+
+    Formats sharing a container (zip, OLE) resolve to the first of them.
+    """
+    for fmt in FORMATS:
+        if any(_matches(head, signature) for signature in fmt.magic):
+            return fmt
+    return None
+
+
+def check(file_name: str, mime_type: str, head: bytes) -> Format:
+    """Format of a file whose content matches its name or MIME type.
+
+    head holds the first SNIFF_BYTES bytes. Raises FormatError for
+    unsupported formats and for content that belongs to another format.
+    """
+    claimed = lookup(file_name, mime_type)
+    if claimed is None or not claimed.supported:
+        raise FormatError("unsupported format")
+    sniffed = sniff(head)
+    if sniffed is not None:
+        if sniffed.magic != claimed.magic:
+            raise FormatError(f"content is a {sniffed.label}, not a {claimed.label}")
+    elif not claimed.is_text:
+        raise FormatError(f"not a valid {claimed.label}")
+    elif b"\x00" in head:
+        raise FormatError(f"binary content in a {claimed.label}")
+    return claimed
+
+
+def get_media_type(file_type: str, file_name: str) -> str:
+    """Determine media type from file type or extension."""
+    if file_type:
+        return file_type
+    fmt = BY_EXTENSION.get(extension(file_name))
+    return fmt.mime_type if fmt else "application/octet-stream"
+
+
+def get_bedrock_doc_format(file_name: str, mime_type: str) -> str | None:
+    """Map file extension/MIME type to Bedrock document format.
+
+    Bedrock supports: docx, csv, html, txt, pdf, md, doc, xlsx, xls
+    """
+    fmt = lookup(file_name, mime_type)
+    return fmt.bedrock if fmt is not None and fmt.kind == "document" else None
+
+
+def browser_formats() -> list[dict[str, Any]]:
+    """The supported formats in the shape the component's JavaScript checks."""
+    return [
+        {
+            "label": fmt.label,
+            "extensions": list(fmt.extensions),
+            "mimeTypes": list(fmt.mime_types),
+            "magic": [
+                [[offset, list(magic)] for offset, magic in signature] for signature in fmt.magic
+            ],
+        }
+        for fmt in FORMATS
+        if fmt.supported
+    ]
@@ -0,0 +1,81 @@
+"""Chat history rendering whose cost does not grow with the conversation.
+
+A rerun renders only the newest messages; earlier ones are paged in on
+request. Paging reruns the history fragment, not the whole script.
+"""
+
+from collections.abc import Sequence
+
+import streamlit as st
+
+from streamlit_chat_input_fileupload.records import (
+    Block,
+    DocumentBlock,
+    ImageBlock,
+    Message,
+    TextBlock,
+)
+
+
+def message_items(content: Sequence[Block]) -> list[tuple[str, str]]:
+    """What a message shows, as ("markdown" or "caption", text) pairs."""
+    items = []
+    for block in content:
+        if isinstance(block, TextBlock):
+            if block.file is not None:
+                items.append(("caption", f"[File: {block.file.name}]"))
+            else:
+                items.append(("markdown", block.text))
+        elif isinstance(block, ImageBlock):
+            items.append(("caption", f"[Image: {block.name or 'attached'}]"))
+        elif isinstance(block, DocumentBlock):
+            items.append(("caption", f"[Document: {block.name or 'attached'}]"))
+    return items
+
+
+def render_message(message: Message) -> None:
+    with st.chat_message(message.role):
+        for element, text in message_items(message.content):
+            if element == "caption":
+                st.caption(text)
+            else:
+                st.markdown(text)
+
+
+def _show_more(key: str, page_size: int, shown: int) -> None:
+    st.session_state[key] = shown + page_size
+
+
+@st.fragment
+def render_history(
+    messages: Sequence[Message],
+    visible: int = 20,
+    page_size: int = 20,
+    key: str = "history_shown",
+) -> None:
+    """Render the newest messages of the chat history.
+
+    Parameters
+    ----------
+    messages : sequence of records.Message
+        Messages, oldest first.
+    visible : int
+        Messages shown until the user asks for more.
+    page_size : int
+        Messages added each time "Show earlier messages" is clicked.
+    key : str
+        Session state key holding the number of messages shown; delete it
+        to go back to showing ``visible`` messages.
+    """
+    shown = st.session_state.get(key, visible)
+    hidden = max(0, len(messages) - shown)
+    if hidden:
+        st.button(
+            f"Show earlier messages ({hidden} hidden)",
+            key=f"{key}_more",
+            on_click=_show_more,
+            args=(key, page_size, shown),
+            type="tertiary",
+        )
+    for message in messages[hidden:]:
+        render_message(message)
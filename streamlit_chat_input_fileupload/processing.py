@@ -0,0 +1,164 @@
+"""Decoding, checking and storing uploaded files off the script thread."""
+
+import base64
+import binascii
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+import os
+import threading
+from typing import Any
+
+from streamlit_chat_input_fileupload.attachments import AttachmentStore
+from streamlit_chat_input_fileupload.content import discard_file, file_blocks
+from streamlit_chat_input_fileupload.extraction import ExtractionError
+from streamlit_chat_input_fileupload.formats import SNIFF_BYTES, FormatError, check
+from streamlit_chat_input_fileupload.uploads import should_spool, spool_base64
+
+
+class FileProcessingError(ValueError):
+    """An uploaded file failed validation."""
+
+    def __init__(self, name: str, reason: str):
+        super().__init__(f"{name}: {reason}")
+        self.name = name
+        self.reason = reason
+
+
+def decode_file(file_info: dict[str, Any], spool_threshold: int | None = None) -> dict[str, Any]:
+    """Decode and check one submitted file.
+
+    An 'encoded' base64 payload is decoded into 'data': bytes, or with
+    spool_threshold a file object (uploads.spool_base64()) for payloads
+    decoding to more than spool_threshold bytes. The received size must
+    match the declared size, and the leading bytes must match the
+    supported format the name or type claims (formats.check()). The type
+    is set to the format's canonical MIME type. Raises FileProcessingError.
+    """
+    name = file_info.get("name", "")
+    file_info = dict(file_info)
+    if "encoded" in file_info:
+        encoded = file_info.pop("encoded")
+        try:
+            if should_spool(encoded, spool_threshold):
+                file_info["data"] = spool_base64(encoded, spool_threshold, validate=True)
+            else:
+                file_info["data"] = base64.b64decode(encoded, validate=True)
+        except binascii.Error as e:
+            raise FileProcessingError(name, "invalid base64 payload") from e
+
+    data = file_info.get("data", b"")
+    try:
+        if "path" in file_info:
+            size = os.path.getsize(file_info["path"])
+            with open(file_info["path"], "rb") as fh:
+                head = fh.read(SNIFF_BYTES)
+        elif hasattr(data, "read"):
+            size = data.seek(0, os.SEEK_END)
+            data.seek(0)
+            head = data.read(SNIFF_BYTES)
+            data.seek(0)
+        else:
+            size = len(data)
+            head = data[:SNIFF_BYTES]
+
+        declared = int(file_info.get("size") or 0)
+        if declared and size != declared:
+            raise FileProcessingError(name, f"expected {declared} bytes, received {size}")
+        file_info["size"] = size
+
+        try:
+            fmt = check(name, file_info.get("type") or "", head)
+        except FormatError as e:
+            raise FileProcessingError(name, str(e)) from e
+    except FileProcessingError:
+        discard_file(file_info)
+        raise
+    file_info["type"] = fmt.mime_type
+    return file_info
+
+
+def process_file(
+    file_info: dict[str, Any],
+    store: AttachmentStore,
+    cache_min_tokens: int | None = None,
+    extract_documents: bool = False,
+    spool_threshold: int | None = None,
+) -> list[dict[str, Any]]:
+    """Decode, check and store one file; returns its content blocks."""
+    file_info = decode_file(file_info, spool_threshold)
+    try:
+        return file_blocks(file_info, store, cache_min_tokens, extract_documents)
+    except ExtractionError as e:
+        raise FileProcessingError(file_info.get("name", ""), str(e)) from e
+
+
+class FileProcessor:
+    """Worker pool turning submitted files into content blocks.
+
+    submit() returns a Future for the file's content blocks, so the
+    script can render while files are decoded, sniffed, validated and
+    hashed into the attachment store. At most max_pending files are
+    queued or in progress; submit() waits for a free slot beyond that.
+
+    Parameters
+    ----------
+    store : AttachmentStore
+        Store receiving the file bytes.
+    max_workers : int
+        Worker threads, used when no executor is given.
+    max_pending : int
+        Bound of the queue of files not yet processed.
+    executor : Executor or None
+        Pool to run on instead, e.g. a ProcessPoolExecutor. The store must
+        then be usable from the worker processes (blobs on disk).
+    extract_documents : bool
+        Send plain text documents as extracted text, see
+        content.build_content_block().
+    spool_threshold : int or None
+        Files larger than this are decoded into a temporary file instead
+        of memory, see decode_file(). None decodes every file in memory.
+    """
+
+    def __init__(
+        self,
+        store: AttachmentStore,
+        max_workers: int = 4,
+        max_pending: int = 16,
+        executor: Executor | None = None,
+        extract_documents: bool = False,
+        spool_threshold: int | None = None,
+    ):
+        self.store = store
+        self.max_pending = max_pending
+        self.extract_documents = extract_documents
+        self.spool_threshold = spool_threshold
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="file-processing"
+        )
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def submit(
+        self,
+        file_info: dict[str, Any],
+        cache_min_tokens: int | None = None,
+        timeout: float | None = None,
+    ) -> Future:
+        """Queue a file. Raises TimeoutError if no slot frees up in time."""
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("File processing queue is full.")
+        try:
+            future = self._executor.submit(
+                process_file,
+                file_info,
+                self.store,
+                cache_min_tokens,
+                self.extract_documents,
+                self.spool_threshold,
+            )
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,139 @@
+"""Chat history as compact records instead of nested dicts.
+
+Messages and content blocks are slotted dataclasses, converted once from
+the content dicts built by content.build_content_block() when a message is
+added to the conversation. to_api() gives the Converse API shape of a
+record; text strings and attachment bytes (as returned by the attachment
+store) are referenced, not copied.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from streamlit_chat_input_fileupload.context import PLACEHOLDER
+
+
+@dataclass(frozen=True, slots=True)
+class FileRef:
+    """Uploaded file in the attachment store."""
+
+    name: str
+    ref: str
+    size: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class TextBlock:
+    """Text; with file, the extracted text of that uploaded file."""
+
+    text: str
+    file: FileRef | None = None
+
+    @property
+    def attachment(self) -> bool:
+        return self.file is not None
+
+    @property
+    def name(self) -> str:
+        return self.file.name if self.file is not None else ""
+
+    def to_api(self, resolve: Callable[[str], bytes]) -> dict[str, Any]:
+        return {"text": self.text}
+
+
+@dataclass(frozen=True, slots=True)
+class ImageBlock:
+    """Image whose bytes are in the attachment store under ref."""
+
+    format: str
+    ref: str
+    name: str = ""
+    size: int = 0
+
+    attachment = True
+
+    def to_api(self, resolve: Callable[[str], bytes]) -> dict[str, Any]:
+        return {"image": {"format": self.format, "source": {"bytes": resolve(self.ref)}}}
+
+
+@dataclass(frozen=True, slots=True)
+class DocumentBlock:
+    """Document whose bytes are in the attachment store under ref."""
+
+    format: str
+    name: str
+    ref: str
+    size: int = 0
+
+    attachment = True
+
+    def to_api(self, resolve: Callable[[str], bytes]) -> dict[str, Any]:
+        return {
+            "document": {
+                "format": self.format,
+                "name": self.name,
+                "source": {"bytes": resolve(self.ref)},
+            }
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class CachePoint:
+    """Bedrock prompt cache checkpoint."""
+
+    type: str = "default"
+
+    attachment = False
+    name = ""
+
+    def to_api(self, resolve: Callable[[str], bytes]) -> dict[str, Any]:
+        return {"cachePoint": {"type": self.type}}
+
+
+Block = TextBlock | ImageBlock | DocumentBlock | CachePoint
+
+
+@dataclass(frozen=True, slots=True)
+class Message:
+    """One chat message: role and content blocks, oldest first."""
+
+    role: str
+    content: tuple[Block, ...]
+
+    def to_api(self, resolve: Callable[[str], bytes]) -> dict[str, Any]:
+        """Converse API message, attachment references resolved with resolve."""
+        return {"role": self.role, "content": [block.to_api(resolve) for block in self.content]}
+
+
+def block_from_dict(block: dict[str, Any]) -> Block:
+    """Record of a content block in the shape content.py builds."""
+    if "image" in block:
+        image = block["image"]
+        return ImageBlock(
+            image["format"], image["source"]["ref"], image.get("name", ""), image.get("size", 0)
+        )
+    if "document" in block:
+        document = block["document"]
+        return DocumentBlock(
+            document["format"],
+            document["name"],
+            document["source"]["ref"],
+            document.get("size", 0),
+        )
+    if "cachePoint" in block:
+        return CachePoint(block["cachePoint"].get("type", "default"))
+    file = block.get("file")
+    if file is None:
+        return TextBlock(block["text"])
+    return TextBlock(block["text"], FileRef(file["name"], file["ref"], file.get("size", 0)))
+
+
+def message_from_dicts(role: str, content: list[dict[str, Any]]) -> Message:
+    return Message(role, tuple(block_from_dict(block) for block in content))
+
+
+def placeholder(block: Block) -> dict[str, Any]:
+    """Converse API text block standing in for a dropped attachment."""
+    kind = {ImageBlock: "image", DocumentBlock: "document"}.get(type(block), "file")
+    return {"text": PLACEHOLDER.format(name=block.name or kind)}
@@ -0,0 +1,305 @@
+"""Cache of model replies for identical requests, in memory or in SQLite.
+
+A request is identified by request_key(): a SHA-256 over the model ID, the
+inference config (and any other request field) and the messages, with
+text stripped of surrounding whitespace, cachePoint blocks left out and
+attachment bytes replaced by their SHA-256.
+CachedBackend puts a cache in front of a model backend. Only complete
+replies (stop reason end_turn) are stored; entries expire after ttl_s
+seconds, and the least recently used are evicted beyond max_bytes.
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Iterator
+import hashlib
+import json
+import os
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from streamlit_chat_input_fileupload.backends import LLMBackend
+
+RESPONSE_CACHES = ("memory", "sqlite")
+
+
+def _normalize_block(block: dict[str, Any]) -> dict[str, Any] | None:
+    if "cachePoint" in block:
+        return None
+    if "text" in block:
+        return {"text": block["text"].strip()}
+    for kind in ("image", "document"):
+        if kind in block and "bytes" in block[kind].get("source", {}):
+            source = {"sha256": hashlib.sha256(block[kind]["source"]["bytes"]).hexdigest()}
+            return {kind: {**block[kind], "source": source}}
+    return block
+
+
+def request_key(request: dict[str, Any]) -> str:
+    """Cache key of a converse / converse_stream request."""
+    normalized = {key: value for key, value in request.items() if key != "messages"}
+    normalized["messages"] = [
+        {
+            "role": message["role"],
+            "content": [
+                block for block in map(_normalize_block, message["content"]) if block is not None
+            ],
+        }
+        for message in request.get("messages", [])
+    ]
+    payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache(ABC):
+    """Cached replies by request key, with hit and miss counters.
+
+    A reply is a dict with 'text', 'stopReason' and 'usage'. Subclasses
+    store the replies: _load(), put() and __len__().
+    """
+
+    def __init__(self, ttl_s: float = 24 * 3600, max_bytes: int = 32 * 1024 * 1024):
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def _load(self, key: str) -> dict[str, Any] | None:
+        """Unexpired reply stored under key, or None."""
+
+    @abstractmethod
+    def put(self, key: str, reply: dict[str, Any]) -> None:
+        """Store a reply, evicting beyond max_bytes."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of stored replies."""
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        reply = self._load(key)
+        with self._lock:
+            if reply is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return reply
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
+
+
+class MemoryResponseCache(ResponseCache):
+    """Replies held in this process, least recently used evicted."""
+
+    def __init__(self, ttl_s: float = 24 * 3600, max_bytes: int = 32 * 1024 * 1024):
+        super().__init__(ttl_s, max_bytes)
+        # key -> (expiry time, size, reply)
+        self._entries: OrderedDict[str, tuple[float, int, dict[str, Any]]] = OrderedDict()
+        self._bytes = 0
+
+    def _load(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._entries[key]
+                self._bytes -= entry[1]
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def put(self, key: str, reply: dict[str, Any]) -> None:
+        size = len(json.dumps(reply))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (time.time() + self.ttl_s, size, reply)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Replies in a SQLite file, shared by the processes using the same path."""
+
+    def __init__(
+        self, path: str | os.PathLike, ttl_s: float = 24 * 3600, max_bytes: int = 32 * 1024 * 1024
+    ):
+        super().__init__(ttl_s, max_bytes)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, reply TEXT NOT NULL, size INTEGER NOT NULL, "
+            "expires REAL NOT NULL, used REAL NOT NULL)"
+        )
+
+    def _load(self, key: str) -> dict[str, Any] | None:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT reply FROM responses WHERE key = ? AND expires > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, reply: dict[str, Any]) -> None:
+        data = json.dumps(reply)
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                    (key, data, len(data), now + self.ttl_s, now),
+                )
+                self._db.execute("DELETE FROM responses WHERE expires <= ?", (now,))
+                total = self._db.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()[0]
+                if total > self.max_bytes:
+                    rows = self._db.execute("SELECT key, size FROM responses ORDER BY used")
+                    evict = []
+                    for old_key, size in rows:
+                        if total <= self.max_bytes:
+                            break
+                        evict.append((old_key,))
+                        total -= size
+                    self._db.executemany("DELETE FROM responses WHERE key = ?", evict)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+def create_response_cache(
+    kind: str | None,
+    ttl_s: float = 24 * 3600,
+    max_bytes: int = 32 * 1024 * 1024,
+    path: str | os.PathLike | None = None,
+) -> ResponseCache | None:
+    """Cache of the given kind ("memory" or "sqlite" at path), None for no cache."""
+    if not kind:
+        return None
+    if kind == "memory":
+        return MemoryResponseCache(ttl_s, max_bytes)
+    if kind == "sqlite":
+        if path is None:
+            raise ValueError("the sqlite response cache needs a path")
+        return SQLiteResponseCache(path, ttl_s, max_bytes)
+    raise ValueError(f"response cache must be one of {RESPONSE_CACHES}, got {kind!r}")
+
+
+def _replayed_usage(reply: dict[str, Any]) -> dict[str, int]:
+    """Usage of a reply served from the cache: the stored counters, all zero.
+
+    No tokens are billed for a hit, so the turn statistics must not count
+    the tokens of the original call, prompt cache reads and writes included.
+    """
+    return dict.fromkeys(reply["usage"], 0)
+
+
+def _replay_events(reply: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield {"messageStart": {"role": "assistant"}}
+    yield {"contentBlockStart": {"contentBlockIndex": 0, "start": {}}}
+    yield {"contentBlockDelta": {"contentBlockIndex": 0, "delta": {"text": reply["text"]}}}
+    yield {"contentBlockStop": {"contentBlockIndex": 0}}
+    yield {"messageStop": {"stopReason": reply["stopReason"]}}
+    yield {"metadata": {"usage": _replayed_usage(reply), "metrics": {"latencyMs": 0}}}
+
+
+class _RecordingStream:
+    """converse_stream event stream that stores a complete reply in the cache."""
+
+    def __init__(self, events: Any, cache: ResponseCache, key: str):
+        self.events = events
+        self.cache = cache
+        self.key = key
+        self._closed = False
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        chunks = []
+        stop_reason = None
+        usage: dict[str, int] = {}
+        for event in self.events:
+            if "contentBlockDelta" in event:
+                chunks.append(event["contentBlockDelta"].get("delta", {}).get("text", ""))
+            elif "messageStop" in event:
+                stop_reason = event["messageStop"].get("stopReason")
+            elif "metadata" in event:
+                usage = event["metadata"].get("usage", {})
+            yield event
+        if stop_reason == "end_turn" and not self._closed:
+            self.cache.put(
+                self.key, {"text": "".join(chunks), "stopReason": stop_reason, "usage": usage}
+            )
+
+    def close(self) -> None:
+        self._closed = True
+        close = getattr(self.events, "close", None)
+        if close is not None:
+            close()
+
+
+class CachedBackend:
+    """Model backend answering repeated requests from a ResponseCache.
+
+    Misses go to backend; hits are replayed in the backend's response
+    shape, a streamed hit as a single text delta, with zero usage.
+    metrics() adds the cache's hit and miss counters to the backend's
+    metrics.
+    """
+
+    def __init__(self, backend: LLMBackend, cache: ResponseCache):
+        self.backend = backend
+        self.cache = cache
+
+    def converse(self, **request: Any) -> dict[str, Any]:
+        key = request_key(request)
+        reply = self.cache.get(key)
+        if reply is None:
+            response = self.backend.converse(**request)
+            if response.get("stopReason") == "end_turn":
+                text = response["output"]["message"]["content"][0]["text"]
+                usage = response.get("usage", {})
+                self.cache.put(key, {"text": text, "stopReason": "end_turn", "usage": usage})
+            return response
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": reply["text"]}]}},
+            "stopReason": reply["stopReason"],
+            "usage": _replayed_usage(reply),
+        }
+
+    def converse_stream(self, **request: Any) -> dict[str, Any]:
+        key = request_key(request)
+        reply = self.cache.get(key)
+        if reply is None:
+            response = self.backend.converse_stream(**request)
+            return {**response, "stream": _RecordingStream(response["stream"], self.cache, key)}
+        return {"stream": _replay_events(reply)}
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            **self.backend.metrics(),
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+        }
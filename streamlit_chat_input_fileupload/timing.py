@@ -0,0 +1,185 @@
+"""Timing spans of a chat turn, logged in OpenTelemetry (OTLP/JSON) form.
+
+Server stages are timed with time.perf_counter() and placed on the wall
+clock through an anchor taken at import. Browser stages arrive as Unix
+milliseconds in the component's trigger payload, so they are only as
+accurate as the two clocks agree. A finished turn is logged to this
+module's logger as one OTLP/JSON ExportTraceServiceRequest per line, the
+format read by the OpenTelemetry Collector's otlpjsonfile receiver.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import json
+import logging
+import secrets
+import time
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "streamlit-chat-input-fileupload"
+
+# perf_counter() and the wall clock read at (nearly) the same moment
+_ANCHOR_NS = time.time_ns()
+_ANCHOR_PERF = time.perf_counter()
+
+
+def wall_ns(perf: float) -> int:
+    """Unix time in nanoseconds of a time.perf_counter() reading."""
+    return _ANCHOR_NS + round((perf - _ANCHOR_PERF) * 1e9)
+
+
+def _span_id() -> str:
+    return secrets.token_hex(8)
+
+
+@dataclass
+class Span:
+    """One timed stage of a turn; start and end are Unix nanoseconds."""
+
+    name: str
+    start_ns: int
+    end_ns: int
+    attributes: dict[str, Any] = field(default_factory=dict)
+    span_id: str = field(default_factory=_span_id)
+
+    @classmethod
+    def timed(cls, name: str, start: float, end: float | None = None, **attributes: Any) -> "Span":
+        """Span between two perf_counter() readings, ending now by default."""
+        end = time.perf_counter() if end is None else end
+        return cls(name, wall_ns(start), wall_ns(end), attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+def _ms_to_ns(value: Any) -> int | None:
+    if isinstance(value, bool) or not isinstance(value, int | float) or value <= 0:
+        return None
+    return round(value * 1e6)
+
+
+def browser_spans(timings: Any, received_ns: int) -> list[Span]:
+    """Spans for the browser timings sent with a chat input message.
+
+    timings is the 'timings' object of the trigger payload: 'sentAt' and
+    per file 'readStart' / 'readEnd' as Unix milliseconds, 'payloadBytes'
+    and optionally 'heldMs', the time the message waited for attachments,
+    and 'interactiveMs', how long the input took to become interactive
+    after the previous run.
+    Malformed entries are skipped; the payload comes from the browser.
+    """
+    if not isinstance(timings, dict):
+        return []
+    spans = []
+    for file in timings.get("files") or []:
+        if not isinstance(file, dict):
+            continue
+        start, end = _ms_to_ns(file.get("readStart")), _ms_to_ns(file.get("readEnd"))
+        if start is None or end is None or end < start:
+            continue
+        attributes = {"file.name": str(file.get("name", "")), "file.size": file.get("size", 0)}
+        if _ms_to_ns(file.get("resizeMs")) is not None:
+            attributes["file.resize_ms"] = float(file["resizeMs"])
+        spans.append(Span("browser.read", start, end, attributes))
+
+    sent = _ms_to_ns(timings.get("sentAt"))
+    if sent is not None:
+        attributes = {"payload.bytes": timings.get("payloadBytes", 0)}
+        if _ms_to_ns(timings.get("heldMs")) is not None:
+            attributes["message.held_ms"] = float(timings["heldMs"])
+        if _ms_to_ns(timings.get("interactiveMs")) is not None:
+            attributes["input.interactive_ms"] = float(timings["interactiveMs"])
+        # Websocket transfer and the wait for the script run that reads it
+        spans.append(Span("browser.send", sent, max(sent, received_ns), attributes))
+    return spans
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # 64-bit integers are strings in OTLP/JSON
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+class TurnTrace:
+    """Spans of one chat turn under a root span.
+
+    Stages are timed with span(), or added as finished Span objects (e.g.
+    browser_spans()). finish() closes the root span, which then covers all
+    stages, and export() logs the trace.
+    """
+
+    def __init__(self, name: str = "chat.turn", **attributes: Any):
+        self.trace_id = secrets.token_hex(16)
+        now = wall_ns(time.perf_counter())
+        self.root = Span(name, now, now, attributes)
+        self.spans: list[Span] = []
+
+    def add(self, *spans: Span) -> None:
+        self.spans.extend(spans)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Time the enclosed block; attributes may be added to the span inside."""
+        span = Span(name, wall_ns(time.perf_counter()), 0, attributes)
+        try:
+            yield span
+        finally:
+            span.end_ns = wall_ns(time.perf_counter())
+            self.spans.append(span)
+
+    def finish(self, **attributes: Any) -> None:
+        self.root.attributes.update(attributes)
+        self.root.start_ns = min([self.root.start_ns, *(s.start_ns for s in self.spans)])
+        self.root.end_ns = max([wall_ns(time.perf_counter()), *(s.end_ns for s in self.spans)])
+
+    def durations(self) -> dict[str, float]:
+        """Milliseconds per stage name, summed over repeated stages, and in total."""
+        durations: dict[str, float] = {}
+        for span in self.spans:
+            durations[span.name] = durations.get(span.name, 0.0) + span.duration_ms
+        durations[self.root.name] = self.root.duration_ms
+        return durations
+
+    def to_otlp(self) -> dict[str, Any]:
+        """The trace as an OTLP/JSON ExportTraceServiceRequest."""
+
+        def otlp_span(span: Span, parent: str = "") -> dict[str, Any]:
+            return {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "parentSpanId": parent,
+                "name": span.name,
+                # SPAN_KIND_INTERNAL
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": _otlp_attributes(span.attributes),
+            }
+
+        spans = [otlp_span(self.root)]
+        spans += [otlp_span(span, self.root.span_id) for span in self.spans]
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": _otlp_attributes({"service.name": SERVICE_NAME})},
+                    "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+                }
+            ]
+        }
+
+    def export(self) -> None:
+        """Log the trace as one line of OTLP/JSON."""
+        logger.info("%s", json.dumps(self.to_otlp(), separators=(",", ":")))
@@ -0,0 +1,188 @@
+"""Server-side spool for chunked, resumable file uploads."""
+
+import base64
+import hashlib
+import os
+from pathlib import Path
+import tempfile
+import threading
+import time
+from typing import Any, BinaryIO
+
+# Default location of partially and fully received uploads
+SPOOL_DIR = Path(tempfile.gettempdir()) / "streamlit_chat_uploads"
+
+# Partial uploads untouched for this long are discarded by prune()
+STALE_AFTER_S = 3600
+
+# Base64 characters decoded at a time by spool_base64() (a multiple of 4)
+_DECODE_CHARS = 1024 * 1024
+
+
+def spool_base64(encoded: str, max_size: int, validate: bool = False) -> BinaryIO:
+    """Decode a base64 payload into a SpooledTemporaryFile, a block at a time.
+
+    Up to max_size bytes stay in memory; beyond that the file rolls over to
+    an unnamed temporary file, removed as soon as the file object is closed
+    or garbage collected, e.g. with the session holding it. Returned
+    rewound. Raises binascii.Error for an invalid payload with validate.
+    """
+    # max_size=0 would mean never rolling over
+    spool = tempfile.SpooledTemporaryFile(max_size=max(max_size, 1))  # noqa: SIM115
+    try:
+        for start in range(0, len(encoded), _DECODE_CHARS):
+            block = encoded[start : start + _DECODE_CHARS]
+            spool.write(base64.b64decode(block, validate=validate))
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def should_spool(encoded: str, spool_threshold: int | None) -> bool:
+    """Whether a base64 payload decodes to more than spool_threshold bytes."""
+    return spool_threshold is not None and len(encoded) // 4 * 3 > spool_threshold
+
+
+class ChunkedUpload:
+    """A single upload being assembled in a spool file.
+
+    Chunks must arrive in order: a chunk is accepted only when its offset
+    matches the number of bytes already committed. Anything else is ignored
+    and the caller gets the committed offset back, which is what the browser
+    resumes from.
+    """
+
+    def __init__(
+        self,
+        upload_id: str,
+        name: str,
+        mime_type: str,
+        size: int,
+        path: Path,
+        original_size: int | None = None,
+    ):
+        self.upload_id = upload_id
+        self.name = name
+        self.type = mime_type
+        self.size = size
+        self.original_size = size if original_size is None else original_size
+        self.path = path
+        self.offset = 0
+        self.updated = time.monotonic()
+        self._hasher = hashlib.sha256()
+        self._lock = threading.Lock()
+
+    @property
+    def complete(self) -> bool:
+        return self.offset >= self.size
+
+    def write(self, offset: int, chunk: bytes) -> int:
+        """Append a chunk at the given offset and return the committed offset."""
+        with self._lock:
+            if offset != self.offset or self.complete:
+                return self.offset
+            if self.offset + len(chunk) > self.size:
+                chunk = chunk[: self.size - self.offset]
+            with open(self.path, "ab") as fh:
+                fh.write(chunk)
+            self._hasher.update(chunk)
+            self.offset += len(chunk)
+            self.updated = time.monotonic()
+            return self.offset
+
+    def result(self) -> dict[str, Any]:
+        """File dict for a completed upload, pointing at the spool file."""
+        return {
+            "name": self.name,
+            "type": self.type,
+            "size": self.offset,
+            "original_size": self.original_size,
+            "path": self.path,
+            "sha256": self._hasher.hexdigest(),
+        }
+
+
+class UploadRegistry:
+    """Process-wide registry of in-flight chunked uploads.
+
+    Upload IDs are generated by the browser from a per-browser random token
+    and the file fingerprint, so picking the same file again after an
+    interruption resumes the existing spool file instead of starting over.
+    """
+
+    def __init__(self, spool_dir: Path | None = None):
+        self.spool_dir = Path(spool_dir or SPOOL_DIR)
+        self._uploads: dict[str, ChunkedUpload] = {}
+        self._lock = threading.Lock()
+
+    def begin(
+        self,
+        upload_id: str,
+        name: str,
+        mime_type: str,
+        size: int,
+        original_size: int | None = None,
+        max_size: int | None = None,
+    ) -> ChunkedUpload:
+        """Start a new upload or return the existing one with the same ID.
+
+        Raises ValueError when size is negative or above max_size, before
+        anything is written to the spool directory.
+        """
+        if size < 0:
+            raise ValueError(f"invalid upload size {size}")
+        if max_size is not None and size > max_size:
+            raise ValueError(f"{size} bytes exceeds the {max_size} byte upload limit")
+        with self._lock:
+            upload = self._uploads.get(upload_id)
+            if upload is not None:
+                if upload.size == size:
+                    return upload
+                # Same ID, different file: its partial spool file is useless
+                upload.path.unlink(missing_ok=True)
+            self.spool_dir.mkdir(parents=True, exist_ok=True)
+            fd, path = tempfile.mkstemp(prefix="upload-", suffix=".part", dir=self.spool_dir)
+            os.close(fd)
+            upload = ChunkedUpload(
+                upload_id, name, mime_type, size, Path(path), original_size=original_size
+            )
+            self._uploads[upload_id] = upload
+            return upload
+
+    def get(self, upload_id: str) -> ChunkedUpload | None:
+        return self._uploads.get(upload_id)
+
+    def finish(self, upload_id: str) -> dict[str, Any] | None:
+        """Remove a completed upload from the registry and return its file dict.
+
+        The spool file is handed over to the caller, who is responsible for
+        deleting it. Incomplete or unknown uploads return None.
+        """
+        with self._lock:
+            upload = self._uploads.get(upload_id)
+            if upload is None or not upload.complete:
+                return None
+            del self._uploads[upload_id]
+        return upload.result()
+
+    def discard(self, upload_id: str) -> None:
+        """Drop an upload and delete its spool file."""
+        with self._lock:
+            upload = self._uploads.pop(upload_id, None)
+        if upload is not None:
+            upload.path.unlink(missing_ok=True)
+
+    def prune(self, max_age: float = STALE_AFTER_S) -> int:
+        """Discard uploads that have not received a chunk for max_age seconds."""
+        cutoff = time.monotonic() - max_age
+        with self._lock:
+            stale = [uid for uid, upload in self._uploads.items() if upload.updated < cutoff]
+        for upload_id in stale:
+            self.discard(upload_id)
+        return len(stale)
+
+
+# Shared by every session of the server process
+registry = UploadRegistry()
@@ -0,0 +1,31 @@
+"""Stand-ins for the Bedrock streaming API shared by the test modules."""
+
+
+def fake_events(*texts, stop_reason="end_turn", usage=None):
+    """Build a converse_stream event sequence replying with the given texts."""
+    events = [
+        {"messageStart": {"role": "assistant"}},
+        {"contentBlockStart": {"contentBlockIndex": 0, "start": {}}},
+    ]
+    events += [
+        {"contentBlockDelta": {"contentBlockIndex": 0, "delta": {"text": text}}} for text in texts
+    ]
+    events += [
+        {"contentBlockStop": {"contentBlockIndex": 0}},
+        {"messageStop": {"stopReason": stop_reason}},
+    ]
+    if usage is not None:
+        events.append({"metadata": {"usage": usage, "metrics": {"latencyMs": 10}}})
+    return events
+
+
+class FakeStreamingClient:
+    """Local stand-in for a bedrock-runtime client."""
+
+    def __init__(self, events):
+        self.events = events
+        self.requests = []
+
+    def converse_stream(self, **request):
+        self.requests.append(request)
+        return {"stream": iter(self.events)}
@@ -0,0 +1,66 @@
+"""Tests for app.py under AppTest, with the chat input and model backend stubbed."""
+
+import json
+import logging
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+from streamlit_chat_input_fileupload.backends import FakeBackend
+from streamlit_chat_input_fileupload.calls import CallPool
+from streamlit_chat_input_fileupload.records import TextBlock
+
+# app.py with the chat input and the model backend taken from session state
+CHAT_APP = str(Path(__file__).parent.parent / "benchmarks" / "chat_app.py")
+
+
+def exported_spans(caplog) -> list[str]:
+    """Names of the spans in the turn traces logged so far."""
+    return [
+        span["name"]
+        for record in caplog.records
+        if record.name == "streamlit_chat_input_fileupload.timing"
+        for resource in json.loads(record.getMessage())["resourceSpans"]
+        for scope in resource["scopeSpans"]
+        for span in scope["spans"]
+    ]
+
+
+class TestStreamReply:
+    """Tests for rendering a reply in progress."""
+
+    def test_reply_streamed_in_one_run(self, caplog):
+        """Test that a reply is streamed and added to the history in a single run."""
+        tokens = 12
+        backend = FakeBackend("word " * tokens, first_token_s=0, token_s=0.05)
+        at = AppTest.from_file(CHAT_APP, default_timeout=30)
+        at.session_state["bench_client"] = backend
+        at.session_state["bench_submission"] = {"text": "Hello", "files": []}
+
+        with caplog.at_level(logging.INFO, logger="streamlit_chat_input_fileupload.timing"):
+            at.run()
+
+        assert not at.exception
+        assert at.session_state.pending_call is None
+        assert at.session_state.conversation.messages[-1].content == (TextBlock("word " * tokens),)
+        assert exported_spans(caplog).count("reply.stream") == 1
+
+    def test_stop_ends_reply(self):
+        """Test that Stop cancels the reply in progress and keeps what arrived so far."""
+        at = AppTest.from_file(CHAT_APP, default_timeout=30)
+        at.session_state["bench_client"] = FakeBackend("Hi", first_token_s=0, token_s=0)
+        at.session_state["bench_submission"] = None
+        at.run()
+        # A reply that would take a minute
+        slow = FakeBackend("word " * 600, first_token_s=0, token_s=0.1)
+        pool = CallPool(1, 120)
+        call = pool.submit("session", slow, {"messages": []}, stream=True)
+        at.session_state["pending_call"] = call
+
+        at.sidebar.button(key="stop_reply").click().run()
+        pool.shutdown()
+
+        assert not at.exception
+        assert call.cancelled
+        assert at.session_state.pending_call is None
+        assert at.session_state.conversation.messages[-1].role == "assistant"
@@ -0,0 +1,136 @@
+"""Tests for the content-addressed attachment store."""
+
+import hashlib
+import io
+import os
+import time
+
+import pytest
+
+from streamlit_chat_input_fileupload.attachments import AttachmentStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Store with a small memory budget spilling into a temporary directory."""
+    return AttachmentStore(memory_budget=100, spill_threshold=50, store_dir=tmp_path)
+
+
+class TestAttachmentStore:
+    """Tests for storing and retrieving attachment bytes."""
+
+    def test_put_returns_sha256(self, store):
+        """Test that blobs are keyed by their SHA-256 digest."""
+        digest = store.put(b"hello")
+
+        assert digest == hashlib.sha256(b"hello").hexdigest()
+        assert store.get(digest) == b"hello"
+        assert digest in store
+
+    def test_small_blob_kept_in_memory(self, store):
+        """Test that small blobs stay in memory and are not written to disk."""
+        digest = store.put(b"x" * 10)
+
+        assert store.memory_bytes == 10
+        assert store.path(digest) is None
+
+    def test_large_blob_spilled_to_disk(self, store):
+        """Test that blobs above the threshold go straight to disk."""
+        digest = store.put(b"x" * 60)
+
+        assert store.memory_bytes == 0
+        assert store.path(digest).read_bytes() == b"x" * 60
+        assert store.get(digest) == b"x" * 60
+
+    def test_identical_content_stored_once(self, store):
+        """Test that storing the same bytes twice keeps one copy."""
+        first = store.put(b"y" * 30)
+        second = store.put(bytes(b"y" * 30))
+
+        assert first == second
+        assert store.memory_bytes == 30
+
+    def test_lru_eviction_spills_to_disk(self, store):
+        """Test that exceeding the memory budget spills the oldest blob."""
+        oldest = store.put(b"a" * 40)
+        middle = store.put(b"b" * 40)
+        store.get(oldest)
+        newest = store.put(b"c" * 40)
+
+        assert store.memory_bytes == 80
+        assert store.path(middle) is not None
+        assert store.path(oldest) is None
+        assert store.get(middle) == b"b" * 40
+        assert store.get(newest) == b"c" * 40
+
+    def test_disk_budget_evicts_least_recently_used(self, tmp_path):
+        """Test that blobs beyond disk_budget go, the least recently used first."""
+        store = AttachmentStore(spill_threshold=50, store_dir=tmp_path, disk_budget=150)
+        older = store.put(b"a" * 60)
+        old = store.put(b"b" * 60)
+        now = time.time()
+        os.utime(store.path(older), (now - 20, now - 20))
+        os.utime(store.path(old), (now - 10, now - 10))
+        store.get(older)
+        newest = store.put(b"c" * 60)
+
+        assert old not in store
+        assert older in store
+        assert newest in store
+
+    def test_max_age_evicts_unused_blobs(self, tmp_path):
+        """Test that blobs unused for max_age seconds are deleted."""
+        store = AttachmentStore(spill_threshold=50, store_dir=tmp_path, max_age=3600)
+        stale = store.put(b"a" * 60)
+        fresh = store.put(b"b" * 60)
+        hours_ago = time.time() - 2 * 3600
+        os.utime(store.path(stale), (hours_ago, hours_ago))
+
+        assert store.evict() == 1
+        assert fresh in store
+        with pytest.raises(KeyError):
+            store.get(stale)
+
+    def test_unknown_digest(self, store):
+        """Test that an unknown digest raises KeyError."""
+        with pytest.raises(KeyError):
+            store.get("0" * 64)
+
+    def test_put_file_moves_large_file(self, store, tmp_path):
+        """Test that a large spooled file is moved into the store."""
+        source = tmp_path / "upload.part"
+        source.write_bytes(b"z" * 200)
+
+        digest = store.put_file(source, move=True)
+
+        assert digest == hashlib.sha256(b"z" * 200).hexdigest()
+        assert not source.exists()
+        assert store.get(digest) == b"z" * 200
+
+    def test_put_file_small_file(self, store, tmp_path):
+        """Test that a small file is kept in memory."""
+        source = tmp_path / "note.txt"
+        source.write_bytes(b"note")
+
+        digest = store.put_file(source)
+
+        assert source.exists()
+        assert store.memory_bytes == 4
+        assert store.get(digest) == b"note"
+
+    def test_put_stream_large(self, store):
+        """Test that a large stream is written to disk under its digest."""
+        digest = store.put_stream(io.BytesIO(b"s" * 200))
+
+        assert digest == hashlib.sha256(b"s" * 200).hexdigest()
+        assert store.path(digest) is not None
+        assert store.memory_bytes == 0
+        assert store.get(digest) == b"s" * 200
+        assert store.put_stream(io.BytesIO(b"s" * 200)) == digest
+
+    def test_put_stream_small(self, store):
+        """Test that a small stream is kept in memory."""
+        digest = store.put_stream(io.BytesIO(b"note"))
+
+        assert store.memory_bytes == 4
+        assert store.get(digest) == b"note"
@@ -0,0 +1,102 @@
+"""Tests for the model backends and the local fake."""
+
+import threading
+import time
+
+import pytest
+
+from streamlit_chat_input_fileupload import backends
+from streamlit_chat_input_fileupload.backends import FakeBackend, get_backend
+from streamlit_chat_input_fileupload.bedrock import StreamStats, iter_stream_text
+from streamlit_chat_input_fileupload.calls import ModelCall
+from streamlit_chat_input_fileupload.clients import BedrockClientManager
+
+
+def request(text="What is in the report?"):
+    return {"modelId": "m", "messages": [{"role": "user", "content": [{"text": text}]}]}
+
+
+class TestFakeBackend:
+    """Tests for the stand-in replying without a model."""
+
+    def test_streams_synthetic_reply(self):
+        """Test that the reply quotes the question and reports usage like Bedrock."""
+        backend = FakeBackend(first_token_s=0, token_s=0, reply_tokens=5)
+        stats = StreamStats()
+
+        chunks = list(iter_stream_text(backend.converse_stream(**request())["stream"], stats))
+
+        assert stats.text.startswith('Reply to "What is in the report?":')
+        assert stats.text.endswith("lorem ipsum dolor sit amet")
+        assert len(chunks) == stats.usage["outputTokens"]
+        assert stats.usage["inputTokens"] > 0
+        assert stats.stop_reason == "end_turn"
+
+    def test_canned_reply(self):
+        """Test that a fixed or computed reply is returned as given."""
+        backend = FakeBackend("The answer is 42.", first_token_s=0, token_s=0)
+        response = backend.converse(**request())
+
+        assert response["output"]["message"]["content"] == [{"text": "The answer is 42."}]
+        assert response["usage"]["outputTokens"] == 4
+
+        echo = FakeBackend(lambda r: r["modelId"], first_token_s=0, token_s=0)
+        assert echo.converse(**request())["output"]["message"]["content"][0]["text"] == "m"
+
+    def test_latency(self):
+        """Test that tokens arrive after the configured delays."""
+        backend = FakeBackend("a b c", first_token_s=0.05, token_s=0.02)
+        stats = StreamStats()
+        list(iter_stream_text(backend.converse_stream(**request())["stream"], stats))
+
+        assert stats.time_to_first_token >= 0.05
+        assert stats.finished - stats.first_token_at >= 0.04
+
+    def test_close_interrupts_wait(self):
+        """Test that a cancelled call stops waiting for the next token."""
+        backend = FakeBackend(first_token_s=5, token_s=5)
+        call = ModelCall(backend, request(), stream=True, timeout=10)
+        worker = threading.Thread(target=call.run)
+        worker.start()
+        time.sleep(0.05)
+
+        started = time.perf_counter()
+        call.cancel()
+        worker.join(2)
+
+        assert call.done
+        assert time.perf_counter() - started < 1
+
+    def test_metrics(self):
+        """Test that calls and latency percentiles are reported."""
+        backend = FakeBackend("ok", first_token_s=0, token_s=0)
+        assert backend.metrics()["calls"] == 0
+
+        for _ in range(3):
+            backend.converse(**request())
+        list(backend.converse_stream(**request())["stream"])
+
+        metrics = backend.metrics()
+        assert metrics["calls"] == 4
+        assert metrics["latency_p95"] >= metrics["latency_p50"] >= 0
+
+
+class TestGetBackend:
+    """Tests for choosing the shared backend."""
+
+    def test_fake_shared(self, monkeypatch):
+        """Test that the fake backend is created once, from the config."""
+        monkeypatch.setattr(backends, "_fake", None)
+        backend = get_backend("fake")
+
+        assert isinstance(backend, FakeBackend)
+        assert get_backend("fake") is backend
+
+    def test_bedrock(self):
+        """Test that the Bedrock backend is the shared client manager."""
+        assert isinstance(get_backend("bedrock"), BedrockClientManager)
+
+    def test_unknown(self):
+        """Test that an unknown backend name is rejected."""
+        with pytest.raises(ValueError, match="must be one of"):
+            get_backend("openai")
@@ -0,0 +1,74 @@
+"""Tests for streaming replies from the Bedrock Converse API."""
+
+import pytest
+
+from fakes import fake_events
+from streamlit_chat_input_fileupload.bedrock import (
+    StreamError,
+    StreamStats,
+    iter_stream_text,
+    stop_reason_note,
+)
+
+
+class TestStreamText:
+    """Tests for consuming the converse_stream event stream."""
+
+    def test_yields_text_deltas(self):
+        """Test that text deltas are yielded in order."""
+        stats = StreamStats()
+        chunks = list(iter_stream_text(iter(fake_events("Hel", "lo", "!")), stats))
+
+        assert chunks == ["Hel", "lo", "!"]
+        assert stats.text == "Hello!"
+        assert stats.stop_reason == "end_turn"
+
+    def test_records_usage_and_timings(self):
+        """Test that usage, time to first token and throughput are recorded."""
+        usage = {"inputTokens": 12, "outputTokens": 3, "totalTokens": 15}
+        stats = StreamStats()
+        list(iter_stream_text(iter(fake_events("a", "b", "c", usage=usage)), stats))
+
+        assert stats.usage == usage
+        assert stats.output_tokens == 3
+        assert stats.time_to_first_token is not None
+        assert stats.time_to_first_token >= 0
+        assert stats.finished >= stats.first_token_at
+        assert stats.as_dict()["input_tokens"] == 12
+
+    def test_output_tokens_fall_back_to_delta_count(self):
+        """Test that output tokens are estimated when usage is missing."""
+        stats = StreamStats()
+        list(iter_stream_text(iter(fake_events("a", "b")), stats))
+
+        assert stats.output_tokens == 2
+
+    def test_max_tokens_stop_reason(self):
+        """Test that a truncated reply reports its stop reason and a note."""
+        stats = StreamStats()
+        list(iter_stream_text(iter(fake_events("partial", stop_reason="max_tokens")), stats))
+
+        assert stats.stop_reason == "max_tokens"
+        assert "truncated" in stop_reason_note(stats.stop_reason)
+        assert stop_reason_note("end_turn") is None
+
+    def test_mid_stream_error_keeps_partial_text(self):
+        """Test that an exception event raises and keeps the text so far."""
+        events = fake_events("Hello", " wor")[:4]
+        events.append({"modelStreamErrorException": {"message": "boom"}})
+        stats = StreamStats()
+
+        with pytest.raises(StreamError, match="boom") as exc_info:
+            list(iter_stream_text(iter(events), stats))
+
+        assert exc_info.value.kind == "modelStreamErrorException"
+        assert stats.text == "Hello wor"
+        assert stats.finished is not None
+
+    def test_no_text_has_no_timings(self):
+        """Test that throughput is undefined when no text arrived."""
+        stats = StreamStats()
+        list(iter_stream_text(iter(fake_events()), stats))
+
+        assert stats.time_to_first_token is None
+        assert stats.tokens_per_second is None
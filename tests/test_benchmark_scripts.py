@@ -0,0 +1,28 @@
+"""Smoke tests for the standalone scripts in benchmarks/."""
+
+import importlib.util
+from pathlib import Path
+
+BENCHMARKS = Path(__file__).parent.parent / "benchmarks"
+
+
+def load_script(name):
+    spec = importlib.util.spec_from_file_location(name, BENCHMARKS / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestFileProcessingScript:
+    """Tests for benchmarks/bench_file_processing.py."""
+
+    def test_runs(self, monkeypatch, capsys):
+        """Test that the script processes its payloads and prints a row per mode."""
+        script = load_script("bench_file_processing")
+        monkeypatch.setattr(script, "SIZES_MB", (1,))
+        monkeypatch.setattr(script, "ROUNDS", 1)
+
+        script.main()
+
+        rows = capsys.readouterr().out.splitlines()[1:]
+        assert [row.split()[1] for row in rows] == ["inline", "offload"]
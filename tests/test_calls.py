@@ -0,0 +1,168 @@
+"""Tests for model calls running on the shared thread pool."""
+
+import threading
+
+import pytest
+
+from fakes import FakeStreamingClient, fake_events
+from streamlit_chat_input_fileupload.calls import CallPool, ModelCall
+
+REQUEST = {"modelId": "test-model", "messages": []}
+
+
+class BlockingStream:
+    """Event stream that waits for release() after its first event."""
+
+    def __init__(self, events):
+        self.events = iter(events)
+        self.released = threading.Event()
+        self.closed = False
+        self.sent = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.sent == 3:
+            self.released.wait(5)
+            if self.closed:
+                raise ConnectionError("stream closed")
+        self.sent += 1
+        return next(self.events)
+
+    def close(self):
+        self.closed = True
+        self.released.set()
+
+
+class BlockingClient:
+    def __init__(self, events):
+        self.stream = BlockingStream(events)
+
+    def converse_stream(self, **request):
+        return {"stream": self.stream}
+
+
+class FakeClient:
+    """Non-streaming stand-in for a bedrock-runtime client."""
+
+    def converse(self, **request):
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": "Hi"}]}},
+            "stopReason": "end_turn",
+            "usage": {"inputTokens": 5, "outputTokens": 1},
+        }
+
+
+@pytest.fixture
+def pool():
+    pool = CallPool(max_workers=2, timeout=5)
+    yield pool
+    pool.shutdown()
+
+
+class TestModelCall:
+    """Tests for a single background call."""
+
+    def test_streams_reply(self, pool):
+        """Test that the reply text is collected in the background."""
+        call = pool.submit("session", FakeStreamingClient(fake_events("Hel", "lo")), REQUEST)
+
+        snapshots = list(call.iter_text(poll=0.01))
+
+        assert snapshots[-1] == "Hello"
+        assert call.done and call.error is None
+        assert call.stats.stop_reason == "end_turn"
+
+    def test_non_streaming_reply(self, pool):
+        """Test that converse replies are recorded like streamed ones."""
+        call = pool.submit("session", FakeClient(), REQUEST, stream=False)
+
+        assert call.wait(5)
+        assert call.text == "Hi"
+        assert call.stats.as_dict()["input_tokens"] == 5
+
+    def test_cancel_keeps_partial_text(self, pool):
+        """Test that cancelling closes the stream and keeps the text so far."""
+        client = BlockingClient(fake_events("Hello", " world"))
+        call = pool.submit("session", client, REQUEST)
+        for text in call.iter_text(poll=0.01):
+            if text:
+                break
+
+        call.cancel()
+
+        assert call.wait(5)
+        assert client.stream.closed
+        assert call.cancelled
+        assert call.error is None
+        assert call.text == "Hello"
+
+    def test_timeout(self):
+        """Test that a call past its deadline is cancelled with an error."""
+        client = BlockingClient(fake_events("Hello", " world"))
+        call = ModelCall(client, REQUEST, stream=True, timeout=0.05)
+        worker = threading.Thread(target=call.run)
+        worker.start()
+
+        list(call.iter_text(poll=0.01))
+        worker.join(5)
+
+        assert isinstance(call.error, TimeoutError)
+        assert call.cancelled
+
+    def test_stream_error(self, pool):
+        """Test that a failing request reports its error."""
+        events = fake_events("Hi")[:3] + [{"throttlingException": {"message": "slow down"}}]
+        call = pool.submit("session", FakeStreamingClient(events), REQUEST)
+
+        assert call.wait(5)
+        assert "slow down" in str(call.error)
+        assert call.text == "Hi"
+
+
+class TestCallPool:
+    """Tests for the one-call-per-session rule."""
+
+    def test_new_call_cancels_previous(self, pool):
+        """Test that a session's new call cancels its call in flight."""
+        first = pool.submit("session", BlockingClient(fake_events("a", "b")), REQUEST)
+        second = pool.submit("session", FakeStreamingClient(fake_events("c")), REQUEST)
+
+        assert first.wait(5) and second.wait(5)
+        assert first.cancelled
+        assert not second.cancelled
+        assert second.text == "c"
+
+    def test_sessions_are_independent(self, pool):
+        """Test that calls of different sessions do not cancel each other."""
+        first = pool.submit("one", BlockingClient(fake_events("a", "b")), REQUEST)
+        second = pool.submit("two", FakeStreamingClient(fake_events("c")), REQUEST)
+
+        assert second.wait(5)
+        assert pool.active("one") is first
+        pool.cancel("one")
+        assert first.wait(5)
+        assert first.cancelled
+
+    def test_finished_call_is_released(self, pool):
+        """Test that a finished call is no longer active."""
+        call = pool.submit("session", FakeStreamingClient(fake_events("a")), REQUEST)
+        call.future.result(5)
+
+        assert pool.active("session") is None
+
+    def test_queued_call_never_runs(self):
+        """Test that a call cancelled while queued never reaches the model."""
+        pool = CallPool(max_workers=1, timeout=5)
+        blocker = pool.submit("one", BlockingClient(fake_events("a", "b")), REQUEST)
+        client = FakeStreamingClient(fake_events("c"))
+        queued = pool.submit("two", client, REQUEST)
+
+        queued.cancel()
+        blocker.cancel()
+        pool.shutdown()
+
+        assert queued.done
+        assert client.requests == []
+        assert pool.active("two") is None
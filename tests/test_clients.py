@@ -0,0 +1,185 @@
+"""Tests for the shared Bedrock client manager."""
+
+import threading
+import time
+
+from botocore.exceptions import ClientError
+import pytest
+
+from fakes import fake_events
+from streamlit_chat_input_fileupload.calls import ModelCall
+from streamlit_chat_input_fileupload.clients import BedrockClientManager, TokenBucket
+
+
+def client_error(code):
+    return ClientError({"Error": {"Code": code, "Message": code}}, "Converse")
+
+
+class ScriptedClient:
+    """Fake client raising the given errors before replying."""
+
+    def __init__(self, errors=(), events=None):
+        self.errors = list(errors)
+        self.events = events or fake_events("Hi")
+        self.calls = 0
+
+    def converse(self, **request):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"output": {"message": {"content": [{"text": "Hi"}]}}}
+
+    def converse_stream(self, **request):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"stream": iter(self.events)}
+
+
+class TestTokenBucket:
+    """Tests for the rate limiter."""
+
+    def test_burst_then_rate(self):
+        """Test that a burst passes at once and later tokens wait for the rate."""
+        bucket = TokenBucket(rate=20, burst=2)
+
+        assert bucket.acquire(timeout=0)
+        assert bucket.acquire(timeout=0)
+        assert not bucket.acquire(timeout=0)
+        started = time.monotonic()
+        assert bucket.acquire(timeout=1)
+        assert time.monotonic() - started >= 0.03
+
+    def test_queue_depth(self):
+        """Test that waiting callers are counted and served."""
+        bucket = TokenBucket(rate=50, burst=1)
+        bucket.acquire()
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(bucket.acquire(2))) for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.01)
+
+        assert 1 <= bucket.waiting <= 3
+        for thread in threads:
+            thread.join(5)
+        assert results == [True, True, True]
+        assert bucket.waiting == 0
+
+    def test_cancel_while_waiting(self):
+        """Test that a queued caller leaves the line without a token once cancelled."""
+        bucket = TokenBucket(rate=0.1, burst=1)
+        bucket.acquire()
+        cancel = threading.Event()
+        results = []
+        thread = threading.Thread(target=lambda: results.append(bucket.acquire(10, cancel)))
+        thread.start()
+        time.sleep(0.05)
+        cancel.set()
+        thread.join(1)
+
+        assert results == [False]
+        assert bucket.waiting == 0
+
+    def test_adaptive_rate(self):
+        """Test that throttling halves the rate and successes restore it."""
+        bucket = TokenBucket(rate=8, burst=1)
+
+        bucket.throttled()
+        bucket.throttled()
+        assert bucket.rate == 2
+        for _ in range(10):
+            bucket.succeeded()
+        assert bucket.rate == 8
+
+
+class TestBedrockClientManager:
+    """Tests for rate limited calls through the manager."""
+
+    @staticmethod
+    def manager(client, **kwargs):
+        return BedrockClientManager(lambda: client, rate=100, burst=5, **kwargs)
+
+    def test_throttled_call_waits_and_retries(self):
+        """Test that a throttled request is queued again instead of failing."""
+        client = ScriptedClient([client_error("ThrottlingException")] * 2)
+        manager = self.manager(client)
+
+        response = manager.converse(modelId="m", messages=[])
+
+        assert response["output"]["message"]["content"][0]["text"] == "Hi"
+        assert client.calls == 3
+        metrics = manager.metrics()
+        assert metrics["throttles"] == 2
+        assert metrics["calls"] == 1
+        assert metrics["rate"] < 100
+
+    def test_other_errors_are_raised(self):
+        """Test that non-throttling errors reach the caller."""
+        manager = self.manager(ScriptedClient([client_error("ValidationException")]))
+
+        with pytest.raises(ClientError, match="ValidationException"):
+            manager.converse(modelId="m", messages=[])
+        assert manager.metrics()["throttles"] == 0
+
+    def test_gives_up_after_queue_timeout(self):
+        """Test that throttling past the queue timeout raises."""
+        client = ScriptedClient([client_error("ThrottlingException")] * 100)
+        manager = self.manager(client, queue_timeout=0.05)
+
+        with pytest.raises((ClientError, TimeoutError)):
+            manager.converse(modelId="m", messages=[])
+
+    @pytest.mark.parametrize("stream", [True, False])
+    def test_cancelled_call_never_sent(self, stream):
+        """Test that a model call cancelled while rate limited never reaches the client."""
+        client = ScriptedClient()
+        manager = BedrockClientManager(lambda: client, rate=0.1, burst=1)
+        manager.bucket.acquire()
+        call = ModelCall(manager, {"modelId": "m", "messages": []}, stream=stream, timeout=10)
+        thread = threading.Thread(target=call.run)
+        thread.start()
+        time.sleep(0.05)
+        call.cancel()
+        thread.join(1)
+
+        assert call.done
+        assert call.error is None
+        assert client.calls == 0
+        assert manager.bucket.waiting == 0
+
+    def test_stream_latency_and_throttling(self):
+        """Test that stream latency is recorded when the stream ends."""
+        events = fake_events("Hi")[:3] + [{"throttlingException": {"message": "slow"}}]
+        manager = self.manager(ScriptedClient(events=events))
+
+        response = manager.converse_stream(modelId="m", messages=[])
+        assert manager.metrics()["calls"] == 0
+        list(response["stream"])
+
+        metrics = manager.metrics()
+        assert metrics["calls"] == 1
+        assert metrics["throttles"] == 1
+        assert metrics["latency_p50"] is not None
+
+    def test_latency_percentiles(self):
+        """Test that p50 and p95 are computed from recorded latencies."""
+        manager = self.manager(ScriptedClient())
+        for latency in range(1, 101):
+            manager._record(latency / 100)
+
+        metrics = manager.metrics()
+        assert metrics["latency_p50"] == pytest.approx(0.505)
+        assert metrics["latency_p95"] == pytest.approx(0.9505)
+
+    def test_client_created_once(self):
+        """Test that the client is created lazily and shared."""
+        created = []
+        manager = BedrockClientManager(lambda: created.append(1) or ScriptedClient())
+
+        assert created == []
+        manager.converse(modelId="m", messages=[])
+        manager.converse(modelId="m", messages=[])
+        assert created == [1]
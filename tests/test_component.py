@@ -201,3 +201,248 @@ class TestFileProcessing:
         result = mime_map.get(mime_type)
 
         assert result == expected_format
+
+
+class TestProcessFiles:
+    """Tests for batch decoding of submitted files."""
+
+    @staticmethod
+    def _file(name, payload):
+        return {
+            "name": name,
+            "type": "text/plain",
+            "size": len(payload),
+            "data": base64.b64encode(payload).decode("ascii"),
+        }
+
+    def test_decodes_all_files(self):
+        """Test that every submitted file is decoded in order."""
+        from streamlit_chat_input_fileupload.component import _process_files
+
+        infos = [self._file("a.txt", b"alpha"), self._file("b.txt", b"beta")]
+        files, rejected = _process_files(infos, None, None, None)
+
+        assert [f["data"] for f in files] == [b"alpha", b"beta"]
+        assert [f["original_size"] for f in files] == [5, 4]
+        assert rejected == {}
+
+    def test_keeps_payload_encoded(self):
+        """Test that decode=False leaves decoding to the caller."""
+        from streamlit_chat_input_fileupload.component import _process_files
+
+        files, _ = _process_files([self._file("a.txt", b"alpha")], None, None, None, decode=False)
+
+        assert "data" not in files[0]
+        assert base64.b64decode(files[0]["encoded"]) == b"alpha"
+
+    def test_original_size_passed_through(self):
+        """Test that the size before image re-encoding is reported."""
+        from streamlit_chat_input_fileupload.component import _process_files
+
+        info = dict(self._file("photo.webp", b"RIFF"), type="image/webp", original_size=9000)
+        files, _ = _process_files([info], None, None, None)
+
+        assert files[0]["size"] == 4
+        assert files[0]["original_size"] == 9000
+
+    def test_max_files_limit(self):
+        """Test that files beyond max_files are rejected."""
+        from streamlit_chat_input_fileupload.component import _process_files
+
+        infos = [self._file(f"{i}.txt", b"x") for i in range(4)]
+        files, rejected = _process_files(infos, None, 2, None)
+
+        assert [f["name"] for f in files] == ["0.txt", "1.txt"]
+        assert list(rejected) == ["2.txt", "3.txt"]
+
+    def test_max_total_bytes_limit(self):
+        """Test that files exceeding the byte budget are rejected."""
+        from streamlit_chat_input_fileupload.component import _process_files
+
+        infos = [
+            self._file("big.txt", b"x" * 8),
+            self._file("huge.txt", b"x" * 16),
+            self._file("small.txt", b"x" * 2),
+        ]
+        files, rejected = _process_files(infos, None, None, 10)
+
+        assert [f["name"] for f in files] == ["big.txt", "small.txt"]
+        assert rejected == {"huge.txt": "limit reached"}
+
+    def test_format_check(self):
+        """Test that mislabelled files are rejected when formats are checked."""
+        from streamlit_chat_input_fileupload.component import _process_files
+
+        jpeg = b"\xff\xd8\xff\xe0" + b"\x00" * 20
+        infos = [
+            dict(self._file("photo.png", jpeg), type="image/png"),
+            dict(self._file("photo.jpg", jpeg), type="image/jpeg"),
+            self._file("notes.txt", b"plain text"),
+        ]
+        files, rejected = _process_files(infos, None, None, None, check_formats=True)
+
+        assert [f["name"] for f in files] == ["photo.jpg", "notes.txt"]
+        assert rejected == {"photo.png": "content is a JPEG image, not a PNG image"}
+
+    def test_format_check_on_encoded_payload(self):
+        """Test that formats are checked without decoding the whole payload."""
+        from streamlit_chat_input_fileupload.component import _process_files
+
+        infos = [self._file("report.pdf", b"not a pdf" * 100)]
+        files, rejected = _process_files(infos, None, None, None, decode=False, check_formats=True)
+
+        assert files == []
+        assert rejected == {"report.pdf": "not a valid PDF document"}
+
+    def test_spools_large_files(self):
+        """Test that files above spool_threshold are returned as file objects."""
+        from streamlit_chat_input_fileupload.component import _process_files
+
+        infos = [self._file("small.txt", b"alpha"), self._file("large.txt", b"x" * 64)]
+        files, _ = _process_files(infos, None, None, None, spool_threshold=16)
+
+        assert files[0]["data"] == b"alpha"
+        assert files[1]["data"].read() == b"x" * 64
+
+    @pytest.fixture
+    def registry(self, tmp_path, monkeypatch):
+        from streamlit_chat_input_fileupload import uploads
+
+        registry = uploads.UploadRegistry(spool_dir=tmp_path)
+        monkeypatch.setattr(uploads, "registry", registry)
+        return registry
+
+    @staticmethod
+    def _chunked(registry, upload_id, payload, declared=None):
+        upload = registry.begin(upload_id, f"{upload_id}.bin", "text/plain", len(payload))
+        upload.write(0, payload)
+        size = len(payload) if declared is None else declared
+        return {
+            "name": f"{upload_id}.bin",
+            "type": "text/plain",
+            "size": size,
+            "upload_id": upload_id,
+        }
+
+    def test_chunked_over_limit_discarded(self, registry):
+        """Test that chunked uploads rejected by the limits leave no spool file."""
+        from streamlit_chat_input_fileupload.component import _process_files
+
+        infos = [self._chunked(registry, "a", b"x" * 8), self._chunked(registry, "b", b"x" * 8)]
+        files, rejected = _process_files(infos, None, 1, None)
+
+        assert rejected == {"b.bin": "limit reached"}
+        assert registry.get("b") is None
+        assert list(registry.spool_dir.iterdir()) == [files[0]["path"]]
+
+    def test_chunked_received_size_checked(self, registry):
+        """Test that the spooled size is checked, not the size the browser declared."""
+        from streamlit_chat_input_fileupload.component import _process_files
+
+        infos = [self._chunked(registry, "a", b"x" * 64, declared=4)]
+        files, rejected = _process_files(infos, None, None, 16)
+
+        assert files == []
+        assert rejected == {"a.bin": "limit reached"}
+        assert list(registry.spool_dir.iterdir()) == []
+
+    def test_chunked_incomplete_discarded(self, registry):
+        """Test that an incomplete chunked upload is rejected and its spool file removed."""
+        from streamlit_chat_input_fileupload.component import _process_files
+
+        registry.begin("a", "a.bin", "text/plain", 8).write(0, b"abcd")
+        info = {"name": "a.bin", "type": "text/plain", "size": 8, "upload_id": "a"}
+        _, rejected = _process_files([info], None, None, None)
+
+        assert rejected == {"a.bin": "upload incomplete"}
+        assert list(registry.spool_dir.iterdir()) == []
+
+
+class TestReceiveUploadEvent:
+    """Tests for applying chunked upload events from the browser."""
+
+    @pytest.fixture
+    def registry(self, tmp_path, monkeypatch):
+        from streamlit_chat_input_fileupload import uploads
+
+        registry = uploads.UploadRegistry(spool_dir=tmp_path)
+        monkeypatch.setattr(uploads, "registry", registry)
+        return registry
+
+    @staticmethod
+    def _send(event, max_total_bytes=None):
+        import streamlit as st
+
+        from streamlit_chat_input_fileupload.component import (
+            _acks_key,
+            _receive_upload_event,
+        )
+
+        st.session_state["chat"] = {"upload": event}
+        _receive_upload_event("chat", max_total_bytes)
+        return st.session_state[_acks_key("chat")][event["upload_id"]]
+
+    def test_begin_over_limit_refused(self, registry):
+        """Test that a begin above max_total_bytes is acknowledged with an error."""
+        event = {"op": "begin", "upload_id": "u1", "name": "a", "size": 10**12, "seq": 1}
+        ack = self._send(event, max_total_bytes=1024)
+
+        assert ack["offset"] == -1
+        assert ack["seq"] == 1
+        assert "limit" in ack["error"]
+        assert registry.get("u1") is None
+        assert list(registry.spool_dir.iterdir()) == []
+
+    def test_begin_prunes_stale_uploads(self, registry):
+        """Test that beginning an upload discards abandoned ones."""
+        stale = registry.begin("old", "old.bin", "text/plain", 8)
+        stale.updated -= 2 * 3600
+
+        ack = self._send({"op": "begin", "upload_id": "u1", "name": "a", "size": 8, "seq": 1})
+
+        assert ack == {"offset": 0, "seq": 1}
+        assert registry.get("old") is None
+        assert not stale.path.exists()
+
+
+class TestComponentData:
+    """Tests for the data sent to the browser."""
+
+    def test_theme_from_context(self, monkeypatch):
+        """Test that the app's theme type is sent, so the browser need not read styles."""
+        from types import SimpleNamespace
+
+        import streamlit as st
+
+        from streamlit_chat_input_fileupload import component as component_module
+
+        sent = {}
+
+        def mount(data, key, **callbacks):
+            sent.update(data)
+            return SimpleNamespace(message=None)
+
+        monkeypatch.setattr(component_module, "_component", lambda: mount)
+        monkeypatch.setattr(
+            type(st.context), "theme", property(lambda self: SimpleNamespace(type="dark"))
+        )
+
+        assert component_module.chat_input_with_upload() is None
+        assert sent["theme"] == "dark"
+
+    def test_key_sent(self, monkeypatch):
+        """Test that the key is sent, to keep attachments across a rebuild of the input."""
+        from types import SimpleNamespace
+
+        from streamlit_chat_input_fileupload import component as component_module
+
+        sent = {}
+
+        def mount(data, key, **callbacks):
+            sent.update(data, mounted_key=key)
+            return SimpleNamespace(message=None)
+
+        monkeypatch.setattr(component_module, "_component", lambda: mount)
+        component_module.chat_input_with_upload(key="chat")
+
+        assert sent["key"] == sent["mounted_key"] == "chat"
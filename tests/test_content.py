@@ -0,0 +1,102 @@
+"""Tests for building Bedrock content blocks."""
+
+import io
+
+import pytest
+
+from streamlit_chat_input_fileupload.content import build_content_block
+from streamlit_chat_input_fileupload.formats import get_bedrock_doc_format, get_media_type
+
+
+class TestFormatLookup:
+    """Tests for media type and document format resolution."""
+
+    @pytest.mark.parametrize(
+        "file_type,file_name,expected",
+        [
+            ("image/png", "x.bin", "image/png"),
+            ("", "photo.JPG", "image/jpeg"),
+            ("", "notes.md", "text/markdown"),
+            ("", "archive", "application/octet-stream"),
+        ],
+    )
+    def test_get_media_type(self, file_type, file_name, expected):
+        """Test that the browser type wins over the extension."""
+        assert get_media_type(file_type, file_name) == expected
+
+    @pytest.mark.parametrize(
+        "file_name,mime_type,expected",
+        [
+            ("report.PDF", "", "pdf"),
+            ("page.htm", "", "html"),
+            ("upload", "text/csv", "csv"),
+            ("script.py", "text/x-python", None),
+        ],
+    )
+    def test_get_bedrock_doc_format(self, file_name, mime_type, expected):
+        """Test extension mapping with MIME type fallback."""
+        assert get_bedrock_doc_format(file_name, mime_type) == expected
+
+
+class TestBuildContentBlock:
+    """Tests for turning chat input into content blocks."""
+
+    def test_text_only(self, store):
+        """Test that text becomes a single text block."""
+        assert build_content_block("Hello", [], store) == [{"text": "Hello"}]
+
+    def test_image_and_document_reference_store(self, store):
+        """Test that attachments hold store references instead of bytes."""
+        files = [
+            {"name": "a.png", "type": "image/png", "data": b"png-bytes"},
+            {"name": "b.pdf", "type": "application/pdf", "data": b"pdf-bytes"},
+        ]
+        content = build_content_block("Compare", files, store)
+
+        assert content[0]["image"]["format"] == "png"
+        assert store.get(content[0]["image"]["source"]["ref"]) == b"png-bytes"
+        assert content[1]["document"]["name"] == "b_pdf"
+        assert store.get(content[1]["document"]["source"]["ref"]) == b"pdf-bytes"
+        assert content[2] == {"text": "Compare"}
+
+    def test_unsupported_file_becomes_note(self, store):
+        """Test that unsupported formats are replaced by a text note."""
+        files = [{"name": "tool.exe", "type": "application/x-msdownload", "data": b"MZ"}]
+        content = build_content_block("", files, store)
+
+        assert len(content) == 1
+        assert "tool.exe" in content[0]["text"]
+        assert store.memory_bytes == 0
+
+    def test_unsupported_spool_discarded(self, store, tmp_path):
+        """Test that the spool file and spooled data of an unsupported file are released."""
+        path = tmp_path / "spool"
+        path.write_bytes(b"MZ")
+        spool = io.BytesIO(b"MZ")
+        files = [
+            {"name": "tool.exe", "type": "application/x-msdownload", "path": str(path)},
+            {"name": "lib.dll", "type": "application/x-msdownload", "data": spool},
+        ]
+        build_content_block("", files, store)
+
+        assert not path.exists()
+        assert spool.closed
+
+    def test_cache_point_after_large_attachment(self, store):
+        """Test that a cachePoint follows attachments above the token threshold."""
+        files = [
+            {"name": "big.txt", "type": "text/plain", "data": b"x" * 8000, "size": 8000},
+            {"name": "small.txt", "type": "text/plain", "data": b"y" * 100, "size": 100},
+        ]
+        content = build_content_block("Read these", files, store, cache_min_tokens=1024)
+
+        kinds = [next(iter(block)) for block in content]
+        assert kinds == ["document", "cachePoint", "document", "text"]
+        assert content[1] == {"cachePoint": {"type": "default"}}
+
+    def test_no_cache_points_by_default(self, store):
+        """Test that caching is off unless a threshold is given."""
+        files = [{"name": "big.txt", "type": "text/plain", "data": b"x" * 8000, "size": 8000}]
+        content = build_content_block("", files, store)
+
+        assert all("cachePoint" not in block for block in content)
@@ -0,0 +1,94 @@
+"""Tests for the context policy applied to request history."""
+
+import pytest
+
+from streamlit_chat_input_fileupload.context import ContextPolicy, estimate_block
+from streamlit_chat_input_fileupload.conversation import Conversation
+
+
+@pytest.fixture
+def conversation(store):
+    """Conversation of five turns, each with a 1000 byte document."""
+    conversation = Conversation(store.get)
+    for turn in range(5):
+        ref = store.put(bytes([turn]) * 1000)
+        document = {
+            "format": "txt",
+            "name": f"doc{turn}_txt",
+            "source": {"ref": ref},
+            "size": 1000,
+        }
+        conversation.append("user", [{"document": document}, {"text": f"question {turn}"}])
+        conversation.append("assistant", [{"text": f"answer {turn}"}])
+    return conversation
+
+
+def texts(messages):
+    """Text blocks of a message list, flattened."""
+    return [
+        block["text"] for message in messages for block in message["content"] if "text" in block
+    ]
+
+
+class TestEstimates:
+    """Tests for the size estimates behind the budgets."""
+
+    def test_text_estimate(self):
+        """Test that text is estimated at four characters per token."""
+        assert estimate_block({"text": "x" * 40}) == (40, 10)
+
+    def test_document_estimate(self):
+        """Test that documents use their recorded size."""
+        block = {"document": {"format": "pdf", "source": {"ref": "r"}, "size": 800}}
+        assert estimate_block(block) == (800, 200)
+
+
+class TestContextPolicy:
+    """Tests for windowing, budgets and attachment eviction."""
+
+    def test_no_policy_sends_everything(self, conversation):
+        """Test that without a policy every message is sent."""
+        messages = conversation.api_messages()
+
+        assert len(messages) == 10
+        assert conversation.last_context.bytes > 5000
+        assert conversation.last_context.dropped_turns == 0
+
+    def test_max_turns(self, conversation):
+        """Test that only the last N turns are sent."""
+        messages = conversation.api_messages(ContextPolicy(max_turns=2))
+
+        assert messages[0]["role"] == "user"
+        assert texts(messages) == ["question 3", "answer 3", "question 4", "answer 4"]
+        assert conversation.last_context.dropped_turns == 3
+
+    def test_attachment_max_age(self, conversation):
+        """Test that old attachments are replaced by placeholders."""
+        messages = conversation.api_messages(ContextPolicy(attachment_max_age=1))
+
+        assert len(messages) == 10
+        assert "document" not in messages[0]["content"][0]
+        assert "doc0_txt" in messages[0]["content"][0]["text"]
+        assert messages[6]["content"][0]["document"]["source"]["bytes"] == bytes([3]) * 1000
+        assert messages[8]["content"][0]["document"]["source"]["bytes"] == bytes([4]) * 1000
+        assert conversation.last_context.dropped_attachments == 3
+
+    def test_byte_budget_drops_oldest_turns(self, conversation):
+        """Test that the oldest turns are dropped to fit the byte budget."""
+        conversation.api_messages(ContextPolicy(max_bytes=2500))
+
+        assert conversation.last_context.messages == 4
+        assert conversation.last_context.bytes <= 2500
+
+    def test_token_budget_counts_placeholders(self, conversation):
+        """Test that evicted attachments free up the token budget."""
+        conversation.api_messages(ContextPolicy(max_tokens=600, attachment_max_age=0))
+
+        assert conversation.last_context.messages == 10
+        assert conversation.last_context.tokens <= 600
+
+    def test_newest_turn_always_sent(self, conversation):
+        """Test that the newest turn is sent even when over budget."""
+        messages = conversation.api_messages(ContextPolicy(max_bytes=1))
+
+        assert texts(messages) == ["question 4", "answer 4"]
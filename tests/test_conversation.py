@@ -0,0 +1,184 @@
+"""Tests for the incremental conversation model."""
+
+import pytest
+
+from streamlit_chat_input_fileupload.context import ContextPolicy
+from streamlit_chat_input_fileupload.conversation import Conversation
+from streamlit_chat_input_fileupload.records import CachePoint, DocumentBlock, ImageBlock
+
+
+@pytest.fixture
+def conversation(store):
+    """Empty conversation resolving attachments from the store."""
+    return Conversation(store.get)
+
+
+class TestConversation:
+    """Tests for appending messages and building requests."""
+
+    def test_text_only_view_is_shared(self, conversation):
+        """Test that a text-only history is returned without copying."""
+        conversation.append("user", [{"text": "Hello"}])
+        conversation.append("assistant", [{"text": "Hi"}])
+
+        first = conversation.api_messages()
+        assert first == [
+            {"role": "user", "content": [{"text": "Hello"}]},
+            {"role": "assistant", "content": [{"text": "Hi"}]},
+        ]
+        assert conversation.api_messages() is first
+        assert len(conversation) == 2
+
+    def test_attachments_resolved_from_store(self, conversation, store):
+        """Test that attachment references are resolved to bytes."""
+        ref = store.put(b"%PDF-1.7")
+        conversation.append(
+            "user",
+            [
+                {"document": {"format": "pdf", "name": "r_pdf", "source": {"ref": ref}}},
+                {"text": "Summarize"},
+            ],
+        )
+        conversation.append("assistant", [{"text": "Summary"}])
+
+        messages = conversation.api_messages()
+        assert messages[0]["content"][0]["document"]["source"] == {"bytes": b"%PDF-1.7"}
+        assert messages[1] is conversation.api_messages()[1]
+        # History keeps the reference only
+        assert conversation.messages[0].content[0] == DocumentBlock("pdf", "r_pdf", ref)
+
+    def test_attachment_gone_from_store(self, conversation):
+        """Test that an attachment the store no longer holds becomes a placeholder."""
+        evicted = "0" * 64
+        conversation.append(
+            "user",
+            [
+                {"image": {"format": "png", "name": "chart.png", "source": {"ref": evicted}}},
+                {"text": "Describe"},
+            ],
+        )
+
+        messages = conversation.api_messages()
+        assert messages[0]["content"] == [
+            {"text": "[Earlier attachment chart.png removed from context]"},
+            {"text": "Describe"},
+        ]
+
+    def test_append_matches_full_rebuild(self, conversation, store):
+        """Test that the incremental view equals converting the whole history."""
+        ref = store.put(b"\x89PNG")
+        for turn in range(5):
+            conversation.append(
+                "user",
+                [
+                    {"image": {"format": "png", "source": {"ref": ref}, "name": "a.png"}},
+                    {"text": f"question {turn}"},
+                ],
+            )
+            conversation.append("assistant", [{"text": f"answer {turn}"}])
+
+        rebuilt = [
+            {
+                "role": message.role,
+                "content": [
+                    {"image": {"format": "png", "source": {"bytes": b"\x89PNG"}}}
+                    if isinstance(block, ImageBlock)
+                    else {"text": block.text}
+                    for block in message.content
+                ],
+            }
+            for message in conversation.messages
+        ]
+        assert conversation.api_messages() == rebuilt
+
+    def test_window_releases_api_form(self, conversation):
+        """Test that messages outside the request window are held as records only."""
+        for turn in range(5):
+            conversation.append("user", [{"text": f"question {turn}"}])
+            conversation.append("assistant", [{"text": f"answer {turn}"}])
+        full = conversation.api_messages()
+
+        windowed = conversation.api_messages(ContextPolicy(max_turns=2))
+
+        assert windowed == full[-4:]
+        assert conversation._api[:6] == [None] * 6
+        assert conversation.api_messages() == full
+
+    def test_clear(self, conversation):
+        """Test that clearing empties history and API view."""
+        conversation.append("user", [{"text": "Hello"}])
+        conversation.clear()
+
+        assert len(conversation) == 0
+        assert conversation.api_messages() == []
+
+
+class TestPromptCaching:
+    """Tests for cachePoint placement in requests."""
+
+    @staticmethod
+    def cache_points(messages):
+        return [
+            index
+            for index, message in enumerate(messages)
+            for block in message["content"]
+            if "cachePoint" in block
+        ]
+
+    def test_prefix_cache_point(self, conversation):
+        """Test that the history before the newest user message is cached."""
+        conversation.append("user", [{"text": "one"}])
+        conversation.append("assistant", [{"text": "two"}])
+        conversation.append("user", [{"text": "three"}])
+
+        messages = conversation.api_messages(cache_prefix=True)
+
+        assert self.cache_points(messages) == [1]
+        assert messages[1]["content"][-1] == {"cachePoint": {"type": "default"}}
+        # Stored history is not modified
+        assert not isinstance(conversation.messages[1].content[-1], CachePoint)
+        assert self.cache_points(conversation.api_messages()) == []
+
+    def test_no_prefix_on_first_turn(self, conversation):
+        """Test that a single user message gets no prefix cache point."""
+        conversation.append("user", [{"text": "hello"}])
+
+        assert self.cache_points(conversation.api_messages(cache_prefix=True)) == []
+
+    def test_cache_points_limited(self, conversation, store):
+        """Test that only the latest four cache points are sent."""
+        for turn in range(5):
+            ref = store.put(bytes([turn]) * 10)
+            conversation.append(
+                "user",
+                [
+                    {"image": {"format": "png", "source": {"ref": ref}, "name": "a.png"}},
+                    {"cachePoint": {"type": "default"}},
+                    {"text": f"q{turn}"},
+                ],
+            )
+            conversation.append("assistant", [{"text": f"a{turn}"}])
+        conversation.append("user", [{"text": "last"}])
+
+        messages = conversation.api_messages(cache_prefix=True)
+
+        assert self.cache_points(messages) == [4, 6, 8, 9]
+
+    def test_evicted_attachment_drops_cache_point(self, conversation, store):
+        """Test that a placeholder replaces the attachment and its cache point."""
+        ref = store.put(b"data")
+        conversation.append(
+            "user",
+            [
+                {"document": {"format": "txt", "name": "d_txt", "source": {"ref": ref}}},
+                {"cachePoint": {"type": "default"}},
+                {"text": "q"},
+            ],
+        )
+        conversation.append("assistant", [{"text": "a"}])
+        conversation.append("user", [{"text": "next"}])
+
+        messages = conversation.api_messages(ContextPolicy(attachment_max_age=0))
+
+        assert [next(iter(block)) for block in messages[0]["content"]] == ["text", "text"]
+        assert conversation.last_context.dropped_attachments == 1
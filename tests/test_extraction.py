@@ -0,0 +1,232 @@
+"""Tests for text extraction from attachments."""
+
+import io
+import json
+import zipfile
+
+import pytest
+
+from streamlit_chat_input_fileupload import extraction
+from streamlit_chat_input_fileupload.content import build_content_block
+from streamlit_chat_input_fileupload.context import ContextPolicy
+from streamlit_chat_input_fileupload.conversation import Conversation
+from streamlit_chat_input_fileupload.extraction import (
+    ExtractionCache,
+    ExtractionError,
+    compact_lines,
+    extract_text,
+    extracted_text,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(extraction, "cache", ExtractionCache())
+
+
+def zip_bytes(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as bundle:
+        for name, data in members.items():
+            bundle.writestr(name, data)
+    return buffer.getvalue()
+
+
+class TestCompaction:
+    """Tests for compacting text line by line."""
+
+    @pytest.mark.parametrize(
+        "lines,expected",
+        [
+            (["a  \n", "b\t\n"], ["a", "b"]),
+            (["a\n", "\n", "\n", "\n", "b\n"], ["a", "", "b"]),
+            (["\n", "\n", "a\n"], ["a"]),
+            (["x\n"] * 4 + ["y\n"], ["x", "[previous line repeated 3 more times]", "y"]),
+            (["x\n", "x\n"], ["x", "[previous line repeated 1 more times]"]),
+        ],
+    )
+    def test_compact_lines(self, lines, expected):
+        assert list(compact_lines(iter(lines))) == expected
+
+
+class TestExtractText:
+    """Tests for extracting text from a stream."""
+
+    def test_code_file(self):
+        """Test that source text keeps its lines without trailing space."""
+        source = b"def f():   \n    return 1\n\n\n\nprint(f())\n"
+
+        assert extract_text(io.BytesIO(source), "main.py") == [
+            "def f():\n    return 1\n\nprint(f())"
+        ]
+
+    def test_json_is_reserialised(self):
+        """Test that JSON loses its insignificant whitespace."""
+        data = json.dumps({"items": [{"id": i, "name": f"n{i}"} for i in range(3)]}, indent=4)
+
+        (text,) = extract_text(io.BytesIO(data.encode()), "data.json")
+
+        assert text == json.dumps(json.loads(data), separators=(",", ":"))
+        assert len(text) < len(data) / 2
+
+    def test_invalid_json_falls_back_to_text(self):
+        """Test that JSON lines are kept as text."""
+        data = b'{"a": 1}\n{"a": 2}\n'
+
+        assert extract_text(io.BytesIO(data), "events.json") == ['{"a": 1}\n{"a": 2}']
+
+    def test_log_repeats_folded(self):
+        """Test that repeated log lines are folded."""
+        log = b"start\n" + b"retrying\n" * 100 + b"done\n"
+
+        (text,) = extract_text(io.BytesIO(log), "app.log")
+
+        assert text == "start\nretrying\n[previous line repeated 99 more times]\ndone"
+
+    def test_chunks_and_truncation(self):
+        """Test that text is split at lines and cut at max_chars."""
+        log = "".join(f"line {i:04d}\n" for i in range(1000)).encode()
+
+        chunks = extract_text(io.BytesIO(log), "app.log", max_chars=2000, chunk_chars=500)
+
+        assert all(len(chunk) <= 500 for chunk in chunks[:-1])
+        assert chunks[0].startswith("line 0000\nline 0001")
+        assert chunks[-1].endswith("[... truncated]")
+        assert sum(len(chunk) for chunk in chunks) < 2100
+
+    def test_long_line_split(self):
+        """Test that a minified line is split into bounded chunks."""
+        chunks = extract_text(io.BytesIO(b"x" * 2500), "bundle.js", chunk_chars=1000)
+
+        assert [len(chunk) for chunk in chunks] == [1000, 1000, 500]
+
+    def test_undecodable_bytes_replaced(self):
+        """Test that invalid UTF-8 does not stop extraction."""
+        assert extract_text(io.BytesIO(b"caf\xe9\n"), "notes.txt") == ["caf�"]
+
+    def test_zip_bundle(self):
+        """Test that text members are extracted and binaries skipped."""
+        bundle = zip_bytes(
+            {
+                "src/main.py": "print('hi')\n",
+                "config.json": '{"debug": true}',
+                "logo.png": b"\x89PNG\r\n\x1a\n",
+            }
+        )
+
+        (text,) = extract_text(io.BytesIO(bundle), "project.zip")
+
+        assert text.split("\n") == [
+            "=== src/main.py ===",
+            "print('hi')",
+            "=== config.json ===",
+            '{"debug":true}',
+            "=== logo.png (skipped: not a text file) ===",
+        ]
+
+    @pytest.mark.parametrize("keep", [30, -30])
+    def test_truncated_zip(self, keep):
+        """Test that a truncated bundle raises ExtractionError, not a zipfile error."""
+        bundle = zip_bytes({"main.py": "print('hi')\n" * 200})
+
+        with pytest.raises(ExtractionError, match="unreadable zip bundle"):
+            extract_text(io.BytesIO(bundle[:keep]), "project.zip")
+
+    def test_encrypted_member(self):
+        """Test that an encrypted member raises ExtractionError."""
+        data = bytearray(zip_bytes({"main.py": "print('hi')\n"}))
+        # Set the "encrypted" flag in the local and central directory headers
+        data[6] |= 1
+        data[data.index(b"PK\x01\x02") + 8] |= 1
+
+        with pytest.raises(ExtractionError, match="encrypted"):
+            extract_text(io.BytesIO(bytes(data)), "project.zip")
+
+    def test_corrupt_member(self):
+        """Test that a member failing to decompress raises ExtractionError."""
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as bundle:
+            bundle.writestr("main.py", "print('hi')\n" * 200)
+        data = bytearray(buffer.getvalue())
+        # Flip bytes inside the compressed data of the member
+        data[40:50] = bytes(10)
+
+        with pytest.raises(ExtractionError):
+            extract_text(io.BytesIO(bytes(data)), "project.zip")
+
+
+class TestExtractedText:
+    """Tests for memoized extraction by content digest."""
+
+    def test_extracted_once(self, store):
+        """Test that a second lookup reuses the cached chunks."""
+        digest = store.put(b"hello\n")
+        opened = []
+
+        def opener(ref):
+            opened.append(ref)
+            return store.open(ref)
+
+        first = extracted_text(digest, opener, "a.txt")
+        second = extracted_text(digest, opener, "copy.txt")
+
+        assert first == second == ["hello"]
+        assert opened == [digest]
+        assert extraction.cache.hits == 1
+
+    def test_cache_evicts_least_recent(self):
+        cache = ExtractionCache(max_entries=2)
+        cache.put("a", ["1"])
+        cache.put("b", ["2"])
+        cache.get("a")
+        cache.put("c", ["3"])
+
+        assert cache.get("b") is None
+        assert cache.get("a") == ["1"]
+
+
+class TestExtractedBlocks:
+    """Tests for extracted text in content blocks and requests."""
+
+    def test_code_file_block(self, store):
+        """Test that a source file becomes a text block marked with its file."""
+        files = [{"name": "main.py", "type": "", "data": b"print(1)  \n", "size": 11}]
+
+        (block,) = build_content_block("", files, store)
+
+        assert block["text"] == '<file name="main.py">\nprint(1)\n</file>'
+        assert block["file"]["name"] == "main.py"
+        assert store.get(block["file"]["ref"]) == b"print(1)  \n"
+
+    def test_text_documents_optional(self, store):
+        """Test that plain text documents are extracted only when asked."""
+        files = [{"name": "notes.txt", "type": "text/plain", "data": b"hi", "size": 2}]
+
+        assert "document" in build_content_block("", files, store)[0]
+        assert "file" in build_content_block("", files, store, extract_documents=True)[0]
+
+    def test_request_sends_plain_text(self, store):
+        """Test that the request holds the text without the file marker."""
+        files = [{"name": "main.py", "type": "", "data": b"print(1)\n", "size": 9}]
+        conversation = Conversation(store.get)
+        conversation.append("user", build_content_block("Review", files, store))
+
+        content = conversation.api_messages()[0]["content"]
+
+        assert content[0] == {"text": '<file name="main.py">\nprint(1)\n</file>'}
+        assert content[1] == {"text": "Review"}
+
+    def test_old_extracted_file_replaced(self, store):
+        """Test that extracted text ages out of the context like attachments."""
+        files = [{"name": "main.py", "type": "", "data": b"print(1)\n", "size": 9}]
+        conversation = Conversation(store.get)
+        conversation.append("user", build_content_block("Review", files, store))
+        conversation.append("assistant", [{"text": "Looks fine"}])
+        conversation.append("user", [{"text": "Thanks"}])
+
+        messages = conversation.api_messages(ContextPolicy(attachment_max_age=0))
+
+        assert messages[0]["content"][0] == {
+            "text": "[Earlier attachment main.py removed from context]"
+        }
+        assert conversation.last_context.dropped_attachments == 1
@@ -0,0 +1,155 @@
+"""Tests for the attachment format table and content checks."""
+
+import pytest
+
+from streamlit_chat_input_fileupload.formats import (
+    FORMATS,
+    FormatError,
+    browser_formats,
+    check,
+    lookup,
+    sniff,
+)
+
+PNG = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR"
+JPEG = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01"
+GIF = b"GIF89a\x01\x00\x01\x00\x80\x00"
+WEBP = b"RIFF\x24\x00\x00\x00WEBPVP8 "
+PDF = b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n"
+ZIP = b"PK\x03\x04\x14\x00\x06\x00\x08\x00"
+OLE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1\x00\x00"
+TEXT = b"name,value\n1,2\n"
+
+
+class TestLookup:
+    """Tests for format lookup by name and MIME type."""
+
+    @pytest.mark.parametrize(
+        "file_name,mime_type,expected",
+        [
+            ("photo.PNG", "", "png"),
+            ("photo.jpg", "", "jpeg"),
+            ("photo.jpeg", "", "jpeg"),
+            ("upload", "image/jpg", "jpeg"),
+            ("anim.gif", "", "gif"),
+            ("still.webp", "", "webp"),
+            ("report.pdf", "", "pdf"),
+            ("letter.docx", "", "docx"),
+            ("sheet.xls", "", "xls"),
+            ("page.htm", "", "html"),
+            ("readme.markdown", "", "md"),
+            ("upload", "text/csv", "csv"),
+            ("data.json", "", None),
+            ("script.py", "text/x-python", None),
+            ("tool.exe", "application/x-msdownload", "missing"),
+        ],
+    )
+    def test_lookup(self, file_name, mime_type, expected):
+        """Test that the extension wins and the MIME type is the fallback."""
+        fmt = lookup(file_name, mime_type)
+
+        if expected == "missing":
+            assert fmt is None
+        else:
+            assert fmt.bedrock == expected
+
+    def test_table_has_unique_keys(self):
+        """Test that no extension or MIME type belongs to two formats."""
+        extensions = [ext for fmt in FORMATS for ext in fmt.extensions]
+        mime_types = [mime_type for fmt in FORMATS for mime_type in fmt.mime_types]
+
+        assert len(extensions) == len(set(extensions))
+        assert len(mime_types) == len(set(mime_types))
+
+
+class TestSniff:
+    """Tests for recognising formats from their leading bytes."""
+
+    @pytest.mark.parametrize(
+        "head,expected",
+        [
+            (PNG, "png"),
+            (JPEG, "jpeg"),
+            (GIF, "gif"),
+            (b"GIF87a\x01\x00", "gif"),
+            (WEBP, "webp"),
+            (PDF, "pdf"),
+            (ZIP, "docx"),
+            (OLE, "doc"),
+            (TEXT, None),
+            (b"", None),
+            (b"RIFF\x24\x00\x00\x00WAVEfmt ", None),
+        ],
+    )
+    def test_sniff(self, head, expected):
+        fmt = sniff(head)
+
+        assert (fmt.bedrock if fmt else None) == expected
+
+
+class TestCheck:
+    """Tests for accepting and rejecting files before upload."""
+
+    @pytest.mark.parametrize(
+        "file_name,mime_type,head,expected",
+        [
+            ("photo.png", "image/png", PNG, "png"),
+            ("photo.jpg", "", JPEG, "jpeg"),
+            ("anim.gif", "image/gif", GIF, "gif"),
+            ("still.webp", "image/webp", WEBP, "webp"),
+            ("report.pdf", "application/pdf", PDF, "pdf"),
+            ("sheet.xlsx", "", ZIP, "xlsx"),
+            ("letter.docx", "", ZIP, "docx"),
+            ("letter.doc", "", OLE, "doc"),
+            ("data.csv", "text/csv", TEXT, "csv"),
+            ("empty.txt", "text/plain", b"", "txt"),
+            ("data.json", "application/json", b'{"a": 1}', "JSON file"),
+            ("app.log", "", b"INFO started", "log file"),
+            ("main.py", "text/x-python", b"import os\n", "source file"),
+            ("bundle.zip", "application/zip", ZIP, "zip archive"),
+        ],
+    )
+    def test_accepts(self, file_name, mime_type, head, expected):
+        """Test that content matching the claimed format is accepted."""
+        fmt = check(file_name, mime_type, head)
+
+        assert expected in (fmt.bedrock, fmt.label)
+
+    @pytest.mark.parametrize(
+        "file_name,mime_type,head,reason",
+        [
+            ("photo.png", "image/png", JPEG, "content is a JPEG image, not a PNG image"),
+            ("photo.jpg", "image/jpeg", WEBP, "content is a WebP image, not a JPEG image"),
+            ("report.pdf", "application/pdf", ZIP, "content is a Word document, not a PDF"),
+            ("notes.txt", "text/plain", PDF, "content is a PDF document, not a text file"),
+            ("report.pdf", "application/pdf", TEXT, "not a valid PDF document"),
+            ("photo.png", "image/png", b"", "not a valid PNG image"),
+            ("notes.txt", "text/plain", b"\x00\x01\x02binary", "binary content in a text file"),
+            ("data.json", "application/json", b"\x00\x00", "binary content in a JSON file"),
+            ("bundle.zip", "application/zip", TEXT, "not a valid zip archive"),
+            ("tool.exe", "application/x-msdownload", b"MZ\x90\x00", "unsupported format"),
+            ("upload", "", PNG, "unsupported format"),
+        ],
+    )
+    def test_rejects(self, file_name, mime_type, head, reason):
+        """Test that unsupported and mislabelled files are rejected."""
+        with pytest.raises(FormatError, match=reason):
+            check(file_name, mime_type, head)
+
+
+class TestBrowserFormats:
+    """Tests for the table sent to the component."""
+
+    def test_only_supported_formats(self):
+        """Test that every supported format is sent, including extracted ones."""
+        labels = [fmt["label"] for fmt in browser_formats()]
+
+        assert labels == [fmt.label for fmt in FORMATS if fmt.supported]
+        assert {"PNG image", "JSON file", "zip archive"} <= set(labels)
+
+    def test_signatures_as_byte_lists(self):
+        """Test that signatures are JSON friendly."""
+        webp = next(fmt for fmt in browser_formats() if fmt["label"] == "WebP image")
+
+        assert webp["magic"] == [[[0, list(b"RIFF")], [8, list(b"WEBP")]]]
+        assert webp["extensions"] == ["webp"]
@@ -0,0 +1,71 @@
+"""Tests for rendering the newest messages of the chat history."""
+
+from streamlit.testing.v1 import AppTest
+
+from streamlit_chat_input_fileupload.history import message_items
+from streamlit_chat_input_fileupload.records import message_from_dicts
+
+
+def history_app(count, visible, page_size):
+    """Script rendering a history of count messages."""
+    from streamlit_chat_input_fileupload.history import render_history
+    from streamlit_chat_input_fileupload.records import Message, TextBlock
+
+    messages = [
+        Message("user" if i % 2 == 0 else "assistant", (TextBlock(f"message {i}"),))
+        for i in range(count)
+    ]
+    render_history(messages, visible=visible, page_size=page_size)
+
+
+def run_history(count, visible=4, page_size=3):
+    return AppTest.from_function(history_app, args=(count, visible, page_size)).run()
+
+
+class TestMessageItems:
+    """Tests for what a stored message shows."""
+
+    def test_text_and_attachments(self):
+        """Test that text is markdown and attachments are captions."""
+        content = [
+            {"image": {"format": "png", "source": {"ref": "a"}, "name": "chart.png"}},
+            {"document": {"format": "pdf", "name": "report", "source": {"ref": "b"}}},
+            {"text": "<file>...</file>", "file": {"name": "main.py", "ref": "c", "size": 9}},
+            {"cachePoint": {"type": "default"}},
+            {"text": "What changed?"},
+        ]
+        assert message_items(message_from_dicts("user", content).content) == [
+            ("caption", "[Image: chart.png]"),
+            ("caption", "[Document: report]"),
+            ("caption", "[File: main.py]"),
+            ("markdown", "What changed?"),
+        ]
+
+
+class TestRenderHistory:
+    """Tests for the history window and paging."""
+
+    def test_short_history_shown_whole(self):
+        """Test that a history within the window is shown without a button."""
+        at = run_history(3)
+
+        assert len(at.chat_message) == 3
+        assert not at.button
+
+    def test_only_newest_shown(self):
+        """Test that only the newest messages are rendered."""
+        at = run_history(10)
+
+        assert [m.value for m in at.markdown] == [f"message {i}" for i in range(6, 10)]
+        assert at.button[0].label == "Show earlier messages (6 hidden)"
+
+    def test_show_earlier_pages_in(self):
+        """Test that the button adds a page of earlier messages each click."""
+        at = run_history(10)
+        at.button[0].click().run()
+
+        assert len(at.chat_message) == 7
+        at.button[0].click().run()
+
+        assert len(at.chat_message) == 10
+        assert not at.button
@@ -0,0 +1,107 @@
+"""Import-time checks: what importing the package loads, via python -X importtime."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Modules costing tens to hundreds of milliseconds that are loaded on first use
+HEAVY = ("streamlit", "boto3", "botocore", "dotenv")
+
+# Cold import budget for modules that need none of HEAVY, in microseconds;
+# generous enough for a loaded CI runner, far below the ~0.3 s of Streamlit
+BUDGET_US = 100_000
+
+
+def import_times(statement, **env):
+    """Cumulative import time per module (microseconds) of running statement."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        env={**os.environ, **env},
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.removeprefix("import time:").split("|")
+        times[module.strip()] = int(cumulative)
+    return times, result.stdout
+
+
+class TestColdImport:
+    """Tests that heavy dependencies are imported on first use only."""
+
+    @pytest.mark.parametrize(
+        "module",
+        [
+            "streamlit_chat_input_fileupload",
+            "streamlit_chat_input_fileupload.backends",
+            "streamlit_chat_input_fileupload.clients",
+            "streamlit_chat_input_fileupload.config",
+            "streamlit_chat_input_fileupload.processing",
+            "streamlit_chat_input_fileupload.records",
+            "streamlit_chat_input_fileupload.conversation",
+            "streamlit_chat_input_fileupload.response_cache",
+        ],
+    )
+    def test_no_heavy_imports(self, module):
+        """Test that the module loads none of the heavy dependencies, within budget."""
+        times, _ = import_times(f"import {module}")
+
+        assert not [name for name in times if name.split(".")[0] in HEAVY]
+        assert times[module] < BUDGET_US
+
+    def test_client_manager_defers_boto3(self):
+        """Test that creating the shared client manager does not import boto3."""
+        times, _ = import_times(
+            "from streamlit_chat_input_fileupload.clients import get_client_manager\n"
+            "get_client_manager()"
+        )
+        assert "boto3" not in times
+
+    def test_component_loaded_on_access(self):
+        """Test that the component is imported when the package attribute is used."""
+        # importlib.import_module() imports are not listed by -X importtime
+        _, stdout = import_times(
+            "import sys\n"
+            "import streamlit_chat_input_fileupload as p\n"
+            "print('streamlit' in sys.modules, callable(p.chat_input_with_upload))\n"
+            "print('streamlit' in sys.modules)"
+        )
+        assert stdout.split() == ["False", "True", "True"]
+
+    def test_submodule_import_keeps_function(self):
+        """Test that importing the component submodule leaves the function on the package."""
+        _, stdout = import_times(
+            "import streamlit_chat_input_fileupload.component\n"
+            "from streamlit_chat_input_fileupload import chat_input_with_upload\n"
+            "print(callable(chat_input_with_upload))"
+        )
+        assert stdout.strip() == "True"
+
+
+class TestConfig:
+    """Tests that settings from the environment are read on first access."""
+
+    def test_env_read_on_access(self):
+        """Test that .env is loaded and the environment read when a setting is used."""
+        times, stdout = import_times(
+            "import os\n"
+            "from streamlit_chat_input_fileupload import config\n"
+            "os.environ['AWS_REGION'] = 'eu-west-1'\n"
+            "print(config.AWS_REGION, config.MAX_TOKENS)",
+            AWS_REGION="us-west-2",
+        )
+        assert "dotenv" in times
+        assert stdout.split() == ["eu-west-1", "4096"]
+
+    def test_unknown_setting(self):
+        """Test that a missing setting raises AttributeError."""
+        from streamlit_chat_input_fileupload import config
+
+        with pytest.raises(AttributeError):
+            _ = config.NO_SUCH_SETTING
@@ -0,0 +1,159 @@
+"""Tests for processing uploaded files on the worker pool."""
+
+import base64
+from concurrent.futures import ThreadPoolExecutor
+import io
+import threading
+
+import pytest
+
+from streamlit_chat_input_fileupload.processing import (
+    FileProcessingError,
+    FileProcessor,
+    decode_file,
+    process_file,
+)
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 24
+
+
+def encoded(name, data, media_type="text/plain", size=None):
+    return {
+        "name": name,
+        "type": media_type,
+        "size": len(data) if size is None else size,
+        "encoded": base64.b64encode(data).decode("ascii"),
+    }
+
+
+class TestDecodeFile:
+    """Tests for decoding and checking a single file."""
+
+    def test_decodes_payload(self):
+        """Test that the base64 payload becomes data."""
+        file_info = decode_file(encoded("a.txt", b"alpha"))
+
+        assert file_info["data"] == b"alpha"
+        assert "encoded" not in file_info
+
+    def test_invalid_base64(self):
+        """Test that a corrupt payload is rejected."""
+        with pytest.raises(FileProcessingError, match="invalid base64"):
+            decode_file({"name": "a.txt", "type": "text/plain", "encoded": "not base64!"})
+
+    def test_size_mismatch(self):
+        """Test that a truncated upload is rejected."""
+        with pytest.raises(FileProcessingError, match="expected 10 bytes, received 5"):
+            decode_file(encoded("a.txt", b"alpha", size=10))
+
+    @pytest.mark.parametrize("declared", ["", "image/png"])
+    def test_canonical_type(self, declared):
+        """Test that the type is set from the format the name claims."""
+        assert decode_file(encoded("x.png", PNG, declared))["type"] == "image/png"
+
+    def test_mislabelled_file(self):
+        """Test that content of another format is rejected."""
+        with pytest.raises(FileProcessingError, match="content is a PNG image, not a JPEG"):
+            decode_file(encoded("x.jpg", PNG, "image/jpeg"))
+
+    def test_spooled_file(self, tmp_path):
+        """Test that chunked uploads are checked from their spool file."""
+        path = tmp_path / "spool"
+        path.write_bytes(PNG)
+
+        file_info = decode_file({"name": "x.png", "type": "", "size": len(PNG), "path": str(path)})
+
+        assert file_info["size"] == len(PNG)
+
+    def test_large_payload_spooled(self):
+        """Test that a payload above spool_threshold is decoded into a file object."""
+        file_info = decode_file(encoded("x.png", PNG, "image/png"), spool_threshold=16)
+
+        assert file_info["data"].read() == PNG
+        assert file_info["size"] == len(PNG)
+
+    def test_rejected_spool_closed(self):
+        """Test that the spooled file of a rejected upload is closed."""
+        spool = io.BytesIO(PNG)
+        with pytest.raises(FileProcessingError):
+            decode_file({"name": "x.jpg", "type": "image/jpeg", "data": spool})
+
+        assert spool.closed
+
+    def test_rejected_spool_file_deleted(self, tmp_path):
+        """Test that the spool file of a rejected chunked upload is deleted."""
+        path = tmp_path / "spool"
+        path.write_bytes(PNG)
+        with pytest.raises(FileProcessingError):
+            decode_file({"name": "x.jpg", "type": "image/jpeg", "path": str(path)})
+
+        assert not path.exists()
+
+    def test_spooled_file_stored(self, store):
+        """Test that a spooled file is moved into the store and closed."""
+        blocks = process_file(encoded("x.png", PNG, "image/png"), store, spool_threshold=16)
+
+        assert store.get(blocks[0]["image"]["source"]["ref"]) == PNG
+
+
+class TestFileProcessor:
+    """Tests for the worker pool."""
+
+    def test_process_file_stores_bytes(self, store):
+        """Test that a processed file is stored and referenced."""
+        blocks = process_file(encoded("photo.png", PNG, "image/png"), store)
+
+        assert blocks[0]["image"]["format"] == "png"
+        assert store.get(blocks[0]["image"]["source"]["ref"]) == PNG
+
+    def test_future_results(self, store):
+        """Test that submit() returns futures for the content blocks."""
+        processor = FileProcessor(store, max_workers=2)
+        futures = [processor.submit(encoded(f"{i}.txt", f"file {i}".encode())) for i in range(3)]
+
+        names = [future.result(5)[0]["document"]["name"] for future in futures]
+        processor.shutdown()
+
+        assert names == ["0_txt", "1_txt", "2_txt"]
+
+    def test_errors_surface_on_result(self, store):
+        """Test that a validation error is raised by the future."""
+        processor = FileProcessor(store)
+        future = processor.submit(encoded("a.txt", b"alpha", size=99))
+
+        with pytest.raises(FileProcessingError):
+            future.result(5)
+        processor.shutdown()
+
+    def test_corrupt_zip_rejected(self, store):
+        """Test that a truncated zip bundle is a FileProcessingError, not a crash."""
+        import io
+        import zipfile
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as bundle:
+            bundle.writestr("main.py", "print('hi')\n" * 200)
+        truncated = buffer.getvalue()[:100]
+        processor = FileProcessor(store)
+        future = processor.submit(encoded("project.zip", truncated, "application/zip"))
+
+        with pytest.raises(FileProcessingError, match="project.zip: unreadable zip bundle"):
+            future.result(5)
+        processor.shutdown()
+
+    def test_bounded_queue(self, store):
+        """Test that submit() waits for a slot once max_pending files are queued."""
+        release = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=1)
+        executor.submit(release.wait, 5)
+        processor = FileProcessor(store, max_pending=2, executor=executor)
+        first = processor.submit(encoded("a.txt", b"a"))
+        processor.submit(encoded("b.txt", b"b"))
+
+        with pytest.raises(TimeoutError):
+            processor.submit(encoded("c.txt", b"c"), timeout=0.05)
+
+        release.set()
+        first.result(5)
+        processor.submit(encoded("c.txt", b"c"), timeout=5).result(5)
+        processor.shutdown()
@@ -0,0 +1,81 @@
+"""Tests for the compact message records."""
+
+import pytest
+
+from streamlit_chat_input_fileupload.records import (
+    CachePoint,
+    DocumentBlock,
+    FileRef,
+    ImageBlock,
+    Message,
+    TextBlock,
+    block_from_dict,
+    message_from_dicts,
+    placeholder,
+)
+
+
+class TestBlockFromDict:
+    """Tests for converting content.py blocks to records."""
+
+    @pytest.mark.parametrize(
+        ("block", "record"),
+        [
+            ({"text": "hi"}, TextBlock("hi")),
+            (
+                {"text": "<file>", "file": {"name": "a.py", "ref": "c", "size": 9}},
+                TextBlock("<file>", FileRef("a.py", "c", 9)),
+            ),
+            (
+                {"image": {"format": "png", "source": {"ref": "a"}, "name": "a.png", "size": 3}},
+                ImageBlock("png", "a", "a.png", 3),
+            ),
+            (
+                {"document": {"format": "pdf", "name": "r_pdf", "source": {"ref": "b"}}},
+                DocumentBlock("pdf", "r_pdf", "b"),
+            ),
+            ({"cachePoint": {"type": "default"}}, CachePoint()),
+        ],
+    )
+    def test_kinds(self, block, record):
+        """Test that every block kind becomes its record."""
+        assert block_from_dict(block) == record
+
+    def test_slotted(self):
+        """Test that records carry no per-instance dict."""
+        message = message_from_dicts("user", [{"text": "hi"}])
+        assert not hasattr(message, "__dict__")
+        assert not hasattr(message.content[0], "__dict__")
+
+
+class TestToApi:
+    """Tests for serializing records to the Converse API shape."""
+
+    def test_shares_text_and_bytes(self):
+        """Test that text and attachment bytes are referenced, not copied."""
+        data = b"%PDF-1.7" * 1000
+        text = "Summarize " * 10
+        message = Message("user", (DocumentBlock("pdf", "r_pdf", "ref"), TextBlock(text)))
+
+        api = message.to_api({"ref": data}.__getitem__)
+
+        assert api["content"][0]["document"]["source"]["bytes"] is data
+        assert api["content"][1]["text"] is text
+
+    def test_display_fields_dropped(self):
+        """Test that names and sizes kept for display are not sent."""
+        blocks = (
+            ImageBlock("png", "a", "a.png", 3),
+            TextBlock("<file>", FileRef("a.py", "c", 9)),
+            CachePoint(),
+        )
+        assert [block.to_api({"a": b"png"}.__getitem__) for block in blocks] == [
+            {"image": {"format": "png", "source": {"bytes": b"png"}}},
+            {"text": "<file>"},
+            {"cachePoint": {"type": "default"}},
+        ]
+
+    def test_placeholder(self):
+        """Test that a dropped attachment is named in its placeholder."""
+        assert "a.png" in placeholder(ImageBlock("png", "a", "a.png"))["text"]
+        assert "a.py" in placeholder(TextBlock("<file>", FileRef("a.py", "c")))["text"]
@@ -0,0 +1,175 @@
+"""Tests for caching replies to identical requests."""
+
+import pytest
+
+from streamlit_chat_input_fileupload import response_cache
+from streamlit_chat_input_fileupload.backends import FakeBackend
+from streamlit_chat_input_fileupload.bedrock import StreamStats, iter_stream_text
+from streamlit_chat_input_fileupload.response_cache import (
+    CachedBackend,
+    MemoryResponseCache,
+    ResponseCache,
+    SQLiteResponseCache,
+    create_response_cache,
+    request_key,
+)
+
+
+def request(text="Summarize this report.", pdf=b"%PDF-1.7 report", max_tokens=512):
+    return {
+        "modelId": "model",
+        "inferenceConfig": {"maxTokens": max_tokens},
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {"document": {"format": "pdf", "name": "r", "source": {"bytes": pdf}}},
+                    {"cachePoint": {"type": "default"}},
+                    {"text": text},
+                ],
+            }
+        ],
+    }
+
+
+def reply(text="Done."):
+    return {"text": text, "stopReason": "end_turn", "usage": {"outputTokens": 2}}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    """Factory for each cache backend."""
+
+    def make(**kwargs):
+        if request.param == "memory":
+            return MemoryResponseCache(**kwargs)
+        return SQLiteResponseCache(tmp_path / "responses.db", **kwargs)
+
+    return make
+
+
+class TestRequestKey:
+    """Tests for identifying a request."""
+
+    def test_normalized(self):
+        """Test that cache points and surrounding whitespace do not change the key."""
+        plain = request()
+        plain["messages"][0]["content"].pop(1)
+
+        assert request_key(plain) == request_key(request(text="  Summarize this report.\n"))
+
+    @pytest.mark.parametrize(
+        "changed",
+        [
+            request(text="Summarize this memo."),
+            request(pdf=b"%PDF-1.7 other"),
+            request(max_tokens=1024),
+            {**request(), "modelId": "other"},
+        ],
+    )
+    def test_differences_change_key(self, changed):
+        """Test that the text, attachments, inference config and model are all in the key."""
+        assert request_key(changed) != request_key(request())
+
+
+class TestResponseCache:
+    """Tests for the memory and SQLite caches."""
+
+    def test_hit_and_miss(self, make_cache):
+        """Test that stored replies are returned and lookups counted."""
+        cache = make_cache()
+        assert cache.get("a") is None
+        cache.put("a", reply())
+
+        assert cache.get("a") == reply()
+        assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+    def test_ttl(self, make_cache, monkeypatch):
+        """Test that replies expire after ttl_s."""
+        cache = make_cache(ttl_s=60)
+        cache.put("a", reply())
+        now = response_cache.time.time()
+        monkeypatch.setattr(response_cache.time, "time", lambda: now + 61)
+
+        assert cache.get("a") is None
+
+    def test_size_bound_evicts_least_recently_used(self, make_cache):
+        """Test that the least recently used replies go beyond max_bytes."""
+        size = len(response_cache.json.dumps(reply("x" * 100)))
+        cache = make_cache(max_bytes=size * 2)
+        cache.put("a", reply("a" * 100))
+        cache.put("b", reply("b" * 100))
+        cache.get("a")
+        cache.put("c", reply("c" * 100))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+    def test_base_is_abstract(self):
+        """Test that the base class cannot be used without a store."""
+        with pytest.raises(TypeError, match="abstract"):
+            ResponseCache()
+
+    def test_sqlite_persists(self, tmp_path):
+        """Test that the SQLite cache is read back by a new instance."""
+        SQLiteResponseCache(tmp_path / "responses.db").put("a", reply())
+        assert SQLiteResponseCache(tmp_path / "responses.db").get("a") == reply()
+
+    def test_create(self, tmp_path):
+        """Test that the configured kind is created, and no cache when off."""
+        assert create_response_cache(None) is None
+        assert isinstance(create_response_cache("memory"), MemoryResponseCache)
+        assert isinstance(
+            create_response_cache("sqlite", path=tmp_path / "r.db"), SQLiteResponseCache
+        )
+        with pytest.raises(ValueError, match="must be one of"):
+            create_response_cache("redis")
+
+
+class TestCachedBackend:
+    """Tests for answering repeated requests from the cache."""
+
+    def stream_text(self, backend, **kwargs):
+        stats = StreamStats()
+        list(iter_stream_text(backend.converse_stream(**request(**kwargs))["stream"], stats))
+        return stats
+
+    def test_streamed_reply_replayed(self):
+        """Test that a repeated streamed request is answered from the cache."""
+        fake = FakeBackend("The report is fine.", first_token_s=0, token_s=0)
+        backend = CachedBackend(fake, MemoryResponseCache())
+
+        first = self.stream_text(backend)
+        second = self.stream_text(backend, text="Summarize this report. ")
+
+        assert second.text == first.text == "The report is fine."
+        assert second.stop_reason == "end_turn"
+        assert first.usage["outputTokens"] == 4
+        assert second.usage == dict.fromkeys(first.usage, 0)
+        assert fake.metrics()["calls"] == 1
+        metrics = backend.metrics()
+        assert (metrics["cache_hits"], metrics["cache_misses"]) == (1, 1)
+
+    def test_converse_cached(self):
+        """Test that converse() replies are cached too."""
+        fake = FakeBackend("Fine.", first_token_s=0, token_s=0)
+        backend = CachedBackend(fake, MemoryResponseCache())
+
+        responses = [backend.converse(**request()) for _ in range(2)]
+
+        assert responses[0]["output"] == responses[1]["output"]
+        assert responses[1]["usage"] == dict.fromkeys(responses[0]["usage"], 0)
+        assert fake.metrics()["calls"] == 1
+
+    def test_stopped_reply_not_cached(self):
+        """Test that a reply closed before its end is not stored."""
+        fake = FakeBackend("one two three", first_token_s=0, token_s=0)
+        cache = MemoryResponseCache()
+        stream = CachedBackend(fake, cache).converse_stream(**request())["stream"]
+        events = iter(stream)
+        next(events)
+        stream.close()
+        list(events)
+
+        assert len(cache) == 0
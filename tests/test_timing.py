@@ -0,0 +1,131 @@
+"""Tests for per-turn timing spans and their OTLP export."""
+
+import json
+import logging
+import time
+
+from streamlit_chat_input_fileupload.timing import Span, TurnTrace, browser_spans, wall_ns
+
+
+class TestSpan:
+    """Tests for spans timed with perf_counter."""
+
+    def test_wall_clock_placement(self):
+        """Test that perf_counter readings map onto the Unix clock."""
+        assert abs(wall_ns(time.perf_counter()) - time.time_ns()) < 50_000_000
+
+    def test_timed(self):
+        """Test that a span covers the two readings and keeps its attributes."""
+        start = time.perf_counter()
+        span = Span.timed("stage", start, start + 0.25, files=2)
+
+        assert span.duration_ms == 250
+        assert span.attributes == {"files": 2}
+
+    def test_timed_ends_now(self):
+        """Test that a span without an end reading ends at the current time."""
+        span = Span.timed("stage", time.perf_counter() - 0.1)
+        assert span.duration_ms >= 100
+
+
+class TestBrowserSpans:
+    """Tests for converting the browser timings of a message."""
+
+    def test_read_and_send(self):
+        """Test that file reads and the send become spans on the Unix clock."""
+        timings = {
+            "sentAt": 1_000_500.0,
+            "payloadBytes": 1234,
+            "heldMs": 80,
+            "interactiveMs": 4.5,
+            "files": [{"name": "a.pdf", "size": 99, "readStart": 1_000_000, "readEnd": 1_000_400}],
+        }
+        read, send = browser_spans(timings, received_ns=1_000_700 * 1_000_000)
+
+        assert (read.name, read.duration_ms) == ("browser.read", 400)
+        assert read.attributes == {"file.name": "a.pdf", "file.size": 99}
+        assert (send.name, send.duration_ms) == ("browser.send", 200)
+        assert send.attributes == {
+            "payload.bytes": 1234,
+            "message.held_ms": 80.0,
+            "input.interactive_ms": 4.5,
+        }
+
+    def test_send_never_negative(self):
+        """Test that a browser clock ahead of the server does not give a negative span."""
+        (send,) = browser_spans({"sentAt": 2_000.0}, received_ns=1_000 * 1_000_000)
+        assert send.duration_ms == 0
+
+    def test_malformed_entries_skipped(self):
+        """Test that missing or invalid browser values are ignored."""
+        timings = {
+            "sentAt": "soon",
+            "files": [None, {"name": "a", "readStart": 5}, {"readStart": 9, "readEnd": 3}],
+        }
+        assert browser_spans(timings, received_ns=0) == []
+        assert browser_spans(None, received_ns=0) == []
+
+
+class TestTurnTrace:
+    """Tests for collecting and exporting the spans of a turn."""
+
+    def test_span_context_manager(self):
+        """Test that a block is timed and attributes can be added inside it."""
+        trace = TurnTrace()
+        with trace.span("request.build") as span:
+            span.attributes["messages"] = 3
+
+        assert [s.name for s in trace.spans] == ["request.build"]
+        assert trace.spans[0].attributes == {"messages": 3}
+        assert trace.spans[0].end_ns >= trace.spans[0].start_ns
+
+    def test_root_covers_all_spans(self):
+        """Test that the root span stretches over stages added from earlier."""
+        trace = TurnTrace()
+        earlier = Span("browser.read", trace.root.start_ns - 5_000_000, trace.root.start_ns)
+        trace.add(earlier)
+        trace.finish()
+
+        assert trace.root.start_ns == earlier.start_ns
+        assert trace.root.duration_ms >= 5
+
+    def test_durations_sum_repeated_stages(self):
+        """Test that stages of the same name are added up."""
+        trace = TurnTrace()
+        trace.add(Span("reply.stream", 0, 2_000_000), Span("reply.stream", 5_000_000, 6_000_000))
+        trace.finish()
+
+        durations = trace.durations()
+        assert durations["reply.stream"] == 3
+        assert "chat.turn" in durations
+
+    def test_otlp_shape(self):
+        """Test that spans are exported as an OTLP/JSON trace under one root."""
+        trace = TurnTrace(session_id="abc")
+        trace.add(Span("files.process", 10, 20, {"files": 2, "ok": True, "ratio": 0.5}))
+        trace.finish()
+
+        (resource_spans,) = trace.to_otlp()["resourceSpans"]
+        root, child = resource_spans["scopeSpans"][0]["spans"]
+        assert root["parentSpanId"] == ""
+        assert root["attributes"] == [{"key": "session_id", "value": {"stringValue": "abc"}}]
+        assert child["parentSpanId"] == root["spanId"]
+        assert child["traceId"] == root["traceId"] == trace.trace_id
+        assert len(trace.trace_id) == 32 and len(child["spanId"]) == 16
+        assert (child["startTimeUnixNano"], child["endTimeUnixNano"]) == ("10", "20")
+        assert child["attributes"] == [
+            {"key": "files", "value": {"intValue": "2"}},
+            {"key": "ok", "value": {"boolValue": True}},
+            {"key": "ratio", "value": {"doubleValue": 0.5}},
+        ]
+
+    def test_export_logs_one_json_line(self, caplog):
+        """Test that export() logs the OTLP/JSON trace."""
+        trace = TurnTrace()
+        trace.finish()
+        with caplog.at_level(logging.INFO, logger="streamlit_chat_input_fileupload.timing"):
+            trace.export()
+
+        (record,) = caplog.records
+        assert "\n" not in record.getMessage()
+        assert json.loads(record.getMessage()) == trace.to_otlp()
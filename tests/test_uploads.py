@@ -0,0 +1,141 @@
+"""Tests for the chunked upload spool."""
+
+import base64
+import binascii
+import hashlib
+
+import pytest
+
+from streamlit_chat_input_fileupload import uploads
+from streamlit_chat_input_fileupload.uploads import UploadRegistry, should_spool, spool_base64
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Registry spooling into a temporary directory."""
+    return UploadRegistry(spool_dir=tmp_path)
+
+
+class TestChunkedUpload:
+    """Tests for assembling uploads from chunks."""
+
+    def test_chunks_in_order(self, registry):
+        """Test that in-order chunks are committed and checksummed."""
+        payload = b"0123456789" * 10
+        upload = registry.begin("u1", "data.bin", "application/octet-stream", len(payload))
+
+        for offset in range(0, len(payload), 32):
+            assert upload.write(offset, payload[offset : offset + 32]) == min(
+                offset + 32, len(payload)
+            )
+
+        result = registry.finish("u1")
+        assert result["size"] == len(payload)
+        assert result["original_size"] == len(payload)
+        assert result["sha256"] == hashlib.sha256(payload).hexdigest()
+        assert result["path"].read_bytes() == payload
+        assert registry.get("u1") is None
+
+    def test_original_size_reported(self, registry):
+        """Test that the pre-re-encoding size is carried to the result."""
+        upload = registry.begin("u1", "photo.webp", "image/webp", 4, original_size=4096)
+        upload.write(0, b"RIFF")
+
+        result = registry.finish("u1")
+        assert result["size"] == 4
+        assert result["original_size"] == 4096
+
+    def test_out_of_order_chunk_ignored(self, registry):
+        """Test that a chunk at the wrong offset returns the committed offset."""
+        upload = registry.begin("u1", "a.txt", "text/plain", 8)
+        upload.write(0, b"abcd")
+
+        assert upload.write(6, b"gh") == 4
+        assert upload.write(0, b"abcd") == 4
+        assert upload.path.read_bytes() == b"abcd"
+
+    def test_resume_returns_existing_upload(self, registry):
+        """Test that beginning the same upload again resumes it."""
+        upload = registry.begin("u1", "a.txt", "text/plain", 8)
+        upload.write(0, b"abcd")
+
+        resumed = registry.begin("u1", "a.txt", "text/plain", 8)
+        assert resumed is upload
+        assert resumed.offset == 4
+
+    def test_restart_with_other_size_removes_old_spool_file(self, registry):
+        """Test that beginning an ID again with another size deletes the old spool file."""
+        old = registry.begin("u1", "a.txt", "text/plain", 8)
+        old.write(0, b"abcd")
+
+        new = registry.begin("u1", "a.txt", "text/plain", 16)
+        assert new is not old
+        assert not old.path.exists()
+        assert list(registry.spool_dir.iterdir()) == [new.path]
+
+    @pytest.mark.parametrize(
+        "size,message", [(-1, "invalid upload size -1"), (10**12, "upload limit")]
+    )
+    def test_begin_rejects_size_out_of_bounds(self, registry, size, message):
+        """Test that a negative size or one above max_size is refused without a spool file."""
+        with pytest.raises(ValueError, match=message):
+            registry.begin("u1", "a.bin", "application/octet-stream", size, max_size=1024)
+
+        assert registry.get("u1") is None
+        assert list(registry.spool_dir.iterdir()) == []
+
+    def test_finish_incomplete_upload(self, registry):
+        """Test that an incomplete upload cannot be finished."""
+        upload = registry.begin("u1", "a.txt", "text/plain", 8)
+        upload.write(0, b"abcd")
+
+        assert registry.finish("u1") is None
+        assert registry.finish("missing") is None
+
+    def test_discard_removes_spool_file(self, registry):
+        """Test that discarding an upload deletes its spool file."""
+        upload = registry.begin("u1", "a.txt", "text/plain", 8)
+        registry.discard("u1")
+
+        assert not upload.path.exists()
+        assert registry.get("u1") is None
+
+    def test_prune_stale_uploads(self, registry):
+        """Test that stale partial uploads are pruned."""
+        registry.begin("u1", "a.txt", "text/plain", 8)
+
+        assert registry.prune(max_age=-1) == 1
+        assert registry.get("u1") is None
+
+
+class TestSpoolBase64:
+    """Tests for decoding large payloads into a temporary file."""
+
+    def test_small_payload_stays_in_memory(self):
+        """Test that a payload within max_size is not written to disk."""
+        spool = spool_base64(base64.b64encode(b"alpha").decode(), max_size=100)
+
+        assert spool.read() == b"alpha"
+        assert not spool._rolled
+
+    def test_large_payload_rolls_over(self, monkeypatch):
+        """Test that a payload beyond max_size is decoded block by block to disk."""
+        monkeypatch.setattr(uploads, "_DECODE_CHARS", 8)
+        data = bytes(range(256)) * 4
+        spool = spool_base64(base64.b64encode(data).decode(), max_size=100)
+
+        assert spool._rolled
+        assert spool.read() == data
+
+    def test_invalid_payload(self):
+        """Test that an invalid payload raises with validate."""
+        with pytest.raises(binascii.Error):
+            spool_base64("not base64!", max_size=100, validate=True)
+
+    @pytest.mark.parametrize(
+        ("size", "threshold", "expected"), [(100, 99, True), (99, 99, False), (100, None, False)]
+    )
+    def test_should_spool(self, size, threshold, expected):
+        """Test that the decoded size of the payload is compared to the threshold."""
+        encoded = base64.b64encode(b"x" * size).decode()
+        assert should_spool(encoded, threshold) is expected